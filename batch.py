@@ -0,0 +1,195 @@
+"""
+Пакетная среда: B партий одновременно, по одному выстрелу в каждой партии за шаг.
+
+Среда хранит слои всех B полей подряд в плоских массивах байтов, клетка (row, col) поля b - байт
+b * size * size + (row - 1) * size + (col - 1):
+- слой палуб: 1 - непотопленная палуба, 0 - пусто (подбитая палуба становится 0, поэтому повторный
+  выстрел в нее - промах);
+- слой кораблей: номер корабля в клетке (1..количество кораблей) или 0;
+- публичный слой (наблюдения): 0 - сюда не стреляли, 1 - промах, 3 - попадание.
+Кроме того, для каждого поля хранятся счетчики непотопленных палуб каждого корабля и всего флота.
+
+Шаг (step) выполняется над всеми полями сразу: номера клеток, значения слоев и новые счетчики получаются
+функциями map и bytes.translate, которые проходят по массивам внутри интерпретатора, без цикла Python
+по полям. NumPy для этого не нужен.
+
+Расстановки при reset берутся из заранее построенного пула: pool_size расстановок LayoutGenerator, каждая
+во всех 8 симметриях поля (book.transform_layout). Слои расстановки пула хранятся готовыми байтами
+и копируются в поле одним присваиванием среза.
+
+Пример:
+    env = BatchEnv(1024)
+    observations = env.reset(range(1024))
+    observations, hit, sunk, done = env.step([0] * 1024)
+"""
+import random
+from collections import deque
+from itertools import repeat
+from operator import add, and_, mul, not_, or_, sub
+
+from book import SYMMETRIES, transform_layout
+from main import Game, validate_config
+from placement import LayoutGenerator
+
+# Коды публичного слоя по результату выстрела: попадание (1) -> 3, промах (0) -> 1
+_SHOT_CODES = bytes([1, 3]) + bytes(254)
+
+
+class BatchEnv:
+    """
+    Пакетная среда из batch_size партий морского боя (стреляет один игрок - стратегия, которую обучают
+    или оценивают)
+
+    Свойства
+    -----------
+    batch_size : int
+        Количество полей
+
+    size : int
+        Размер поля
+
+    fleet : tuple
+        Состав флота каждого поля
+
+    observations : memoryview
+        Публичные слои всех полей подряд (см. описание модуля), без копирования
+
+    alive : list
+        Количество непотопленных палуб на каждом поле
+
+    Методы
+    -----------
+    reset(seeds, boards) : -> memoryview
+        Расставляет флот заново на полях boards (по умолчанию - на всех) по зернам seeds
+
+    step(actions) : -> tuple
+        Выполняет по одному выстрелу на каждом поле: actions[b] - номер клетки поля b
+
+    statuses(board) : -> list
+        Публичные статусы клеток поля в виде строк, как у Field.row_statuses
+    """
+
+    def __init__(self, batch_size, size=Game.FIELD_SIZE(), fleet=Game.FLEET(), pool_size=256, seed=0):
+        """
+        :param batch_size: int Количество полей
+        :param size: int Размер поля
+        :param fleet: Последовательность размеров кораблей
+        :param pool_size: int Количество расстановок в пуле (в каждой еще 8 симметрий)
+        :param seed: Зерно построения пула
+        """
+        self.__batch_size = batch_size
+        self.__size = size
+        self.__fleet = tuple(sorted(validate_config(size, fleet), reverse=True))
+        cells = size * size
+        # Счетчик корабля 0 (клетки без кораблей) никогда не обнуляется
+        self.__ship_slots = len(self.__fleet) + 1
+        self.__pool = self.__build_pool(pool_size, random.Random(seed))
+
+        self.__decks = bytearray(batch_size * cells)
+        self.__ship_ids = bytearray(batch_size * cells)
+        self.__public = bytearray(batch_size * cells)
+        self.__ships_left = bytearray(batch_size * self.__ship_slots)
+        self.__alive = [0] * batch_size
+        self.__bases = [b * cells for b in range(batch_size)]
+        self.__ship_bases = [b * self.__ship_slots for b in range(batch_size)]
+
+    def __build_pool(self, pool_size, rng):
+        """
+        :return: list Расстановки пула: тройки (слой палуб, слой кораблей, счетчики палуб кораблей) байтами
+        """
+        size, cells = self.__size, self.__size * self.__size
+        generator = LayoutGenerator(size, self.__fleet)
+        pool = []
+        for _ in range(pool_size):
+            layout = generator.generate(rng)
+            for symmetry in range(SYMMETRIES):
+                decks, ship_ids = bytearray(cells), bytearray(cells)
+                ships_left = bytearray([1])
+                for ship_id, (row, col, orientation, decks_num) in enumerate(
+                        transform_layout(layout, size, symmetry), 1):
+                    for i in range(decks_num):
+                        pos = (row - 1 + i * orientation) * size + col - 1 + i * (1 - orientation)
+                        decks[pos], ship_ids[pos] = 1, ship_id
+                    ships_left.append(decks_num)
+                pool.append((bytes(decks), bytes(ship_ids), bytes(ships_left)))
+        return pool
+
+    @property
+    def batch_size(self):
+        return self.__batch_size
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def fleet(self):
+        return self.__fleet
+
+    @property
+    def observations(self):
+        return memoryview(self.__public)
+
+    @property
+    def alive(self):
+        return list(self.__alive)
+
+    def reset(self, seeds, boards=None):
+        """
+        Расставляет флот заново. Расстановка поля зависит только от его зерна
+        :param seeds: Зерна полей (по одному на каждое поле из boards)
+        :param boards: Номера полей или None - все поля
+        :return: memoryview Публичные слои всех полей
+        """
+        cells, slots = self.__size * self.__size, self.__ship_slots
+        boards = range(self.__batch_size) if boards is None else boards
+        total = sum(self.__fleet)
+        empty = bytes(cells)
+        for board, seed in zip(boards, seeds):
+            decks, ship_ids, ships_left = self.__pool[random.Random(seed).randrange(len(self.__pool))]
+            start = board * cells
+            self.__decks[start:start + cells] = decks
+            self.__ship_ids[start:start + cells] = ship_ids
+            self.__public[start:start + cells] = empty
+            self.__ships_left[board * slots:(board + 1) * slots] = ships_left
+            self.__alive[board] = total
+        return memoryview(self.__public)
+
+    def step(self, actions):
+        """
+        Выполняет по одному выстрелу на каждом поле. Выстрел в клетку, куда уже стреляли, - промах,
+        на поле с потопленным флотом выстрелы ничего не меняют
+        :param actions: Последовательность номеров клеток ((row - 1) * size + (col - 1)), по одному на каждое поле
+        :return: tuple (наблюдения - memoryview публичных слоев всех полей, hit, sunk, done - bytes длины
+        batch_size: было ли попадание, потоплен ли этим выстрелом корабль, потоплен ли весь флот)
+        """
+        if len(actions) != self.__batch_size:
+            raise ValueError(f'Expected {self.__batch_size} actions, one per board, got {len(actions)}')
+        # Номер клетки вне поля попал бы в соседнее поле, поэтому проверяем границы одним проходом min и max
+        if min(actions, default=0) < 0 or max(actions, default=0) >= self.__size * self.__size:
+            raise ValueError(f'Actions must be cell numbers from 0 to {self.__size * self.__size - 1}')
+        decks, public, ships_left = self.__decks, self.__public, self.__ships_left
+        cells = list(map(add, self.__bases, actions))
+        hit = bytes(map(decks.__getitem__, cells))
+        # Подбитая палуба больше не палуба, промах ничего не меняет
+        deque(map(decks.__setitem__, cells, repeat(0)), maxlen=0)
+        # На полях с потопленным флотом (alive = 0) код выстрела обнуляется, и публичный слой не меняется
+        codes = map(mul, hit.translate(_SHOT_CODES), map(bool, self.__alive))
+        deque(map(public.__setitem__, cells, map(or_, map(public.__getitem__, cells), codes)), maxlen=0)
+        slots = list(map(add, self.__ship_bases, map(self.__ship_ids.__getitem__, cells)))
+        left = list(map(sub, map(ships_left.__getitem__, slots), hit))
+        deque(map(ships_left.__setitem__, slots, left), maxlen=0)
+        sunk = bytes(map(and_, hit, map(not_, left)))
+        self.__alive = alive = list(map(sub, self.__alive, hit))
+        done = bytes(map(not_, alive))
+        return memoryview(public), hit, sunk, done
+
+    def statuses(self, board):
+        """
+        :param board: int Номер поля
+        :return: list Строки поля: списки статусов ' ', 'T', 'X', как у Field.row_statuses(row, True)
+        """
+        size = self.__size
+        start = board * size * size
+        layer = self.__public[start:start + size * size].translate(bytes.maketrans(b'\x00\x01\x03', b' TX'))
+        return [list(layer[row * size:(row + 1) * size].decode()) for row in range(size)]
@@ -0,0 +1,84 @@
+"""
+Бенчмарк пакетной среды: шагов поля в секунду (board-steps/s) для BatchEnv разного размера пакета
+в сравнении с выстрелами по одному полю за вызов (Field.fire и all_ships_sunk, как в Engine.fire).
+
+Выстрелы заранее выбраны случайно (у каждого поля - своя перестановка клеток), поэтому в измерение
+входит только сама среда, а не выбор выстрела. Каждый эпизод - size * size шагов, затем reset.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_batch
+    python -m benchmarks.bench_batch --batches 1024 16384 --episodes 5
+"""
+import argparse
+import random
+import time
+
+from batch import BatchEnv
+from bitboard import BitboardField
+from main import Game
+from placement import LayoutGenerator
+
+
+def batch_rate(batch_size, episodes, seed):
+    """
+    :return: tuple (шагов поля в секунду без reset, время reset одного поля в секундах)
+    """
+    env = BatchEnv(batch_size, seed=seed)
+    cells = env.size * env.size
+    rng = random.Random(seed)
+    orders = [rng.sample(range(cells), cells) for _ in range(batch_size)]
+    # Действия шага t - t-е клетки перестановок всех полей
+    steps = [list(column) for column in zip(*orders)]
+    step_time = reset_time = 0.0
+    for episode in range(episodes):
+        started = time.perf_counter()
+        env.reset(range(episode * batch_size, (episode + 1) * batch_size))
+        reset_time += time.perf_counter() - started
+        started = time.perf_counter()
+        for actions in steps:
+            env.step(actions)
+        step_time += time.perf_counter() - started
+    return batch_size * cells * episodes / step_time, reset_time / (batch_size * episodes)
+
+
+def single_rate(games, seed):
+    """
+    :return: float Выстрелов в секунду по одному полю за вызов
+    """
+    rng = random.Random(seed)
+    generator = LayoutGenerator(Game.FIELD_SIZE(), Game.FLEET())
+    cells = [(row, col) for row in range(1, Game.FIELD_SIZE() + 1) for col in range(1, Game.FIELD_SIZE() + 1)]
+    elapsed, shots = 0.0, 0
+    for _ in range(games):
+        field = BitboardField(Game.FIELD_SIZE())
+        for ship in generator.generate(rng):
+            field.place_ship(*ship)
+        order = rng.sample(cells, len(cells))
+        started = time.perf_counter()
+        for row, col in order:
+            # Клетки вокруг потопленных кораблей поле закрывает само, стрелять в них нельзя
+            if field.get_status(row, col, True) != ' ':
+                continue
+            shots += 1
+            if field.fire(row, col):
+                field.all_ships_sunk()
+        elapsed += time.perf_counter() - started
+    return shots / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк пакетной среды')
+    parser.add_argument('--batches', type=int, nargs='+', default=[256, 4096, 16384])
+    parser.add_argument('--episodes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"пакет":>8} {"шагов поля/с":>14} {"reset, мкс/поле":>16}')
+    for batch_size in args.batches:
+        rate, reset_time = batch_rate(batch_size, args.episodes, args.seed)
+        print(f'{batch_size:>8} {rate:>14,.0f} {reset_time * 1e6:>16.2f}')
+    print(f'{"по одному":>8} {single_rate(2000, args.seed):>14,.0f}   (BitboardField.fire)')
+
+
+if __name__ == '__main__':
+    main()
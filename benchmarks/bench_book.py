@@ -0,0 +1,93 @@
+"""
+Бенчмарк дебютной книги и пула расстановок: время выстрела и расстановки компьютера с книгой и без нее
+и доля попаданий в кэш по ходу серии партий.
+
+Компьютер (SkynetField) играет games партий против случайных расстановок человека и стреляет, пока
+не потопит флот. Первые --depth выстрелов каждой партии берутся из книги; при промахе лучший выстрел
+считается точным перебором LayoutSolver. Книга переиспользуется между партиями, поэтому чем больше
+партий сыграно, тем чаще позиция уже есть в книге.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_book
+    python -m benchmarks.bench_book --games 500 --depth 6 --path book.sqlite
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from book import OpeningBook
+from main import Field, Game, SkynetField, player_rng
+from placement import LayoutGenerator
+
+
+def play(book, games, seed):
+    """
+    Играет games партий компьютера против случайных расстановок
+    :return: tuple (секунд на выстрел из книги, секунд на расстановку, доли попаданий в кэш по четвертям серии)
+    """
+    rng = random.Random(seed)
+    generator = LayoutGenerator(Game.FIELD_SIZE(), Game.FLEET())
+    book_time = book_shots = fill_time = 0
+    quarters, last = [], book.stats
+    with contextlib.redirect_stdout(io.StringIO()):
+        for game in range(games):
+            target = Field(Game.FIELD_SIZE())
+            for ship in generator.generate(rng):
+                target.place_ship(*ship)
+            skynet_field = SkynetField(Game.FIELD_SIZE(), rng=player_rng(seed, game), book=book)
+            started = time.perf_counter()
+            skynet_field.fill_ships()
+            fill_time += time.perf_counter() - started
+            while not target.all_ships_sunk():
+                shots = Game.FIELD_SIZE() ** 2 - public_free(target)
+                started = time.perf_counter()
+                skynet_field.shot(target)
+                if shots < book.depth:
+                    book_time += time.perf_counter() - started
+                    book_shots += 1
+            if (game + 1) % max(1, games // 4) == 0:
+                stats = book.stats
+                lookups = stats['hits'] + stats['misses'] - last['hits'] - last['misses']
+                quarters.append((stats['hits'] - last['hits']) / lookups if lookups else 0.0)
+                last = stats
+    return book_time / max(1, book_shots), fill_time / games, quarters
+
+
+def public_free(field):
+    return sum(status == ' ' for row in range(1, field.size + 1) for status in field.row_statuses(row, True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк дебютной книги и пула расстановок')
+    parser.add_argument('--games', type=int, default=300)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--path', help='файл кэша sqlite3 (по умолчанию - только память)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    book = OpeningBook(args.path, depth=args.depth)
+    shot_time, fill_time, quarters = play(book, args.games, args.seed)
+    print(f'Партий: {args.games}, книга на {args.depth} выстрела')
+    print(f'Выстрел в дебюте: {shot_time * 1e3:.2f} мс в среднем по серии')
+    print(f'Доля попаданий в кэш по четвертям серии: {", ".join(f"{rate * 100:.0f}%" for rate in quarters)}')
+    print(f'Статистика: {book.stats}')
+
+    # Та же серия с заполненной книгой, затем без книги
+    warm_shot, warm_fill, _ = play(book, args.games, args.seed + 1)
+    book.close()
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for game in range(args.games):
+            SkynetField(Game.FIELD_SIZE(), rng=rng).fill_ships()
+    plain_fill = (time.perf_counter() - started) / args.games
+    print(f'С заполненной книгой: выстрел в дебюте {warm_shot * 1e6:.0f} мкс, '
+          f'расстановка из пула {warm_fill * 1e6:.0f} мкс')
+    print(f'Без книги: расстановка LayoutGenerator {plain_fill * 1e6:.0f} мкс, '
+          f'лучший выстрел точным перебором - сотни мс (см. промахи выше)')
+
+
+if __name__ == '__main__':
+    main()
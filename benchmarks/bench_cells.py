@@ -0,0 +1,126 @@
+"""
+Микробенчмарк представления клеток: память на клетку и скорость доступа к статусам.
+
+Сравниваются:
+- клетка без слотов (эталон: атрибуты в словаре объекта, геттеры - функции на Python, как было раньше у Cell);
+- Cell со слотами (__slots__) и геттерами attrgetter - клетки обычного Field;
+- ArrayField - статусы в массивах байтов, клетки-представления создаются по запросу;
+- BitboardField - статусы в битовых досках.
+
+Для каждого поля измеряются память на клетку после создания, время чтения статусов всех клеток,
+время possible_ships_areas(3) и all_ships_sunk().
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_cells
+    python -m benchmarks.bench_cells --sizes 100 300 1000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from bitboard import BitboardField
+from compact import ArrayField
+from main import Cell, Field
+
+
+class DictCell:
+    """
+    Клетка в прежнем представлении: атрибуты в словаре объекта, геттеры - обычные свойства
+    """
+
+    def __init__(self, row=0, col=0, status=' ', status_public=' ', field=None):
+        self.__row, self.__col = row, col
+        self.__status, self.__status_public = status, status_public
+        self.__field = field
+
+    @property
+    def status(self):
+        return self.__status
+
+    @property
+    def status_public(self):
+        return self.__status_public
+
+
+def memory_per_object(factory, count):
+    """
+    :return: float Байт на объект (вместе со списком, в котором объекты хранятся)
+    """
+    gc.collect()
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current / count
+
+
+def memory_per_cell(field_class, size):
+    """
+    :return: tuple (поле, байт на клетку после создания поля)
+    """
+    gc.collect()
+    tracemalloc.start()
+    field = field_class(size)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return field, current / (size * size)
+
+
+def best_time(func, repeat=3):
+    """
+    :return: float Лучшее время выполнения func из repeat попыток в секундах
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def read_statuses(field):
+    """
+    Читает приватный и публичный статусы всех клеток тем способом, который естественен для поля:
+    через объекты Cell у Field и через get_status у полей без собственных объектов клеток
+    """
+    if type(field) is Field:
+        return sum(1 for line in field.ships_area_list for cell in line
+                   if cell.status == ' ' and cell.status_public == ' ')
+    size = field.size
+    get_status = field.get_status
+    return sum(1 for row in range(1, size + 1) for col in range(1, size + 1)
+               if get_status(row, col) == ' ' and get_status(row, col, True) == ' ')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Микробенчмарк представления клеток')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 300])
+    parser.add_argument('--objects', type=int, default=100000, help='объектов для замера памяти одной клетки')
+    args = parser.parse_args()
+
+    count = args.objects
+    print('Одна клетка:')
+    for name, factory in (('без слотов', lambda i: DictCell(1, 1)), ('Cell', lambda i: Cell(1, 1))):
+        cells = [factory(i) for i in range(count)]
+        read = best_time(lambda: [cell.status for cell in cells]) / count * 1e9
+        print(f'{name:>14}: {memory_per_object(factory, count):7.1f} байт, чтение status {read:6.1f} нс')
+    print('')
+
+    print(f'{"класс":>14} {"размер":>7} {"байт/клетку":>12} {"чтение, мс":>11} {"зоны, мс":>9} '
+          f'{"зоны перебором, мс":>19} {"all_ships_sunk, нс":>19}')
+    for size in args.sizes:
+        for field_class in (Field, ArrayField, BitboardField):
+            field, per_cell = memory_per_cell(field_class, size)
+            read = best_time(lambda: read_statuses(field)) * 1000
+            areas = best_time(lambda: field.possible_ships_areas(3)) * 1000
+            scan = best_time(lambda: field.possible_ships_areas(3, vectorized=False), repeat=1) * 1000
+            sunk = best_time(lambda: [field.all_ships_sunk() for _ in range(100000)]) / 100000 * 1e9
+            print(f'{field_class.__name__:>14} {size:>7} {per_cell:>12.1f} {read:>11.1f} {areas:>9.1f} '
+                  f'{scan:>19.1f} {sunk:>19.1f}')
+            del field
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Бенчмарк стрельбы по карте плотности (DensityShooting) против случайной стрельбы (RandomShooting):
+- задержка принятия решения на большом поле (среднее и 99-й перцентиль);
+- среднее количество выстрелов, нужное, чтобы потопить случайно расставленный флот.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_density
+    python -m benchmarks.bench_density --latency-size 100 --decisions 2000 --games 500
+"""
+import argparse
+import random
+import time
+
+from bitboard import BitboardField
+from main import Game
+from strategies import DensityShooting, RandomPlacement, RandomShooting
+
+STRATEGIES = (('random', RandomShooting), ('density', DensityShooting))
+
+
+def prepared_field(size, fleet, seed):
+    """
+    :return: BitboardField Поле со случайно расставленным флотом
+    """
+    rng = random.Random(seed)
+    while True:
+        field = BitboardField(size)
+        try:
+            RandomPlacement.place(field, fleet, rng)
+            return field
+        except IndexError:
+            continue
+
+
+def latency(strategy_class, size, fleet, decisions):
+    """
+    Измеряет время выбора выстрела (без самого выстрела). Первое решение, которое строит карту плотности,
+    учитывается отдельно
+    :return: tuple (первое решение, среднее, 99-й перцентиль) в миллисекундах
+    """
+    field = prepared_field(size, fleet, size)
+    strategy, rng = strategy_class(), random.Random(0)
+    timings = []
+    for _ in range(min(decisions, size * size)):
+        started = time.perf_counter()
+        row, col = strategy.choose(field, fleet, rng)
+        timings.append(time.perf_counter() - started)
+        field.fire(row, col)
+        if field.all_ships_sunk():
+            break
+    first, rest = timings[0], sorted(timings[1:])
+    mean = sum(rest) / len(rest)
+    p99 = rest[min(len(rest) - 1, int(len(rest) * 0.99))]
+    return first * 1000, mean * 1000, p99 * 1000
+
+
+def shots_to_win(strategy_class, size, fleet, games):
+    """
+    :return: float Среднее количество выстрелов, за которое стратегия топит весь флот
+    """
+    strategy, total = strategy_class(), 0
+    for seed in range(games):
+        field = prepared_field(size, fleet, seed)
+        rng = random.Random(seed)
+        while not field.all_ships_sunk():
+            field.fire(*strategy.choose(field, fleet, rng))
+            total += 1
+    return total / games
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-size', type=int, default=100)
+    parser.add_argument('--decisions', type=int, default=1000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[Game.FIELD_SIZE(), 10])
+    parser.add_argument('--games', type=int, default=300)
+    args = parser.parse_args()
+
+    fleet = Game.FLEET()
+    print(f'Задержка решения на поле {args.latency_size}x{args.latency_size}, флот {fleet}')
+    print(f'{"стратегия":>10} {"первое, мс":>11} {"среднее, мс":>12} {"p99, мс":>9}')
+    for name, strategy_class in STRATEGIES:
+        first, mean, p99 = latency(strategy_class, args.latency_size, fleet, args.decisions)
+        print(f'{name:>10} {first:>11.3f} {mean:>12.3f} {p99:>9.3f}')
+
+    print()
+    print(f'Среднее число выстрелов до потопления всего флота {fleet}')
+    print(f'{"стратегия":>10} ' + ' '.join(f'{f"{size}x{size}":>8}' for size in args.sizes))
+    for name, strategy_class in STRATEGIES:
+        shots = [shots_to_win(strategy_class, size, fleet, args.games) for size in args.sizes]
+        print(f'{name:>10} ' + ' '.join(f'{value:>8.1f}' for value in shots))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Бенчмарк пропускной способности движка: сколько полных партий "случайный игрок против случайного игрока"
+проводится за секунду на одном ядре движком Engine с разными классами полей. LeanField - быстрый режим
+движка: те же стратегии и те же партии, что с ArrayField, но без объектов Ship.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_engine
+    python -m benchmarks.bench_engine --games 20000 --size 6
+"""
+import argparse
+import time
+
+from compact import ArrayField
+from bitboard import BitboardField
+from engine import Engine, random_player
+from lean import LeanField
+from main import Field, Game
+
+
+def run(field_class, size, fleet, games):
+    """
+    Проводит games партий и измеряет время
+    :return: tuple (партий в секунду, среднее число выстрелов победителя)
+    """
+    players = (random_player(), random_player())
+    winner_shots = 0
+    started = time.perf_counter()
+    for seed in range(games):
+        engine = Engine.new(size, fleet, seed, field_class)
+        winner = engine.play(players)
+        winner_shots += engine.shots[winner]
+    elapsed = time.perf_counter() - started
+    return games / elapsed, winner_shots / games
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=5000)
+    parser.add_argument('--size', type=int, default=Game.FIELD_SIZE())
+    args = parser.parse_args()
+
+    print(f'{"класс":>14} {"размер":>7} {"партий/с":>10} {"выстрелов до победы":>21}')
+    for field_class in (Field, ArrayField, BitboardField, LeanField):
+        rate, shots = run(field_class, args.size, Game.FLEET(), args.games)
+        print(f'{field_class.__name__:>14} {args.size:>7} {rate:>10.0f} {shots:>21.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Бенчмарк создания игрового поля: время построения и занимаемая память для Field (список списков Cell)
+и BitboardField (битовые доски).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_field
+    python -m benchmarks.bench_field --sizes 6 100 1000 5000 --cells-limit 1000
+
+Поле Field размером 5000x5000 - это 25 млн объектов Cell (несколько гигабайт памяти), поэтому по умолчанию
+Field измеряется только до размера --cells-limit
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from bitboard import BitboardField
+from main import Field
+
+
+def measure(field_class, size):
+    """
+    Создает поле указанного класса и размера и измеряет время и пиковую память
+    :param field_class: Класс поля (Field или наследник)
+    :param size: int Размер поля
+    :return: tuple (секунды, байты)
+    """
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    field = field_class(size)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del field
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[6, 100, 1000, 5000])
+    parser.add_argument('--cells-limit', type=int, default=1000,
+                        help='максимальный размер поля, для которого измеряется Field')
+    args = parser.parse_args()
+
+    print(f'{"класс":>14} {"размер":>7} {"время, мс":>12} {"память, КБ":>14}')
+    for size in args.sizes:
+        for field_class in (Field, BitboardField):
+            if field_class is Field and size > args.cells_limit:
+                print(f'{field_class.__name__:>14} {size:>7} {"пропущено":>12} {"":>14}')
+                continue
+            elapsed, peak = measure(field_class, size)
+            print(f'{field_class.__name__:>14} {size:>7} {elapsed * 1000:>12.3f} {peak / 1024:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Бенчмарк выбора цели для выстрела: полное сканирование possible_ships_areas(1, True) на каждом ходу
+против инкрементального индекса Field.window_index(1, True).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_index
+    python -m benchmarks.bench_index --sizes 6 100 --shots 200
+"""
+import argparse
+import random
+import time
+
+from bitboard import BitboardField
+from main import Field
+
+
+def scan_shots(field, shots, rng):
+    """
+    Делает shots выстрелов, выбирая цель из полного списка possible_ships_areas
+    :return: float Среднее время одного выстрела в секундах
+    """
+    started = time.perf_counter()
+    for _ in range(shots):
+        cell = rng.choice(field.possible_ships_areas(1, True))[0]
+        cell.status_public = 'T'
+    return (time.perf_counter() - started) / shots
+
+
+def index_shots(field, shots, rng):
+    """
+    Делает shots выстрелов, выбирая цель из инкрементального индекса (время построения индекса не учитывается)
+    :return: float Среднее время одного выстрела в секундах
+    """
+    index = field.window_index(1, True)
+    started = time.perf_counter()
+    for _ in range(shots):
+        row, col, _ = index.choice(rng)
+        field.cell(row, col).status_public = 'T'
+    return (time.perf_counter() - started) / shots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[6, 100, 500])
+    parser.add_argument('--shots', type=int, default=30)
+    args = parser.parse_args()
+
+    print(f'{"класс":>14} {"размер":>7} {"скан, мкс/выстрел":>19} {"индекс, мкс/выстрел":>21}')
+    for size in args.sizes:
+        shots = min(args.shots, size * size)
+        for field_class in (Field, BitboardField):
+            scan = scan_shots(field_class(size), shots, random.Random(size))
+            indexed = index_shots(field_class(size), shots, random.Random(size))
+            print(f'{field_class.__name__:>14} {size:>7} {scan * 1e6:>19.1f} {indexed * 1e6:>21.1f}')
+
+
+if __name__ == '__main__':
+    main()
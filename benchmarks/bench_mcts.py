@@ -0,0 +1,80 @@
+"""
+Бенчмарк стрельбы MCTS: сила (выстрелов до потопления флота) против скорости (проходов поиска в секунду,
+времени хода) при разном количестве проходов, и соблюдение времени хода при поиске в нескольких процессах.
+
+Все стратегии топят одни и те же расстановки (по зерну партии), поэтому средние сравнимы между собой.
+Поиск с ограничением rollouts выполняется в текущем процессе и повторяется в точности; поиск с ограничением
+--seconds - в --workers процессах, для него выводится и наибольшее время хода.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_mcts
+    python -m benchmarks.bench_mcts --games 100 --rollouts 100 400 1600 --seconds 0.5 --workers 8
+"""
+import argparse
+import time
+
+from engine import Engine
+from main import Game
+from mcts import MCTSShooting
+from strategies import DensityShooting, RandomPlacement, RandomShooting
+
+
+def shots_to_sink(shooting, size, games):
+    """
+    :return: tuple (среднее количество выстрелов до потопления флота, секунд на выстрел)
+    """
+    total, elapsed = 0, 0.0
+    for game in range(games):
+        engine = Engine.new(size, Game.FLEET(), seed=game)
+        engine.setup(1, RandomPlacement())
+        field, rng = engine.field(1), engine.rng(0)
+        while not field.all_ships_sunk():
+            started = time.perf_counter()
+            row, col = shooting.choose(field, engine.fleet, rng)
+            elapsed += time.perf_counter() - started
+            field.fire(row, col)
+            total += 1
+    return total / games, elapsed / total
+
+
+def describe(shooting):
+    """
+    :return: str Проходов в секунду, узлов на ход и наибольшее время хода по истории ходов MCTS
+    """
+    history = shooting.history
+    seconds = sum(stats.seconds for stats in history)
+    return (f'{sum(stats.rollouts for stats in history) / seconds:>10,.0f} '
+            f'{sum(stats.nodes for stats in history) / len(history):>8,.0f} '
+            f'{max(stats.seconds for stats in history) * 1e3:>9.1f} '
+            f'{sum(stats.timed_out for stats in history):>6}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк стрельбы MCTS')
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--size', type=int, default=Game.FIELD_SIZE())
+    parser.add_argument('--rollouts', type=int, nargs='+', default=[50, 200, 800])
+    parser.add_argument('--seconds', type=float, default=0.2, help='время хода поиска в нескольких процессах')
+    parser.add_argument('--workers', type=int, default=None, help='процессов поиска (по умолчанию - все ядра)')
+    args = parser.parse_args()
+
+    print(f'Поле {args.size}x{args.size}, партий: {args.games}')
+    print(f'{"стратегия":>24} {"выстрелов":>10} {"мс/ход":>8} {"проходов/с":>10} {"узлов":>8} '
+          f'{"макс, мс":>9} {"опозд.":>6}')
+    for name, shooting in (('random', RandomShooting()), ('density', DensityShooting())):
+        shots, per_move = shots_to_sink(shooting, args.size, args.games)
+        print(f'{name:>24} {shots:>10.2f} {per_move * 1e3:>8.2f}')
+
+    for rollouts in args.rollouts:
+        shooting = MCTSShooting(seconds=None, rollouts=rollouts, workers=1)
+        shots, per_move = shots_to_sink(shooting, args.size, args.games)
+        print(f'{"mcts " + str(rollouts) + " проходов":>24} {shots:>10.2f} {per_move * 1e3:>8.2f} {describe(shooting)}')
+
+    with MCTSShooting(seconds=args.seconds, workers=args.workers) as shooting:
+        shots, per_move = shots_to_sink(shooting, args.size, args.games)
+        label = f'mcts {args.seconds:g} с x {shooting.workers}'
+        print(f'{label:>24} {shots:>10.2f} {per_move * 1e3:>8.2f} {describe(shooting)}')
+
+
+if __name__ == '__main__':
+    main()
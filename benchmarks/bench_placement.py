@@ -0,0 +1,89 @@
+"""
+Бенчмарк генераторов расстановки флота: сколько допустимых расстановок в секунду строят
+- случайная расстановка с повтором всей расстановки при тупике (RandomPlacement, как Engine.setup);
+- поиск с возвратом LayoutGenerator;
+- равновероятная выборка LayoutGenerator(uniform=True)
+для нескольких размеров поля и плотностей флота. Плотность - доля клеток поля, занятых палубами.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_placement
+    python -m benchmarks.bench_placement --sizes 10 50 --densities 0.1 0.2 --seconds 2
+"""
+import argparse
+import random
+import time
+
+from bitboard import BitboardField
+from main import Game
+from placement import LayoutGenerator
+from strategies import RandomPlacement
+
+# Сколько раз случайная расстановка начинает заново, прежде чем признать флот нерасставляемым
+RANDOM_ATTEMPTS = 1000
+
+
+def scaled_fleet(size, density):
+    """
+    Флот с теми же пропорциями, что и стандартный (3, 2, 2, 1, 1, 1), занимающий примерно density клеток поля
+    :return: tuple Размеры кораблей
+    """
+    base = Game.FLEET()
+    copies = max(1, round(density * size * size / sum(base)))
+    return tuple(sorted(base * copies, reverse=True))
+
+
+def random_layout(size, fleet, rng):
+    for _ in range(RANDOM_ATTEMPTS):
+        try:
+            RandomPlacement.place(BitboardField(size), fleet, rng)
+            return True
+        except IndexError:
+            continue
+    return False
+
+
+def rate(build, seconds):
+    """
+    Вызывает build, пока не пройдет seconds секунд. Первый вызов не учитывается: он прогревает кэши
+    (равновероятной выборке на небольших полях он стоит полного точного перебора)
+    :return: tuple (расстановок в секунду, доля неудач) или None, если первая расстановка не удалась
+    """
+    if not build():
+        return None
+    started = time.perf_counter()
+    built = failed = 0
+    while time.perf_counter() - started < seconds:
+        if build():
+            built += 1
+        else:
+            failed += 1
+    return built / (time.perf_counter() - started), failed / (built + failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк генераторов расстановки флота')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[6, 10, 20, 50])
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.2, 0.25])
+    parser.add_argument('--seconds', type=float, default=1.0, help='время замера одного генератора')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"поле":>6} {"кораблей":>9} {"плотность":>10} {"random":>10} {"backtracking":>13} {"uniform":>10}')
+    for size in args.sizes:
+        fleets = sorted({scaled_fleet(size, density) for density in args.densities}, key=len)
+        for fleet in fleets:
+            rng = random.Random(args.seed)
+            backtracking = LayoutGenerator(size, fleet)
+            uniform = LayoutGenerator(size, fleet, uniform=True)
+            results = []
+            for build in (lambda: random_layout(size, fleet, rng),
+                          lambda: bool(backtracking.generate(rng)),
+                          lambda: bool(uniform.generate(rng))):
+                result = rate(build, args.seconds)
+                results.append(f'{result[0]:.1f}' if result else 'тупик')
+            real_density = sum(fleet) / (size * size)
+            print(f'{size:>6} {len(fleet):>9} {real_density:>10.2f} {results[0]:>10} {results[1]:>13} {results[2]:>10}')
+
+
+if __name__ == '__main__':
+    main()
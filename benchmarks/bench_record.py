@@ -0,0 +1,90 @@
+"""
+Бенчмарк записи партий: размер записи на партию, скорость записи, потокового чтения, воспроизведения
+и произвольного доступа к партии по номеру через индекс.
+
+Партии играет движок Engine случайными стратегиями, GameWriter записывает их подпиской на поля. Скорость
+записи замеряется отдельно, повторной записью уже сыгранных партий.
+Для сравнения приводится размер тех же партий в JSON.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_record
+    python -m benchmarks.bench_record --games 20000 --size 10 --fleet 4 3 3 2 2 2 1 1 1 1
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from engine import Engine, random_player
+from main import Game
+from record import GameArchive, GameWriter, read_games, replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк записи партий')
+    parser.add_argument('--games', type=int, default=5000)
+    parser.add_argument('--size', type=int, default=Game.FIELD_SIZE())
+    parser.add_argument('--fleet', type=int, nargs='+', default=list(Game.FLEET()))
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'games.sbr')
+    players = (random_player(), random_player())
+
+    with GameWriter(path) as writer:
+        for game in range(args.games):
+            engine = Engine.new(args.size, args.fleet, seed=args.seed + game)
+            for player in range(2):
+                engine.setup(player, players[player].placement)
+            writer.attach((engine.field(0), engine.field(1)))
+            engine.play(players)
+            writer.finish()
+
+    started = time.perf_counter()
+    records = list(read_games(path))
+    read_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for record in records:
+        for _ in replay(record):
+            pass
+    replay_time = time.perf_counter() - started
+
+    # Кодирование и запись уже сыгранных партий, без самих партий
+    copy_path = os.path.join(directory, 'copy.sbr')
+    started = time.perf_counter()
+    with GameWriter(copy_path) as writer:
+        for record in records:
+            writer.write(record)
+    write_time = time.perf_counter() - started
+
+    json_size = len(json.dumps([record._asdict() for record in records]).encode())
+    file_size = os.path.getsize(path)
+
+    rng = random.Random(args.seed)
+    with GameArchive(path) as archive:
+        lookups = [rng.randrange(len(archive)) for _ in range(10000)]
+        started = time.perf_counter()
+        for n in lookups:
+            archive[n]
+        lookup_time = time.perf_counter() - started
+        assert all(archive[n] == records[n] for n in lookups[:100])
+
+    print(f'Партий: {len(records)}, поле {args.size}x{args.size}, флот {tuple(args.fleet)}')
+    print(f'Размер файла: {file_size} байт ({file_size / len(records):.1f} байт на партию), '
+          f'JSON: {json_size / len(records):.1f} байт на партию')
+    print(f'Запись: {len(records) / write_time:10.0f} партий/с')
+    print(f'Потоковое чтение: {len(records) / read_time:10.0f} партий/с')
+    print(f'Воспроизведение: {len(records) / replay_time:10.0f} партий/с')
+    print(f'Партия по номеру: {lookup_time / len(lookups) * 1e6:8.1f} мкс')
+
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Бенчмарк отрисовки игровых полей: кадров в секунду для полей 6x6 и 200x200.
+
+Режимы:
+- построчно - кадр выводится отдельным print на каждую строку, как раньше делал Game.show_fields;
+- кадр - BoardRenderer.draw, весь кадр одним write;
+- изменения - BoardRenderer.redraw, между кадрами делается один выстрел, перерисовывается только он;
+- окно - BoardRenderer.draw с окном просмотра 40x40.
+
+Вывод идет в /dev/null, открытый с построчной буферизацией, как у терминала: каждый print со строкой
+приводит к системному вызову записи.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_render
+    python -m benchmarks.bench_render --sizes 6 200 500 --seconds 2
+"""
+import argparse
+import os
+import random
+import time
+
+from bitboard import BitboardField
+from main import Game
+from placement import LayoutGenerator
+from render import BoardRenderer
+
+VIEWPORT = 40
+
+
+def prepared_fields(size, seed):
+    """
+    :return: tuple Поля человека и компьютера с расставленным флотом
+    """
+    rng = random.Random(seed)
+    fields = []
+    for _ in range(2):
+        field = BitboardField(size)
+        for row, col, orientation, decks_num in LayoutGenerator(size, Game.FLEET()).generate(rng):
+            field.place_ship(row, col, orientation, decks_num)
+        fields.append(field)
+    return fields
+
+
+def fps(render, shoot, seconds):
+    """
+    Рисует кадры, пока не пройдет seconds секунд. Перед каждым кадром вызывает shoot
+    :return: float Кадров в секунду
+    """
+    frames = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        shoot()
+        render()
+        frames += 1
+    return frames / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк отрисовки игровых полей')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[6, 200])
+    parser.add_argument('--seconds', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"размер":>7} {"построчно":>11} {"кадр":>11} {"изменения":>11} {"окно":>11}')
+    with open(os.devnull, 'w', buffering=1) as stream:
+        for size in args.sizes:
+            humans, skynet = prepared_fields(size, args.seed)
+            rng = random.Random(args.seed)
+            free = [(row, col) for row in range(1, size + 1) for col in range(1, size + 1)]
+            rng.shuffle(free)
+
+            def shoot():
+                # Поля могут закончиться только на маленьком поле - тогда начинаем заново
+                nonlocal humans, skynet
+                # Клетки вокруг потопленных кораблей поле закрывает само
+                while free and humans.get_status(*free[-1], True) != ' ':
+                    free.pop()
+                if not free:
+                    humans, skynet = prepared_fields(size, args.seed)
+                    free.extend((row, col) for row in range(1, size + 1) for col in range(1, size + 1))
+                    rng.shuffle(free)
+                humans.fire(*free.pop())
+
+            full = BoardRenderer(stream)
+            diff = BoardRenderer(stream)
+            window = BoardRenderer(stream, viewport=(1, 1, VIEWPORT, VIEWPORT))
+
+            def by_lines():
+                for line in full.frame(humans, skynet).split('\n')[:-1]:
+                    print(line, file=stream)
+
+            results = [fps(by_lines, shoot, args.seconds),
+                       fps(lambda: full.draw(humans, skynet), shoot, args.seconds),
+                       fps(lambda: diff.redraw(humans, skynet), shoot, args.seconds),
+                       fps(lambda: window.draw(humans, skynet), shoot, args.seconds)]
+            print(f'{size:>7} ' + ' '.join(f'{result:>11.0f}' for result in results))
+
+
+if __name__ == '__main__':
+    main()
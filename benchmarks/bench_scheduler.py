@@ -0,0 +1,104 @@
+"""
+Бенчмарк планировщика партий: память при большом количестве открытых сессий с вытеснением и без него.
+
+Сети нет: сессии подключаются к MatchScheduler напрямую, функции отправки только считают сообщения.
+Сессии играют парами друг против друга: просят партию с человеком, расставляют флот командой auto
+и делают несколько выстрелов, после чего все партии простаивают (ждут хода человека). Время планировщика
+подменено, поэтому после каждой партии срок простоя уже истек и tick вытесняет ее.
+
+Выводится память (tracemalloc) на партию в памяти и на вытесненную партию, общая память для всех
+сессий с вытеснением и оценка без него, а также время восстановления вытесненной партии.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_scheduler
+    python -m benchmarks.bench_scheduler --sessions 100000 --shots 10
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from server import MatchScheduler
+
+# Сколько сессий держать без вытеснения, чтобы измерить память на партию в памяти
+RESIDENT_SESSIONS = 2000
+
+
+def open_sessions(scheduler, count, shots, rng, clock):
+    """
+    Подключает count сессий парами, расставляет флоты и делает shots выстрелов в каждой партии
+    :return: list Номера сессий
+    """
+    sessions = []
+    sent = [0]
+
+    def send(message):
+        sent[0] += 1
+
+    cells = [f'{row} {col}' for row in range(1, 7) for col in range(1, 7)]
+    for _ in range(count // 2):
+        first, second = scheduler.connect(send), scheduler.connect(send)
+        for session in (first, second):
+            scheduler.handle(session, {'cmd': 'play', 'opponent': 'human'})
+        for session in (first, second):
+            scheduler.handle(session, {'cmd': 'auto'})
+        targets = (rng.sample(cells, shots), rng.sample(cells, shots))
+        for i in range(shots):
+            scheduler.handle(first, {'cmd': 'fire', 'cell': targets[0][i]})
+            scheduler.handle(second, {'cmd': 'fire', 'cell': targets[1][i]})
+        clock[0] += 1
+        scheduler.tick()
+        sessions += [first, second]
+    return sessions
+
+
+def measure(count, shots, idle_timeout, seed):
+    """
+    :return: tuple (планировщик, сессии, байт памяти, секунд)
+    """
+    clock = [0.0]
+    scheduler = MatchScheduler(move_timeout=None, idle_timeout=idle_timeout, rng=random.Random(seed),
+                               clock=lambda: clock[0])
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    sessions = open_sessions(scheduler, count, shots, random.Random(seed), clock)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return scheduler, sessions, current - baseline, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк планировщика партий')
+    parser.add_argument('--sessions', type=int, default=100000)
+    parser.add_argument('--shots', type=int, default=5, help='выстрелов каждого игрока до простоя')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    _, _, resident_bytes, _ = measure(RESIDENT_SESSIONS, args.shots, None, args.seed)
+    per_resident = resident_bytes / (RESIDENT_SESSIONS // 2)
+
+    scheduler, sessions, evicted_bytes, elapsed = measure(args.sessions, args.shots, 0.5, args.seed)
+    matches = args.sessions // 2
+    metrics = scheduler.metrics
+
+    # Восстановление: одна команда в каждую из 1000 вытесненных партий
+    started = time.perf_counter()
+    for session in sessions[:2000:2]:
+        scheduler.handle(session, {'cmd': 'fire', 'cell': '6 6'})
+    restore_time = (time.perf_counter() - started) / 1000
+
+    print(f'Сессий: {args.sessions}, партий: {matches}, выстрелов каждого игрока до простоя: {args.shots}')
+    print(f'Партия в памяти:      {per_resident:10.0f} байт')
+    print(f'Вытесненная партия:   {evicted_bytes / matches:10.0f} байт (из них freeze - '
+          f'{metrics["evicted_bytes"] / max(1, metrics["evicted_matches"]):.0f} байт)')
+    print(f'Все сессии с вытеснением: {evicted_bytes / 2 ** 20:8.1f} МБ, '
+          f'без вытеснения (оценка): {per_resident * matches / 2 ** 20:8.1f} МБ')
+    print(f'Открытие сессии и начало партии: {elapsed / args.sessions * 1e6:.0f} мкс на сессию (под tracemalloc)')
+    print(f'Восстановление партии и ход: {restore_time * 1e6:.0f} мкс')
+    print('Метрики:', scheduler.metrics)
+
+
+if __name__ == '__main__':
+    main()
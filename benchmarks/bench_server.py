@@ -0,0 +1,120 @@
+"""
+Нагрузочный тест сетевого сервера: партий в секунду и задержка хода (p50, p99) при многих одновременных партиях.
+
+Сервер запускается отдельным процессом (server.py на свободном порту). Клиенты работают в одном цикле событий
+asyncio: каждый подключается, просит партию, расставляет флот командой auto и стреляет в случайные клетки.
+Задержка хода - время от отправки fire до получения результата своего выстрела. Против бота ход бота
+делается сразу после хода клиента, поэтому в задержку он не входит, а входит во время партии.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_server
+    python -m benchmarks.bench_server --matches 5000 --concurrency 2000 --opponent human
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+SERVER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server.py')
+
+
+async def play_match(host, port, opponent, rng, latencies):
+    """
+    Играет одну партию случайными выстрелами
+    :return: None
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+
+    def send(message):
+        writer.write(json.dumps(message).encode() + b'\n')
+
+    send({'cmd': 'play', 'opponent': opponent})
+    # closed - клетки вокруг потопленных кораблей, в них сервер стрелять не даст
+    targets, closed, sent = [], set(), None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError('Server closed the connection')
+            message = json.loads(line)
+            kind = message['type']
+            if kind == 'start':
+                size = message['size']
+                targets = [f'{row} {col}' for row in range(1, size + 1) for col in range(1, size + 1)]
+                rng.shuffle(targets)
+                send({'cmd': 'auto'})
+            elif kind == 'turn':
+                cell = targets.pop()
+                while cell in closed:
+                    cell = targets.pop()
+                sent = time.perf_counter()
+                send({'cmd': 'fire', 'cell': cell})
+            elif kind == 'shot' and message['by'] == 'you':
+                latencies.append(time.perf_counter() - sent)
+                closed.update(f'{row} {col}' for row, col in message.get('border', ()))
+            elif kind == 'game_over':
+                return
+            elif kind == 'error':
+                raise RuntimeError(message['message'])
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def load_test(host, port, matches, concurrency, opponent, seed):
+    """
+    :return: tuple (время теста в секундах, задержки ходов в секундах)
+    """
+    rng = random.Random(seed)
+    latencies = []
+    # Против человека каждая партия - два клиента
+    clients = matches * (2 if opponent == 'human' else 1)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def client():
+        async with semaphore:
+            await play_match(host, port, opponent, rng, latencies)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - started, latencies
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест сетевого сервера')
+    parser.add_argument('--matches', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=1000, help='одновременно подключенных клиентов')
+    parser.add_argument('--opponent', choices=('bot', 'human'), default='bot')
+    parser.add_argument('--bot-shooting', default='random')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    server = subprocess.Popen([sys.executable, SERVER, '--port', '0', '--seed', str(args.seed),
+                               '--bot-shooting', args.bot_shooting], stdout=subprocess.PIPE, text=True)
+    try:
+        # Сервер сообщает адрес первой строкой: "... слушает host:port"
+        host, port = server.stdout.readline().split()[-1].rsplit(':', 1)
+        elapsed, latencies = asyncio.run(load_test(host, int(port), args.matches, args.concurrency,
+                                                   args.opponent, args.seed))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f'Партий: {args.matches} против {args.opponent}, одновременно клиентов: {args.concurrency}')
+    print(f'Партий в секунду: {args.matches / elapsed:10.1f}')
+    print(f'Ходов в секунду:  {len(latencies) / elapsed:10.1f}')
+    print(f'Задержка хода, мс: p50 {percentile(latencies, 0.5) * 1e3:.2f}, '
+          f'p99 {percentile(latencies, 0.99) * 1e3:.2f}, max {max(latencies) * 1e3:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Бенчмарк передачи позиции процессам поиска: стоимость одного хода при передаче поля через pickle
+и через разделяемую память (SharedField).
+
+На каждом ходу главный процесс стреляет по полю, затем каждый из --workers процессов получает текущую
+позицию и читает ее публичный слой. С pickle поле целиком сериализуется для каждого процесса (Field
+и ArrayField), с разделяемой памятью процесс получает имя блока и версию, один раз подключается к блоку
+и копирует согласованный публичный слой (SharedBoard.snapshot). Время хода - от выстрела до ответа
+всех процессов; отдельно выводится время пустой задачи пула, то есть цена самой рассылки.
+
+На больших полях сериализация Field занимает секунды, поэтому ходов там меньше (--large-moves).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_shared
+    python -m benchmarks.bench_shared --sizes 6 500 --workers 8 --moves 50 --large-moves 3
+"""
+import argparse
+import pickle
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compact import ArrayField
+from main import Field, Game
+from placement import LayoutGenerator
+from shared import SharedBoard, SharedField
+
+# Подключения процесса пула к блокам памяти по именам
+_BOARDS = {}
+
+
+def read_pickled(field, row, col):
+    """
+    Задача процесса пула: поле пришло через pickle
+    :return: str Публичный статус клетки последнего выстрела
+    """
+    return field.get_status(row, col, True)
+
+
+def read_shared(name, version, row, col):
+    """
+    Задача процесса пула: поле в разделяемой памяти, пришли только имя блока и версия
+    :return: str Публичный статус клетки последнего выстрела
+    """
+    board = _BOARDS.get(name)
+    if board is None:
+        board = _BOARDS[name] = SharedBoard.attach(name)
+    statuses, seen = board.snapshot(public=True)
+    if seen != version:
+        raise RuntimeError(f'Expected version {version}, got {seen}')
+    return chr(statuses[(row - 1) * board.size + col - 1])
+
+
+def noop():
+    return None
+
+
+def pickled_task(field, row, col):
+    return read_pickled, (field, row, col)
+
+
+def shared_task(field, row, col):
+    return read_shared, (field.name, field.version, row, col)
+
+
+def make_field(field_class, size, seed):
+    field = field_class(size)
+    for ship in LayoutGenerator(size, Game.FLEET()).generate(random.Random(seed)):
+        field.place_ship(*ship)
+    return field
+
+
+def free_cell(field, rng):
+    """
+    :return: tuple Случайная клетка, в которую еще можно стрелять
+    """
+    while True:
+        row, col = rng.randint(1, field.size), rng.randint(1, field.size)
+        if field.get_status(row, col, True) == ' ':
+            return row, col
+
+
+def move_cost(pool, workers, field, moves, seed, task):
+    """
+    :param task: function (поле, строка, колонка) -> tuple (функция задачи, ее аргументы)
+    :return: tuple (секунд на ход, байт аргументов на ход)
+    """
+    rng = random.Random(seed)
+    elapsed, sent = 0.0, 0
+    start = field.snapshot()
+    # Первый ход не считаем: процессы пула импортируют модули и подключаются к блоку памяти
+    for move in range(moves + 1):
+        if field.all_ships_sunk():
+            # Маленькое поле кончается раньше, чем ходы: начинаем партию заново с той же расстановкой
+            field.restore(start)
+            start = field.snapshot()
+        started = time.perf_counter()
+        row, col = free_cell(field, rng)
+        field.fire(row, col)
+        function, arguments = task(field, row, col)
+        futures = [pool.submit(function, *arguments) for _ in range(workers)]
+        expected = field.get_status(row, col, True)
+        if any(future.result() != expected for future in futures):
+            raise RuntimeError(f'A worker saw a stale status of ({row}, {col})')
+        if move:
+            elapsed += time.perf_counter() - started
+            sent += workers * len(pickle.dumps(arguments))
+    return elapsed / moves, sent / moves
+
+
+def dispatch_cost(pool, workers, moves):
+    """
+    :return: float Секунд на рассылку пустой задачи всем процессам
+    """
+    started = time.perf_counter()
+    for _ in range(moves):
+        for future in [pool.submit(noop) for _ in range(workers)]:
+            future.result()
+    return (time.perf_counter() - started) / moves
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк передачи позиции процессам поиска')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[Game.FIELD_SIZE(), 500])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--moves', type=int, default=50)
+    parser.add_argument('--large-moves', type=int, default=3, help='ходов на полях больше 100x100')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with ProcessPoolExecutor(args.workers) as pool:
+        dispatch_cost(pool, args.workers, 1)
+        print(f'Процессов: {args.workers}')
+        print(f'{"поле":>9} {"передача":>20} {"мс/ход":>10} {"байт/ход":>12}')
+        for size in args.sizes:
+            moves = args.moves if size <= 100 else args.large_moves
+            label = f'{size}x{size}'
+            print(f'{label:>9} {"пустая задача":>20} {dispatch_cost(pool, args.workers, moves) * 1e3:>10.2f}')
+            for name, field_class in (('pickle Field', Field), ('pickle ArrayField', ArrayField)):
+                field = make_field(field_class, size, args.seed)
+                per_move, sent = move_cost(pool, args.workers, field, moves, args.seed, pickled_task)
+                print(f'{label:>9} {name:>20} {per_move * 1e3:>10.2f} {sent:>12,.0f}')
+            with make_field(SharedField, size, args.seed) as field:
+                field.publish()
+                per_move, sent = move_cost(pool, args.workers, field, moves, args.seed, shared_task)
+                print(f'{label:>9} {"shared memory":>20} {per_move * 1e3:>10.2f} {sent:>12,.0f}')
+
+
+if __name__ == '__main__':
+    main()
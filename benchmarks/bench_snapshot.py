@@ -0,0 +1,116 @@
+"""
+Бенчмарк снимков состояния: стоимость snapshot + ход + restore на один ход для полей разного размера.
+
+Сравниваются:
+- журнал - Field.snapshot/restore: снимок O(1), откат O(измененных клеток);
+- копия - copy.deepcopy поля перед ходом (так снимок пришлось бы делать без журнала).
+
+Ход - выстрел в случайную клетку поля с расставленным флотом. Журнал измеряется дважды: на поле без
+индексов (чистая стоимость журнала) и на поле с индексом зон и картой плотности, которые стрелки строят
+по ходу игры (откат обновляет их так же, как сам ход). Дополнительно измеряется откат серии из depth ходов,
+как при поиске на несколько ходов вперед. Глубокое копирование слишком медленно
+для больших полей, поэтому для них не измеряется.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_snapshot
+    python -m benchmarks.bench_snapshot --sizes 6 10 50 200 --depth 20
+"""
+import argparse
+import copy
+import random
+import time
+
+from bitboard import BitboardField
+from compact import ArrayField
+from main import Field, Game
+from placement import LayoutGenerator
+
+FIELD_CLASSES = (('Field', Field), ('BitboardField', BitboardField), ('ArrayField', ArrayField))
+
+# Наибольший размер поля, для которого измеряется глубокое копирование
+DEEPCOPY_SIZE_LIMIT = 30
+
+
+def prepared_field(field_class, size, rng, indexed):
+    """
+    :param indexed: bool True - построить индекс зон и карту плотности, которые стрелки используют по ходу игры
+    :return: Поле с расставленным флотом
+    """
+    field = field_class(size)
+    for row, col, orientation, decks_num in LayoutGenerator(size, Game.FLEET()).generate(rng):
+        field.place_ship(row, col, orientation, decks_num)
+    field.delete_ship_borders()
+    if indexed:
+        field.window_index(1, True)
+        field.heat_map(Game.FLEET())
+    return field
+
+
+def journal_move(field):
+    """
+    :return: Функция хода со снимком перед ним и откатом после
+    """
+    def move(row, col):
+        token = field.snapshot()
+        field.fire(row, col)
+        field.restore(token)
+    return move
+
+
+def per_move(func, moves):
+    """
+    :return: float Среднее время одного вызова func(row, col) в микросекундах
+    """
+    started = time.perf_counter()
+    for row, col in moves:
+        func(row, col)
+    return (time.perf_counter() - started) / len(moves) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк снимков состояния полей')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[6, 10, 30, 100])
+    parser.add_argument('--moves', type=int, default=2000)
+    parser.add_argument('--depth', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"поле":>6} {"класс":>14} {"журнал, мкс":>12} {"с индексами":>12} {"копия, мкс":>11} '
+          f'{"серия, мкс/ход":>15}')
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        cells = [(row, col) for row in range(1, size + 1) for col in range(1, size + 1)]
+        moves = [rng.choice(cells) for _ in range(args.moves)]
+        for name, field_class in FIELD_CLASSES:
+            field = prepared_field(field_class, size, random.Random(args.seed), indexed=False)
+            journal_time = per_move(journal_move(field), moves)
+
+            copy_time = None
+            if size <= DEEPCOPY_SIZE_LIMIT:
+                def deep_copy(row, col):
+                    copy.deepcopy(field).fire(row, col)
+
+                copy_time = per_move(deep_copy, moves[:max(1, args.moves // 20)])
+
+            field = prepared_field(field_class, size, random.Random(args.seed), indexed=True)
+            indexed_time = per_move(journal_move(field), moves)
+
+            # Серия: depth выстрелов подряд в разные клетки, затем один откат
+            started = time.perf_counter()
+            series = 0
+            while series * args.depth < args.moves:
+                token = field.snapshot()
+                for row, col in rng.sample(cells, min(args.depth, len(cells))):
+                    # Клетки вокруг потопленных кораблей поле закрывает само
+                    if field.get_status(row, col, True) == ' ':
+                        field.fire(row, col)
+                field.restore(token)
+                series += 1
+            series_time = (time.perf_counter() - started) / (series * args.depth) * 1e6
+
+            copy_text = f'{copy_time:11.1f}' if copy_time is not None else f'{"-":>11}'
+            print(f'{size:>6} {name:>14} {journal_time:12.1f} {indexed_time:12.1f} {copy_text} {series_time:15.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Бенчмарк решателя расстановок LayoutSolver:
+- полный точный перебор на пустом поле 6x6 со стандартным флотом;
+- точный перебор по ходу партии (после каждого выстрела случайной стрельбы);
+- оценка Монте-Карло на больших полях.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_solver
+    python -m benchmarks.bench_solver --samples 2000 --sizes 10 20 50
+"""
+import argparse
+import random
+import time
+
+from bitboard import BitboardField
+from main import Game
+from solver import LayoutSolver
+from strategies import RandomPlacement
+
+
+def exact_empty(size, fleet):
+    """
+    :return: tuple (количество расстановок, количество секунд)
+    """
+    started = time.perf_counter()
+    solver = LayoutSolver(size, fleet)
+    solver.probabilities()
+    return solver.count(), time.perf_counter() - started
+
+
+def exact_game(size, fleet, seed):
+    """
+    Решает позицию после каждого выстрела случайной стрельбы, пока флот не потоплен
+    :return: tuple (количество позиций, среднее время, максимальное время) в миллисекундах
+    """
+    rng = random.Random(seed)
+    while True:
+        field = BitboardField(size)
+        try:
+            RandomPlacement.place(field, fleet, rng)
+            break
+        except IndexError:
+            continue
+    cells = [(row, col) for row in range(1, size + 1) for col in range(1, size + 1)]
+    rng.shuffle(cells)
+    timings = []
+    for row, col in cells:
+        if field.get_status(row, col, True) != ' ':
+            continue
+        field.fire(row, col)
+        if field.all_ships_sunk():
+            break
+        started = time.perf_counter()
+        LayoutSolver.from_field(field, fleet).probabilities()
+        timings.append(time.perf_counter() - started)
+    return len(timings), sum(timings) / len(timings) * 1000, max(timings) * 1000
+
+
+def sampled(size, fleet, samples, seed):
+    """
+    :return: float Время оценки Монте-Карло на пустом поле в секундах
+    """
+    started = time.perf_counter()
+    LayoutSolver(size, fleet).sample_probabilities(samples, random.Random(seed))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк решателя расстановок')
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 20, 50])
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    size, fleet = Game.FIELD_SIZE(), Game.FLEET()
+    layouts, seconds = exact_empty(size, fleet)
+    print(f'точный перебор {size}x{size}: {layouts} расстановок за {seconds * 1000:.0f} мс')
+
+    positions, mean, worst = exact_game(size, fleet, args.seed)
+    print(f'точный перебор по ходу партии: {positions} позиций, в среднем {mean:.2f} мс, максимум {worst:.2f} мс')
+
+    for sample_size in args.sizes:
+        seconds = sampled(sample_size, fleet, args.samples, args.seed)
+        print(f'Монте-Карло {sample_size}x{sample_size}: {args.samples} расстановок за {seconds * 1000:.0f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Бенчмарк поиска свободных зон: перебор клеток в possible_ships_areas против векторного free_windows
+(и адаптера windows_to_areas, который возвращает привычный список списков Cell).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_windows
+    python -m benchmarks.bench_windows --sizes 6 20 100 --decks 1 3 --repeat 5
+"""
+import argparse
+import random
+import time
+
+from bitboard import BitboardField
+from main import Field
+
+
+def make_field(field_class, size, density, seed):
+    """
+    Создает поле и случайно занимает часть клеток (приватный статус '*', публичный 'T')
+    :param field_class: Класс поля
+    :param size: int Размер поля
+    :param density: float Доля занятых клеток
+    :param seed: int Зерно генератора случайных чисел
+    :return: Объект поля
+    """
+    rng = random.Random(seed)
+    field = field_class(size)
+    for row in range(1, size + 1):
+        for col in range(1, size + 1):
+            if rng.random() < density:
+                cell = field.cell(row, col)
+                cell.status = '*'
+                cell.status_public = 'T'
+    return field
+
+
+def best_time(func, repeat):
+    """
+    :return: float Лучшее время из repeat запусков функции, в секундах
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[6, 20, 100, 500])
+    parser.add_argument('--decks', type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument('--density', type=float, default=0.2)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"класс":>14} {"размер":>7} {"палуб":>6} {"перебор, мс":>12} {"free_windows, мс":>17} '
+          f'{"адаптер, мс":>12}')
+    for size in args.sizes:
+        for field_class in (Field, BitboardField):
+            field = make_field(field_class, size, args.density, size)
+            for decks_num in args.decks:
+                for public in (False, True):
+                    loop = best_time(lambda: field.possible_ships_areas(decks_num, public, False), args.repeat)
+                    windows = best_time(lambda: field.free_windows(decks_num, public), args.repeat)
+                    adapter = best_time(lambda: field.possible_ships_areas(decks_num, public, True), args.repeat)
+                    name = field_class.__name__ + ('(pub)' if public else '')
+                    print(f'{name:>14} {size:>7} {decks_num:>6} {loop * 1000:>12.3f} {windows * 1000:>17.3f} '
+                          f'{adapter * 1000:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
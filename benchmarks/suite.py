@@ -0,0 +1,337 @@
+"""
+Набор бенчмарков основных операций с сохранением результатов в JSON и сравнением с базовым прогоном.
+
+Операции (каждая - на полях размеров --sizes, по умолчанию 6, 20, 100 и 500, флот стандартный):
+- field - создание Field;
+- areas[decks,public] - Field.possible_ships_areas для каждого размера корабля флота, по приватному
+  и публичному слою поля с расставленным флотом;
+- fill_ships - расстановка флота SkynetField.fill_ships (вывод в консоль перехватывается);
+- game - одна и та же (по зерну --seed) партия движка Engine: компьютер против компьютера
+  (случайная расстановка и стрельба);
+- show_fields - вывод кадра Game.show_fields, sys.stdout перехватывается в память;
+- fire_restore - SHOTS выстрелов Field.fire и откат Field.restore; hash[plain] и hash[symmetric] - то же
+  с поддерживаемым хешем Зобриста публичного слоя (обычным и с 8 симметриями), разница - цена хеша;
+- hash[build] - вычисление симметричного хеша Зобриста по всему полю.
+
+Кроме времени, прогон собирает статистику хешей (раздел hashing в JSON, --hash-positions позиций на
+размер поля): количество различных позиций и различных хешей (коллизии), совпадение канонического хеша
+у симметричных позиций, доля попаданий и вытеснений таблицы транспозиций и изменений статусов в секунду.
+
+Время каждого вызова измеряется без подготовки (создания полей для fill_ships и партии для game).
+Быстрые вызовы повторяются, пока серия не займет --min-time секунд; в результат идет лучшее из --repeat
+серий время одного вызова - оно меньше всего зависит от посторонней нагрузки. Сборщик мусора во время
+серии выключен, как в timeit.
+
+Сравнение (compare) отмечает регрессию, если операция стала медленнее базовой больше чем на --threshold
+(доля), и завершается с кодом 1, если регрессии есть.
+
+Запуск из корня проекта:
+    python -m benchmarks.suite run --output baseline.json
+    python -m benchmarks.suite run --sizes 6 20 --output current.json --baseline baseline.json
+    python -m benchmarks.suite compare baseline.json current.json --threshold 0.1
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import random
+import sys
+import time
+
+from book import canonical, symmetry_tables, transform_layout
+from engine import Engine, random_player
+from main import Field, Game, HumansField, SkynetField
+from placement import LayoutGenerator
+from zobrist import TranspositionTable, ZobristHash
+
+SIZES = (6, 20, 100, 500)
+
+# Выстрелов в операциях fire_restore и hash[...]
+SHOTS = 64
+
+
+def placed_field(field_class, size, fleet, rng, **kwargs):
+    """
+    :return: Поле field_class с флотом, расставленным LayoutGenerator, и без границ кораблей
+    """
+    field = field_class(size, fleet=fleet, **kwargs)
+    for row, col, orientation, decks_num in LayoutGenerator(size, fleet).generate(rng):
+        field.place_ship(row, col, orientation, decks_num)
+    field.delete_ship_borders()
+    return field
+
+
+def cases(size, fleet, seed):
+    """
+    Операции для поля размера size
+    :return: list Тройки (название, подготовка, вызов): подготовка возвращает аргумент вызова
+    и не входит в измеряемое время
+    """
+    rng = random.Random(seed)
+    result = [('field', lambda: size, Field)]
+
+    field = placed_field(Field, size, fleet, rng)
+    # Зоны ищутся по публичному слою после нескольких выстрелов, как в середине партии
+    for row, col in rng.sample([(row, col) for row in range(1, size + 1) for col in range(1, size + 1)],
+                               size * size // 4):
+        # Клетки вокруг потопленных кораблей поле уже закрыло само
+        if field.get_status(row, col, True) == ' ':
+            field.fire(row, col)
+    for decks_num in sorted(set(fleet), reverse=True):
+        for public in (False, True):
+            result.append((f'areas[{decks_num},{str(public).lower()}]', lambda: field,
+                           lambda f, d=decks_num, p=public: f.possible_ships_areas(d, p)))
+
+    def fill_ships(skynet_field):
+        with contextlib.redirect_stdout(io.StringIO()):
+            skynet_field.fill_ships()
+
+    result.append(('fill_ships', lambda: SkynetField(size, fleet=fleet), fill_ships))
+
+    # Зерно партии одно и то же, поэтому каждый вызов проигрывает одну и ту же партию
+    players = (random_player(), random_player())
+    result.append(('game', lambda: Engine.new(size, fleet, seed), lambda engine: engine.play(players)))
+
+    game = Game(size, fleet)
+    humans_field = placed_field(HumansField, size, fleet, rng, game=game)
+    skynet_field = placed_field(SkynetField, size, fleet, rng, game=game)
+    # Game создает поля только в start, поэтому готовые поля передаем через restore без меток снимков
+    game.restore(((humans_field, None), (skynet_field, None)))
+
+    def show_fields(console_field):
+        with contextlib.redirect_stdout(io.StringIO()):
+            console_field.show_fields()
+
+    result.append(('show_fields', lambda: humans_field, show_fields))
+
+    shots = rng.sample([(row, col) for row in range(1, size + 1) for col in range(1, size + 1)],
+                       min(SHOTS, size * size))
+
+    def fire_restore(target):
+        token = target.snapshot()
+        for row, col in shots:
+            if target.get_status(row, col, True) == ' ':
+                target.fire(row, col)
+        target.restore(token)
+
+    for name, symmetric in (('fire_restore', None), ('hash[plain]', False), ('hash[symmetric]', True)):
+        target = placed_field(Field, size, fleet, random.Random(seed))
+        if symmetric is not None:
+            target.zobrist(True, symmetric)
+        result.append((name, lambda f=target: f, fire_restore))
+    result.append(('hash[build]', lambda: field, lambda f: ZobristHash(f, True, True)))
+    return result
+
+
+def hash_stats(size, fleet, positions, seed):
+    """
+    Статистика хешей Зобриста на позициях случайных партий: у каждой партии есть двойник - та же партия,
+    повернутая или отраженная случайной симметрией поля
+    :param positions: int Сколько позиций (публичных слоев после выстрела) собрать
+    :return: dict Счетчики позиций, хешей, коллизий, таблицы транспозиций и скорость обновления хешей
+    """
+    rng = random.Random(seed)
+    cells = [(row, col) for row in range(1, size + 1) for col in range(1, size + 1)]
+    table = TranspositionTable(max(2, positions // 4))
+    layers, values, canonical_layers, canonical_values = {}, {}, {}, {}
+    mismatches = collected = changes = 0
+    elapsed = 0.0
+    while collected < positions:
+        layout = LayoutGenerator(size, fleet).generate(rng)
+        symmetry = rng.randrange(len(symmetry_tables(size)))
+        forward = symmetry_tables(size)[symmetry][0]
+        field, twin = Field(size, fleet=fleet), Field(size, fleet=fleet)
+        for target, ships in ((field, layout), (twin, transform_layout(layout, size, symmetry))):
+            for ship in ships:
+                target.place_ship(*ship)
+            target.delete_ship_borders()
+        position, twin_position = field.zobrist(True, True), twin.zobrist(True, True)
+        counter = [0]
+        field.add_listener(lambda *args: counter.__setitem__(0, counter[0] + 1))
+        for row, col in rng.sample(cells, len(cells)):
+            if field.get_status(row, col, True) != ' ':
+                continue
+            started = time.perf_counter()
+            field.fire(row, col)
+            elapsed += time.perf_counter() - started
+            pos = forward[(row - 1) * size + col - 1]
+            twin.fire(pos // size + 1, pos % size + 1)
+
+            layer = ''.join(status for r in range(1, size + 1) for status in field.row_statuses(r, True))
+            image = canonical(layer, size)[0]
+            layers.setdefault(layer, position.value)
+            values.setdefault(position.value, layer)
+            canonical_layers.setdefault(image, position.canonical)
+            canonical_values.setdefault(position.canonical, image)
+            mismatches += position.canonical != twin_position.canonical
+            if table.get(position.canonical) is None:
+                table.put(position.canonical, image)
+            collected += 1
+            if collected >= positions or field.all_ships_sunk():
+                break
+        changes += counter[0]
+    stats = table.stats
+    return {
+        'positions': collected,
+        'distinct_layers': len(layers),
+        'distinct_hashes': len(values),
+        'collisions': len(layers) - len(values),
+        'distinct_canonical_layers': len(canonical_layers),
+        'distinct_canonical_hashes': len(canonical_values),
+        'canonical_collisions': len(canonical_layers) - len(canonical_values),
+        'symmetry_mismatches': mismatches,
+        'table': stats,
+        'table_hit_rate': stats['hits'] / max(1, stats['hits'] + stats['misses']),
+        # Изменения статусов публичного слоя (выстрелы и границы потопленных кораблей) в секунду
+        # при поддерживаемом симметричном хеше, включая саму стоимость Field.fire
+        'updates_per_second': changes / elapsed if elapsed else None,
+    }
+
+
+def measure(prepare, call, repeat, min_time):
+    """
+    :return: float Лучшее из repeat серий время одного вызова в секундах
+    """
+    best = None
+    for _ in range(repeat):
+        calls, elapsed = 0, 0.0
+        gc.collect()
+        gc.disable()
+        try:
+            while elapsed < min_time or not calls:
+                argument = prepare()
+                started = time.perf_counter()
+                call(argument)
+                elapsed += time.perf_counter() - started
+                calls += 1
+        finally:
+            gc.enable()
+        per_call = elapsed / calls
+        best = per_call if best is None else min(best, per_call)
+    return best
+
+
+def run_suite(sizes, repeat, min_time, seed, only=None, log=None, hash_positions=2000):
+    """
+    :param only: Подстроки названий операций: измеряются только операции, содержащие одну из них
+    :param log: Поток для вывода результатов по мере измерения или None
+    :param hash_positions: int Позиций для статистики хешей на поле 6x6, на больших полях - меньше
+    :return: dict Результаты: метаданные прогона, время по ключам 'операция/размер'
+    и статистика хешей по размерам полей
+    """
+    results, hashing = {}, {}
+    for size in sizes:
+        for name, prepare, call in cases(size, Game.FLEET(), seed):
+            if only and not any(part in name for part in only):
+                continue
+            seconds = measure(prepare, call, repeat, min_time)
+            key = f'{name}/{size}'
+            results[key] = {'name': name, 'size': size, 'seconds': seconds}
+            if log is not None:
+                print(f'{key:>28} {seconds * 1e6:14.1f} мкс', file=log, flush=True)
+        if hash_positions and (not only or any(part in 'hash' for part in only)):
+            # Каждая позиция сравнивается с каноническим слоем строкой, на больших полях это дорого
+            positions = max(20, hash_positions * 36 // (size * size))
+            hashing[str(size)] = stats = hash_stats(size, Game.FLEET(), positions, seed)
+            if log is not None:
+                print(f'{"hash stats/" + str(size):>28} позиций {stats["positions"]}, коллизий {stats["collisions"]}'
+                      f' и {stats["canonical_collisions"]} канонических, несовпадений симметрий '
+                      f'{stats["symmetry_mismatches"]}, попаданий в таблицу {stats["table_hit_rate"] * 100:.0f}%, '
+                      f'{stats["updates_per_second"]:,.0f} изменений/с', file=log, flush=True)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': repeat,
+            'min_time': min_time,
+            'seed': seed,
+        },
+        'results': results,
+        'hashing': hashing,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Сравнивает время операций, измеренных в обоих прогонах
+    :param baseline: dict Базовый прогон (результат run_suite)
+    :param current: dict Текущий прогон
+    :param threshold: float Допустимое замедление, доля
+    :return: tuple (строки отчета, ключи операций с регрессией)
+    """
+    lines = [f'{"операция":>28} {"база, мкс":>14} {"сейчас, мкс":>14} {"изменение":>10}']
+    regressions = []
+    base, now = baseline['results'], current['results']
+    for key in sorted(set(base) & set(now), key=lambda k: (now[k]['size'], k)):
+        ratio = now[key]['seconds'] / base[key]['seconds']
+        mark = ''
+        if ratio > 1 + threshold:
+            mark = '  РЕГРЕССИЯ'
+            regressions.append(key)
+        elif ratio < 1 - threshold:
+            mark = '  ускорение'
+        lines.append(f'{key:>28} {base[key]["seconds"] * 1e6:14.1f} {now[key]["seconds"] * 1e6:14.1f} '
+                     f'{(ratio - 1) * 100:+9.1f}%{mark}')
+    for key in sorted(set(base) - set(now)):
+        lines.append(f'{key:>28} нет в текущем прогоне')
+    for key in sorted(set(now) - set(base)):
+        lines.append(f'{key:>28} нет в базовом прогоне')
+    return lines, regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def report(baseline, current, threshold):
+    """
+    Выводит сравнение прогонов
+    :return: int Код завершения: 1, если есть регрессии, иначе 0
+    """
+    lines, regressions = compare(baseline, current, threshold)
+    print('\n'.join(lines))
+    print(f'Регрессий больше {threshold * 100:.0f}%: {len(regressions)}')
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='измерить операции')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    run_parser.add_argument('--repeat', type=int, default=5, help='серий на операцию')
+    run_parser.add_argument('--min-time', type=float, default=0.1, help='минимальная длительность серии, секунд')
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--only', nargs='+', help='измерять только операции, названия которых содержат')
+    run_parser.add_argument('--hash-positions', type=int, default=2000,
+                            help='позиций для статистики хешей на поле 6x6 (0 - не собирать)')
+    run_parser.add_argument('--output', metavar='PATH', help='сохранить результаты в JSON')
+    run_parser.add_argument('--baseline', metavar='PATH', help='сравнить с сохраненным прогоном')
+    run_parser.add_argument('--threshold', type=float, default=0.1, help='допустимое замедление, доля')
+
+    compare_parser = commands.add_parser('compare', help='сравнить два сохраненных прогона')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='допустимое замедление, доля')
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        return report(load(args.baseline), load(args.current), args.threshold)
+
+    results = run_suite(args.sizes, args.repeat, args.min_time, args.seed, args.only, log=sys.stdout,
+                        hash_positions=args.hash_positions)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    if args.baseline:
+        return report(load(args.baseline), results, args.threshold)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
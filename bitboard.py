@@ -0,0 +1,259 @@
+"""
+Альтернативное представление игрового поля для больших размеров.
+
+Вместо списка списков объектов Cell состояния клеток хранятся в упакованных целочисленных битовых досках
+(bitboard): для каждого значения статуса заводится одно целое число, в котором i-й бит соответствует клетке
+с порядковым номером i = (row - 1) * size + (col - 1). Объекты Cell создаются только по запросу и являются
+представлениями (view) над битовыми слоями, поэтому весь код, работающий с Cell и Ship, продолжает работать
+"""
+from main import CellView, Field, iter_bits, repeat_bits
+
+
+class BitboardCell(CellView):
+    """
+    Клетка-представление над битовыми слоями поля BitboardField
+
+    Собственного состояния не хранит: чтение и запись status и status_public перенаправляются в поле,
+    которому принадлежит клетка. Координаты и метод hit() наследуются от Cell без изменений
+    """
+
+    __slots__ = ()
+
+
+class BitboardField(Field):
+    """
+    Игровое поле, хранящее приватный и публичный слои статусов в виде битовых досок
+
+    Свойства
+    -----------
+    Все свойства такие же, как и у родительского класса Field. ships_area_list строится лениво
+    при первом обращении, т.к. для больших полей он не нужен большинству операций
+
+    Методы
+    -----------
+    position(row, col) : -> int
+        Возвращает номер бита, соответствующего клетке
+
+    get_status(row, col, public) : -> str
+        Возвращает приватный или публичный статус клетки
+
+    row_statuses(row, public) : -> list
+        Возвращает статусы всех клеток строки, вырезая строку из каждого слоя
+
+    set_status(row, col, status, public) : -> None
+        Устанавливает приватный или публичный статус клетки
+
+    layer(status, public) : -> int
+        Возвращает битовую маску всех клеток с указанным статусом
+
+    free_mask(public) : -> int
+        Возвращает битовую маску всех свободных (со статусом ' ') клеток
+
+    ship_mask(ship) : -> int
+        Возвращает битовую маску палуб корабля
+
+    Методы create_ship_borders и delete_ship_borders переопределены и работают целиком на битовых операциях.
+    possible_ships_areas по умолчанию работает в векторном режиме
+    """
+
+    def _fill_cells(self):
+        """
+        Создает пустые битовые слои. Объекты Cell не создаются, поэтому конструктор работает за O(1)
+        независимо от размера поля
+        :return: None
+        """
+        size = self.size
+        self.__full = (1 << (size * size)) - 1
+
+        # Маска всех клеток, кроме клеток первой и последней колонки. Нужна для сдвигов влево/вправо,
+        # чтобы биты не перескакивали с одной строки на другую
+        rows_mask = repeat_bits(1, size, size)  # по одному биту в начале каждой строки
+        self.__not_first_col = self.__full & ~rows_mask
+        self.__not_last_col = self.__full & ~(rows_mask << (size - 1))
+
+        # Слои статусов: статус -> битовая маска. Пустой статус ' ' отдельно не хранится
+        self.__layers = ({}, {})
+        # Объединение всех непустых слоев (занятые клетки) для приватного и публичного статусов
+        self.__busy = [0, 0]
+
+        self.__cells = {}
+        self.__ships_area_list = None
+
+    @property
+    def ships_area_list(self):
+        """
+        :return: list Список списков клеток-представлений. Строится один раз при первом обращении
+        """
+        if self.__ships_area_list is None:
+            size = self.size
+            self.__ships_area_list = [[self.cell(x, y) for y in range(1, size + 1)] for x in range(1, size + 1)]
+        return self.__ships_area_list
+
+    @property
+    def full_mask(self):
+        """
+        :return: int Битовая маска всех клеток поля
+        """
+        return self.__full
+
+    def position(self, row, col):
+        """
+        Возвращает номер бита, соответствующего клетке
+        :param row: int Номер строки (начиная с 1)
+        :param col: int Номер колонки (начиная с 1)
+        :return: int Номер бита
+        """
+        return (row - 1) * self.size + (col - 1)
+
+    def cell(self, row, col):
+        """
+        Возвращает клетку-представление по координатам. Для одной и той же клетки всегда возвращается
+        один и тот же объект, поэтому палубы кораблей и ships_area_list ссылаются на одни и те же объекты
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: Объект BitboardCell
+        """
+        pos = self.position(row, col)
+        cell = self.__cells.get(pos)
+        if cell is None:
+            cell = BitboardCell(self, row, col)
+            self.__cells[pos] = cell
+        return cell
+
+    def get_status(self, row, col, public=False):
+        """
+        Возвращает статус клетки
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :param public: bool True - публичный статус, False - приватный
+        :return: str Статус клетки
+        """
+        bit = 1 << self.position(row, col)
+        if not self.__busy[public] & bit:
+            return ' '
+        for status, mask in self.__layers[public].items():
+            if mask & bit:
+                return status
+        return ' '
+
+    def row_statuses(self, row, public=False):
+        """
+        Возвращает статусы всех клеток строки: из каждого слоя вырезается строка и расставляются ее биты
+        :param row: int Номер строки
+        :param public: bool True - публичные статусы, False - приватные
+        :return: list Статусы клеток строки по порядку колонок
+        """
+        size = self.size
+        shift, row_mask = (row - 1) * size, (1 << size) - 1
+        statuses = [' '] * size
+        if (self.__busy[public] >> shift) & row_mask:
+            for status, mask in self.__layers[public].items():
+                for col in iter_bits((mask >> shift) & row_mask):
+                    statuses[col] = status
+        return statuses
+
+    def set_status(self, row, col, status, public=False):
+        """
+        Устанавливает статус клетки, перенося ее бит из слоя старого статуса в слой нового
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :param status: str Новый статус
+        :param public: bool True - публичный статус, False - приватный
+        :return: None
+        """
+        bit = 1 << self.position(row, col)
+        layers = self.__layers[public]
+        old_status = ' '
+        if self.__busy[public] & bit:
+            for old_status, mask in layers.items():
+                if mask & bit:
+                    layers[old_status] = mask & ~bit
+                    break
+
+        if status == ' ':
+            self.__busy[public] &= ~bit
+        else:
+            layers[status] = layers.get(status, 0) | bit
+            self.__busy[public] |= bit
+
+        if old_status != status:
+            self.status_changed(row, col, old_status, status, public)
+
+    def __notify(self, mask, old_status, new_status):
+        """
+        Сообщает status_changed об изменении приватного статуса всех клеток маски, измененных одной битовой операцией
+        :param mask: int Маска измененных клеток
+        :param old_status: str Статус до изменения
+        :param new_status: str Статус после изменения
+        :return: None
+        """
+        size = self.size
+        for pos in iter_bits(mask):
+            self.status_changed(pos // size + 1, pos % size + 1, old_status, new_status)
+
+    def layer(self, status, public=False):
+        """
+        Возвращает битовую маску всех клеток с указанным статусом
+        :param status: str Статус
+        :param public: bool True - публичный слой, False - приватный
+        :return: int Битовая маска
+        """
+        if status == ' ':
+            return self.free_mask(public)
+        return self.__layers[public].get(status, 0)
+
+    def free_mask(self, public=False):
+        """
+        :param public: bool True - публичный слой, False - приватный
+        :return: int Битовая маска клеток со статусом ' '
+        """
+        return self.__full & ~self.__busy[public]
+
+    def possible_ships_areas(self, decks_num, public=False, vectorized=True):
+        """
+        То же, что Field.possible_ships_areas, но по умолчанию в векторном режиме: перебор клеток-представлений
+        на битовых досках был бы медленнее, чем у обычного Field
+        """
+        return super().possible_ships_areas(decks_num, public, vectorized)
+
+    def ship_mask(self, ship):
+        """
+        :param ship: Объект Ship
+        :return: int Битовая маска палуб корабля
+        """
+        mask = 0
+        for deck in ship.decks:
+            mask |= 1 << self.position(deck.row, deck.col)
+        return mask
+
+    def neighbourhood(self, mask):
+        """
+        Расширяет маску на одну клетку во все стороны, включая диагонали (морфологическая дилатация 3x3)
+        :param mask: int Исходная битовая маска
+        :return: int Маска исходных клеток вместе со всеми соседними
+        """
+        size = self.size
+        wide = mask | ((mask << 1) & self.__not_first_col) | ((mask >> 1) & self.__not_last_col)
+        return (wide | (wide << size) | (wide >> size)) & self.__full
+
+    def create_ship_borders(self, ship):
+        """
+        Присваивает статус '-' всем свободным клеткам вокруг корабля. Вся окрестность корабля вычисляется
+        несколькими сдвигами битовой маски вместо обхода 3x3 вокруг каждой палубы
+        :param ship: объект Ship
+        :return: None
+        """
+        borders = self.neighbourhood(self.ship_mask(ship)) & ~self.__busy[False]
+        layers = self.__layers[False]
+        layers['-'] = layers.get('-', 0) | borders
+        self.__busy[False] |= borders
+        self.__notify(borders, ' ', '-')
+
+    def delete_ship_borders(self):
+        """
+        Удаляет статус '-' у всех клеток поля одной операцией над слоем границ
+        :return: None
+        """
+        borders = self.__layers[False].pop('-', 0)
+        self.__busy[False] &= ~borders
+        self.__notify(borders, '-', ' ')
@@ -0,0 +1,335 @@
+"""
+Дебютная книга компьютера и кэш расстановок флота.
+
+На одной и той же конфигурации (например, поле 6x6 со стандартным флотом) первые выстрелы компьютера
+и его расстановки каждый раз вычисляются заново. OpeningBook запоминает:
+- лучшие выстрелы - по сигнатуре позиции: публичный слой поля противника и его флот. Лучшие клетки - те,
+  где палуба стоит с наибольшей вероятностью по всем согласованным расстановкам (LayoutSolver.solve);
+  на поле 6x6 точный перебор стоит сотни миллисекунд, из книги выстрел берется за микросекунды.
+  Книга ведется только для первых depth выстрелов, дальше позиции почти не повторяются;
+- пулы расстановок - по размеру поля и флоту: pool_size готовых расстановок LayoutGenerator.
+
+Позиции, которые переходят друг в друга поворотом или отражением поля (8 симметрий квадрата), хранятся
+одной записью: сигнатура строится по наименьшему из 8 преобразованных слоев, а выстрел из книги
+переводится обратно в координаты поля. Расстановка из пула тоже поворачивается или отражается случайно,
+поэтому пул из pool_size расстановок дает до 8 * pool_size разных расстановок.
+
+Кэш двухуровневый: в памяти - capacity последних использованных записей (LRU), на диске (sqlite3,
+если задан path) - до disk_capacity записей, вытесняются давно не использованные. Статистика попаданий
+и промахов - OpeningBook.stats.
+
+Пример:
+    with OpeningBook('book.sqlite') as book:
+        Game(book=book).start()
+        print(book.stats)
+"""
+import json
+import sqlite3
+from collections import OrderedDict
+
+from placement import LayoutGenerator
+from solver import LayoutSolver
+
+# Количество симметрий квадратного поля: 4 поворота, каждый с отражением и без
+SYMMETRIES = 8
+
+# Таблицы симметрий по размерам полей, см. symmetry_tables
+_SYMMETRY_TABLES = {}
+
+
+def symmetry_tables(size):
+    """
+    Перестановки клеток поля для 8 симметрий квадрата. Клетка - номер (row - 1) * size + (col - 1)
+    :param size: int Размер поля
+    :return: tuple Пары (прямая, обратная): прямая[p] - куда симметрия переводит клетку p, обратная[q] - откуда
+    """
+    tables = _SYMMETRY_TABLES.get(size)
+    if tables is None:
+        last = size - 1
+        maps = (lambda r, c: (r, c), lambda r, c: (c, last - r), lambda r, c: (last - r, last - c),
+                lambda r, c: (last - c, r), lambda r, c: (r, last - c), lambda r, c: (last - r, c),
+                lambda r, c: (c, r), lambda r, c: (last - c, last - r))
+        tables = []
+        for transform in maps:
+            forward = [0] * (size * size)
+            for pos in range(size * size):
+                row, col = transform(*divmod(pos, size))
+                forward[pos] = row * size + col
+            inverse = [0] * (size * size)
+            for pos, image in enumerate(forward):
+                inverse[image] = pos
+            tables.append((tuple(forward), tuple(inverse)))
+        tables = _SYMMETRY_TABLES[size] = tuple(tables)
+    return tables
+
+
+def public_layer(field):
+    """
+    :param field: Объект Field
+    :return: str Публичный слой поля строкой size * size символов: ' ' - сюда не стреляли, 'X' - попадание,
+    'T' - клетка без корабля (промах или любой другой непустой статус)
+    """
+    return ''.join(' ' if status == ' ' else ('X' if status == 'X' else 'T')
+                   for row in range(1, field.size + 1) for status in field.row_statuses(row, True))
+
+
+def canonical(layer, size):
+    """
+    Каноническая форма слоя: наименьший из слоев, полученных 8 симметриями поля
+    :param layer: str Слой строкой size * size символов
+    :param size: int Размер поля
+    :return: tuple (каноническая строка, номер симметрии, переводящей слой в нее)
+    """
+    best, best_symmetry = None, 0
+    for symmetry, (_, inverse) in enumerate(symmetry_tables(size)):
+        image = ''.join([layer[pos] for pos in inverse])
+        if best is None or image < best:
+            best, best_symmetry = image, symmetry
+    return best, best_symmetry
+
+
+def transform_layout(layout, size, symmetry):
+    """
+    Поворачивает или отражает расстановку
+    :param layout: Корабли в виде (строка, колонка, ориентация, количество палуб)
+    :param size: int Размер поля
+    :param symmetry: int Номер симметрии
+    :return: list Корабли преобразованной расстановки в том же виде
+    """
+    forward = symmetry_tables(size)[symmetry][0]
+    result = []
+    for row, col, orientation, decks_num in layout:
+        cells = [forward[(row - 1 + i * orientation) * size + col - 1 + i * (1 - orientation)]
+                 for i in range(decks_num)]
+        first, last = min(cells), max(cells)
+        vertical = 1 if decks_num > 1 and last - first >= size else 0
+        result.append((first // size + 1, first % size + 1, vertical, decks_num))
+    return result
+
+
+class OpeningBook:
+    """
+    Дебютная книга и кэш расстановок с вытеснением давно не использованных записей
+
+    Свойства
+    -----------
+    depth : int
+        Для скольких первых выстрелов ведется книга
+
+    pool_size : int
+        Количество расстановок в пуле одной конфигурации
+
+    stats : dict
+        Статистика: попадания в памяти и на диске, промахи, вытеснения, записей в памяти и на диске
+
+    Методы
+    -----------
+    get(key) : -> object
+        Значение записи или None. Запись становится самой недавно использованной
+
+    put(key, value) : -> None
+        Сохраняет запись в памяти и на диске
+
+    best_shot(field, fleet, rng) : -> tuple
+        Лучший выстрел по полю противника из книги (вычисляется и запоминается при промахе)
+        или None, если позиция глубже depth выстрелов
+
+    layout(size, fleet, rng) : -> list
+        Случайная расстановка флота из пула (пул строится и запоминается при промахе)
+
+    flush() : -> None
+        Записывает изменения на диск
+
+    close() : -> None
+        Записывает изменения на диск и закрывает файл кэша
+    """
+
+    # Сколько изменений на диске накапливать перед записью транзакции
+    COMMIT_EVERY = 64
+
+    def __init__(self, path=None, capacity=4096, disk_capacity=100000, depth=8, pool_size=256, samples=1000):
+        """
+        :param path: str Файл кэша sqlite3 или None - кэш только в памяти
+        :param capacity: int Записей в памяти
+        :param disk_capacity: int Записей на диске
+        :param depth: int Для скольких первых выстрелов вести книгу
+        :param pool_size: int Расстановок в пуле
+        :param samples: int Расстановок для оценки вероятностей на полях, где точный перебор невозможен
+        """
+        self.__capacity = capacity
+        self.__disk_capacity = disk_capacity
+        self.__depth = depth
+        self.__pool_size = pool_size
+        self.__samples = samples
+        self.__memory = OrderedDict()
+        self.__stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self.__db = None
+        self.__pending = 0
+        if path is not None:
+            self.__db = sqlite3.connect(path)
+            self.__db.execute('CREATE TABLE IF NOT EXISTS book (key TEXT PRIMARY KEY, value TEXT, used INTEGER)')
+            self.__db.execute('CREATE INDEX IF NOT EXISTS book_used ON book (used)')
+            self.__clock = self.__db.execute('SELECT COALESCE(MAX(used), 0) FROM book').fetchone()[0]
+            self.__disk_size = self.__db.execute('SELECT COUNT(*) FROM book').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def depth(self):
+        return self.__depth
+
+    @property
+    def pool_size(self):
+        return self.__pool_size
+
+    @property
+    def stats(self):
+        stats = dict(self.__stats)
+        stats['hits'] = stats['memory_hits'] + stats['disk_hits']
+        stats['memory_entries'] = len(self.__memory)
+        stats['disk_entries'] = self.__disk_size if self.__db is not None else 0
+        return stats
+
+    def __remember(self, key, value):
+        """
+        Кладет запись в память, вытесняя самую давно использованную при переполнении
+        :return: None
+        """
+        self.__memory[key] = value
+        self.__memory.move_to_end(key)
+        if len(self.__memory) > self.__capacity:
+            self.__memory.popitem(last=False)
+            # Без диска вытесненная запись потеряна
+            if self.__db is None:
+                self.__stats['evictions'] += 1
+
+    def __touch(self):
+        """
+        Засчитывает изменение на диске и записывает транзакцию каждые COMMIT_EVERY изменений
+        :return: int Метка времени использования записи
+        """
+        self.__clock += 1
+        self.__pending += 1
+        if self.__pending >= self.COMMIT_EVERY:
+            self.flush()
+        return self.__clock
+
+    def get(self, key):
+        """
+        :param key: str Ключ записи
+        :return: Значение записи или None
+        """
+        value = self.__memory.get(key)
+        if value is not None:
+            self.__memory.move_to_end(key)
+            self.__stats['memory_hits'] += 1
+            return value
+        if self.__db is not None:
+            row = self.__db.execute('SELECT value FROM book WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                self.__db.execute('UPDATE book SET used = ? WHERE key = ?', (self.__touch(), key))
+                self.__remember(key, value)
+                self.__stats['disk_hits'] += 1
+                return value
+        self.__stats['misses'] += 1
+        return None
+
+    def put(self, key, value):
+        """
+        :param key: str Ключ записи
+        :param value: Значение, сериализуемое в JSON
+        :return: None
+        """
+        self.__remember(key, value)
+        if self.__db is None:
+            return
+        data, used = json.dumps(value), self.__touch()
+        if not self.__db.execute('UPDATE book SET value = ?, used = ? WHERE key = ?', (data, used, key)).rowcount:
+            self.__db.execute('INSERT INTO book (key, value, used) VALUES (?, ?, ?)', (key, data, used))
+            self.__disk_size += 1
+        if self.__disk_size > self.__disk_capacity:
+            # Вытесняем с запасом в десятую часть емкости, чтобы не удалять по одной записи на каждый put
+            excess = self.__disk_size - self.__disk_capacity + self.__disk_capacity // 10
+            deleted = self.__db.execute('DELETE FROM book WHERE key IN (SELECT key FROM book ORDER BY used LIMIT ?)',
+                                        (excess,)).rowcount
+            self.__disk_size -= deleted
+            self.__stats['evictions'] += deleted
+
+    def best_shot(self, field, fleet, rng):
+        """
+        :param field: Поле противника
+        :param fleet: Состав флота противника
+        :param rng: random.Random Генератор случайных чисел, выбирает одну из равноценных лучших клеток
+        :return: tuple (строка, колонка) или None, если на поле уже depth выстрелов или больше или флот
+        не согласуется с полем
+        """
+        size = field.size
+        layer = public_layer(field)
+        if size * size - layer.count(' ') >= self.__depth:
+            return None
+        image, symmetry = canonical(layer, size)
+        key = f'shot:{size}:{",".join(map(str, sorted(fleet, reverse=True)))}:{image}'
+        targets = self.get(key)
+        if targets is None:
+            targets = self.__best_targets(image, size, fleet, rng)
+            self.put(key, targets)
+        if not targets:
+            return None
+        pos = symmetry_tables(size)[symmetry][1][rng.choice(targets)]
+        return pos // size + 1, pos % size + 1
+
+    def __best_targets(self, layer, size, fleet, rng):
+        """
+        :return: list Клетки (номера) слоя, в которых палуба стоит с наибольшей вероятностью
+        """
+        cells = [(pos // size + 1, pos % size + 1) for pos in range(size * size)]
+        solver = LayoutSolver(size, fleet, [cell for cell, status in zip(cells, layer) if status == 'X'],
+                              [cell for cell, status in zip(cells, layer) if status == 'T'])
+        try:
+            probabilities = solver.solve(self.__samples, rng)
+        except ValueError:
+            return []
+        free = [pos for pos in range(size * size) if layer[pos] == ' ']
+        if not free:
+            return []
+        best = max(probabilities[pos // size][pos % size] for pos in free)
+        return [pos for pos in free if probabilities[pos // size][pos % size] >= best - 1e-12]
+
+    def layout(self, size, fleet, rng):
+        """
+        :param size: int Размер поля
+        :param fleet: Состав флота
+        :param rng: random.Random Генератор случайных чисел
+        :return: list Корабли в виде (строка, колонка, ориентация, количество палуб). Если расставить флот
+        невозможно - IndexError
+        """
+        fleet = tuple(sorted(fleet, reverse=True))
+        key = f'layouts:{size}:{",".join(map(str, fleet))}'
+        pool = self.get(key)
+        if pool is None:
+            generator = LayoutGenerator(size, fleet)
+            pool = [generator.generate(rng) for _ in range(self.__pool_size)]
+            self.put(key, pool)
+        return transform_layout(rng.choice(pool), size, rng.randrange(SYMMETRIES))
+
+    def flush(self):
+        """
+        :return: None
+        """
+        if self.__db is not None:
+            self.__db.commit()
+        self.__pending = 0
+
+    def close(self):
+        """
+        :return: None
+        """
+        if self.__db is not None:
+            self.flush()
+            self.__db.close()
+            self.__db = None
@@ -0,0 +1,173 @@
+"""
+Компактное представление игрового поля: структура массивов вместо списка списков объектов Cell.
+
+Приватные и публичные статусы всех клеток хранятся в двух массивах байтов (bytearray), по одному байту
+на клетку с порядковым номером (row - 1) * size + (col - 1). Объекты Cell создаются только по запросу
+и являются легковесными представлениями (CellView) над этими массивами, поэтому весь код, работающий
+с Cell и Ship, продолжает работать, а поле из миллиона клеток занимает около двух мегабайт
+"""
+from main import CellView, Field, neighbourhood_table
+
+# Таблица перекодировки статусов в цифры маски свободных клеток: ' ' -> '1', все остальные -> '0'
+_FREE_DIGITS = bytes(ord('1') if code == ord(' ') else ord('0') for code in range(256))
+
+
+class ArrayField(Field):
+    """
+    Игровое поле, хранящее приватный и публичный статусы клеток в массивах байтов
+
+    Свойства
+    -----------
+    Все свойства такие же, как и у родительского класса Field. ships_area_list строится лениво
+    при первом обращении, т.к. для больших полей он не нужен большинству операций
+
+    Методы
+    -----------
+    get_status(row, col, public) : -> str
+        Возвращает статус клетки из массива
+
+    row_statuses(row, public) : -> list
+        Возвращает статусы всех клеток строки срезом массива
+
+    set_status(row, col, status, public) : -> None
+        Записывает статус клетки в массив. Статус - один символ с кодом до 255
+
+    free_mask(public) : -> int
+        Возвращает битовую маску свободных клеток, построенную перекодировкой массива целиком
+
+    Методы create_ship_borders и delete_ship_borders переопределены и работают прямо с массивом статусов.
+    possible_ships_areas по умолчанию работает в векторном режиме
+
+    Наследники могут хранить массивы в другой памяти (см. _allocate_layers): поле обращается к ним только
+    по индексу и срезом, поэтому годится любой изменяемый буфер байтов, например memoryview
+    """
+
+    def _fill_cells(self):
+        """
+        Создает массивы статусов. Объекты Cell не создаются
+        :return: None
+        """
+        self.__layers = self._allocate_layers(self.size * self.size)
+        self.__cells = {}
+        self.__ships_area_list = None
+
+    def _allocate_layers(self, cells):
+        """
+        Выделяет массивы приватных и публичных статусов, заполненные статусом ' '
+        :param cells: int Количество клеток поля
+        :return: tuple (приватный массив, публичный массив)
+        """
+        return bytearray(b' ') * cells, bytearray(b' ') * cells
+
+    @property
+    def ships_area_list(self):
+        """
+        :return: list Список списков клеток-представлений. Строится один раз при первом обращении
+        """
+        if self.__ships_area_list is None:
+            size = self.size
+            self.__ships_area_list = [[self.cell(x, y) for y in range(1, size + 1)] for x in range(1, size + 1)]
+        return self.__ships_area_list
+
+    def cell(self, row, col):
+        """
+        Возвращает клетку-представление по координатам. Для одной и той же клетки всегда возвращается
+        один и тот же объект, поэтому палубы кораблей и ships_area_list ссылаются на одни и те же объекты
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: Объект CellView
+        """
+        pos = (row - 1) * self.size + (col - 1)
+        cell = self.__cells.get(pos)
+        if cell is None:
+            cell = CellView(self, row, col)
+            self.__cells[pos] = cell
+        return cell
+
+    def get_status(self, row, col, public=False):
+        """
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :param public: bool True - публичный статус, False - приватный
+        :return: str Статус клетки
+        """
+        return chr(self.__layers[public][(row - 1) * self.size + (col - 1)])
+
+    def row_statuses(self, row, public=False):
+        """
+        Возвращает статусы всех клеток строки срезом массива
+        :param row: int Номер строки
+        :param public: bool True - публичные статусы, False - приватные
+        :return: list Статусы клеток строки по порядку колонок
+        """
+        size = self.size
+        return list(str(self.__layers[public][(row - 1) * size:row * size], 'latin-1'))
+
+    def set_status(self, row, col, status, public=False):
+        """
+        Записывает статус клетки и сообщает полю об изменении
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :param status: str Новый статус - один символ с кодом до 255
+        :param public: bool True - публичный статус, False - приватный
+        :return: None
+        """
+        if len(status) != 1 or ord(status) > 255:
+            raise ValueError(f'ArrayField can only store single-byte statuses, got {status!r}')
+        layer = self.__layers[public]
+        pos = (row - 1) * self.size + (col - 1)
+        old_status = chr(layer[pos])
+        if old_status != status:
+            layer[pos] = ord(status)
+            self.status_changed(row, col, old_status, status, public)
+
+    def free_mask(self, public=False):
+        """
+        Строит маску свободных клеток перекодировкой всего массива статусов в строку цифр
+        :param public: bool True - проверяется публичный статус, False - приватный
+        :return: int Маска, в которой бит (row - 1) * size + (col - 1) установлен, если статус клетки ' '
+        """
+        # Первая клетка должна стать младшим битом, поэтому строку цифр разворачиваем
+        return int(bytes(self.__layers[public]).translate(_FREE_DIGITS)[::-1], 2)
+
+    def possible_ships_areas(self, decks_num, public=False, vectorized=True):
+        """
+        То же, что Field.possible_ships_areas, но по умолчанию в векторном режиме: перебор клеток-представлений
+        был бы медленнее, чем у обычного Field
+        """
+        return super().possible_ships_areas(decks_num, public, vectorized)
+
+    def create_ship_borders(self, ship):
+        """
+        Присваивает статус '-' всем свободным клеткам вокруг корабля. Окрестность - прямоугольник от соседей
+        первой палубы до соседей последней, его границы берутся из таблицы окрестностей
+        :param ship: объект Ship
+        :return: None
+        """
+        if not ship.decks:
+            return
+        size, layer = self.size, self.__layers[False]
+        table = neighbourhood_table(size)
+        first_row, last_row = min(deck.row for deck in ship.decks), max(deck.row for deck in ship.decks)
+        first_col, last_col = min(deck.col for deck in ship.decks), max(deck.col for deck in ship.decks)
+        col_from, col_to = table[first_col - 1][0], table[last_col - 1][1]
+        for x in range(table[first_row - 1][0], table[last_row - 1][1]):
+            base = x * size
+            for pos in range(base + col_from, base + col_to):
+                if layer[pos] == 32:  # ' '
+                    layer[pos] = 45  # '-'
+                    self.status_changed(x + 1, pos - base + 1, ' ', '-')
+
+    def delete_ship_borders(self):
+        """
+        Удаляет статус '-' у всех клеток поля, находя их поиском по массиву статусов
+        :return: None
+        """
+        size, layer = self.size, self.__layers[False]
+        # Ищем по копии: статусы меняются только в уже найденных клетках, а у буфера может не быть метода find
+        statuses = bytes(layer)
+        pos = statuses.find(b'-')
+        while pos != -1:
+            layer[pos] = 32
+            self.status_changed(pos // size + 1, pos % size + 1, '-', ' ')
+            pos = statuses.find(b'-', pos + 1)
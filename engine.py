@@ -0,0 +1,258 @@
+"""
+Игровой движок без ввода-вывода.
+
+Engine хранит два игровых поля и очередность ходов и ничего не печатает и не читает с консоли,
+поэтому подходит для массового моделирования партий. Игроки подключаются как пары стратегий
+(см. модуль strategies), консольная игра (Game в main.py) использует те же методы полей
+Field.place_ship и Field.fire
+
+Для массового моделирования партий есть поле LeanField (модуль lean): Engine.new(..., field_class=LeanField)
+играет те же партии с теми же стратегиями, но без объектов Ship и подписчиков, пока они никому не нужны
+
+Пример:
+    engine = Engine.new(6, (3, 2, 2, 1, 1, 1), seed=1)
+    player = Player(RandomPlacement(), RandomShooting())
+    winner = engine.play((player, player))
+"""
+from collections import namedtuple
+
+from bitboard import BitboardField
+from main import Game, player_rng
+from strategies import RandomPlacement, RandomShooting
+
+# Результат выстрела: кто стрелял, куда, было ли попадание и закончилась ли этим выстрелом игра
+ShotResult = namedtuple('ShotResult', ['player', 'row', 'col', 'hit', 'game_over'])
+
+# Игрок движка: стратегия расстановки кораблей и стратегия стрельбы
+Player = namedtuple('Player', ['placement', 'shooting'])
+
+
+def random_player():
+    """
+    :return: Player Игрок, который и расставляет корабли, и стреляет случайно
+    """
+    return Player(RandomPlacement(), RandomShooting())
+
+
+class Engine:
+    """
+    Игровой движок: два поля, очередность ходов, счетчики выстрелов и определение победителя
+
+    Свойства
+    -----------
+    size : int
+        Размер игровых полей
+
+    fleet : tuple
+        Состав флота каждого игрока (количество палуб каждого корабля)
+
+    turn : int
+        Номер игрока (0 или 1), который сейчас стреляет
+
+    winner : int
+        Номер победившего игрока или None, если игра не окончена
+
+    shots : tuple
+        Количество выстрелов, сделанных каждым игроком
+
+    Методы
+    -----------
+    new(size, fleet, seed) : -> Engine
+        Создает новую партию
+
+    field(player) : -> Field
+        Возвращает поле игрока
+
+    rng(player) : -> random.Random
+        Возвращает генератор случайных чисел игрока. Генераторы игроков получаются из зерна партии и номера
+        игрока (player_rng) и не зависят друг от друга, поэтому партия с тем же зерном повторяется в точности
+
+    place(player, row, col, orientation, decks_num) : -> Ship
+        Ставит корабль игрока, проверяя, что такой корабль еще есть в его флоте
+
+    setup(player, placement) : -> None
+        Расставляет весь флот игрока с помощью стратегии расстановки
+
+    fire(player, row, col) : -> ShotResult
+        Выполняет выстрел игрока по полю противника
+
+    play(players) : -> int
+        Проводит партию целиком и возвращает номер победителя
+
+    snapshot() : -> tuple
+        Запоминает состояние партии (поля, очередность, счетчики) для restore
+
+    restore(token) : -> None
+        Возвращает партию в состояние, запомненное snapshot
+    """
+
+    # Сколько раз пробовать расставить флот заново, если стратегия расстановки зашла в тупик
+    PLACEMENT_ATTEMPTS = 100
+
+    def __init__(self, size=Game.FIELD_SIZE(), fleet=Game.FLEET(), seed=None, field_class=BitboardField):
+        self.__size = size
+        self.__fleet = tuple(fleet)
+        self.__rngs = (player_rng(seed, 0), player_rng(seed, 1))
+        self.__field_class = field_class
+        # Поле проверяет размер и состав флота, поэтому недопустимая конфигурация отвергается сразу
+        self.__fields = [field_class(size, fleet=self.__fleet), field_class(size, fleet=self.__fleet)]
+        self.__unplaced = [list(self.__fleet), list(self.__fleet)]
+        self.__turn = 0
+        self.__winner = None
+        self.__shots = [0, 0]
+
+    @classmethod
+    def new(cls, size=Game.FIELD_SIZE(), fleet=Game.FLEET(), seed=None, field_class=BitboardField):
+        """
+        Создает новую партию
+        :param size: int Размер игровых полей
+        :param fleet: Последовательность размеров кораблей флота каждого игрока
+        :param seed: Зерно партии, из него получаются генераторы случайных чисел игроков
+        :param field_class: Класс игровых полей
+        :return: Объект Engine
+        """
+        return cls(size, fleet, seed, field_class)
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def fleet(self):
+        return self.__fleet
+
+    @property
+    def turn(self):
+        return self.__turn
+
+    @property
+    def winner(self):
+        return self.__winner
+
+    @property
+    def game_over(self):
+        return self.__winner is not None
+
+    @property
+    def shots(self):
+        return tuple(self.__shots)
+
+    def field(self, player):
+        """
+        :param player: int Номер игрока (0 или 1)
+        :return: Field Поле игрока
+        """
+        return self.__fields[player]
+
+    def rng(self, player):
+        """
+        :param player: int Номер игрока (0 или 1)
+        :return: random.Random Генератор случайных чисел игрока
+        """
+        return self.__rngs[player]
+
+    def place(self, player, row, col, orientation, decks_num):
+        """
+        Ставит корабль игрока
+        :param player: int Номер игрока
+        :param row: int Номер строки первой палубы
+        :param col: int Номер колонки первой палубы
+        :param orientation: int 0 - горизонтальный корабль, 1 - вертикальный
+        :param decks_num: int Количество палуб
+        :return: Созданный объект Ship (None у LeanField в быстром режиме)
+        """
+        if decks_num not in self.__unplaced[player]:
+            raise ValueError(f'Player {player} has no {decks_num}-deck ship left to place')
+        ship = self.__fields[player].place_ship(row, col, orientation, decks_num)
+        self.__unplaced[player].remove(decks_num)
+        return ship
+
+    def setup(self, player, placement):
+        """
+        Расставляет весь флот игрока с помощью стратегии расстановки. Если стратегия зашла в тупик,
+        поле создается заново и расстановка повторяется
+        :param player: int Номер игрока
+        :param placement: Стратегия расстановки
+        :return: None
+        """
+        for _ in range(self.PLACEMENT_ATTEMPTS):
+            try:
+                placement.place(self.__fields[player], self.__fleet, self.__rngs[player])
+            except IndexError:
+                self.__fields[player] = self.__field_class(self.__size, fleet=self.__fleet)
+                continue
+            self.__unplaced[player] = []
+            return
+        raise RuntimeError(f'Could not place fleet {self.__fleet} on a {self.__size}x{self.__size} field')
+
+    def fire(self, player, row, col):
+        """
+        Выполняет выстрел игрока по полю противника. Ход переходит к другому игроку даже после попадания
+        :param player: int Номер стреляющего игрока
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: ShotResult
+        """
+        if self.__winner is not None:
+            raise ValueError('The game is over')
+        if player != self.__turn:
+            raise ValueError(f'It is not player {player} turn')
+        if self.__unplaced[0] or self.__unplaced[1]:
+            raise ValueError('Both fleets must be placed before shooting')
+
+        target = self.__fields[1 - player]
+        hit = target.fire(row, col)
+        self.__shots[player] += 1
+        if hit and target.all_ships_sunk():
+            self.__winner = player
+        self.__turn = 1 - player
+        return ShotResult(player, row, col, hit, self.__winner is not None)
+
+    def snapshot(self):
+        """
+        Запоминает состояние партии. Поля не копируются, а ведут журнал изменений (см. Field.snapshot).
+        Генератор случайных чисел не запоминается
+        :return: tuple Метка для restore
+        """
+        return (tuple((field, field.snapshot()) for field in self.__fields),
+                tuple(tuple(unplaced) for unplaced in self.__unplaced),
+                self.__turn, self.__winner, tuple(self.__shots))
+
+    def restore(self, token):
+        """
+        Возвращает партию в состояние, запомненное snapshot
+        :param token: tuple Метка, которую вернул snapshot
+        :return: None
+        """
+        fields, unplaced, self.__turn, self.__winner, shots = token
+        for field, field_token in fields:
+            field.restore(field_token)
+        self.__fields = [field for field, _ in fields]
+        self.__unplaced = [list(ships) for ships in unplaced]
+        self.__shots = list(shots)
+
+    def play(self, players):
+        """
+        Проводит партию целиком: расставляет флоты и стреляет по очереди до победы одного из игроков
+        :param players: Пара объектов Player
+        :return: int Номер победителя
+        """
+        for player, strategy in enumerate(players):
+            if self.__unplaced[player]:
+                self.setup(player, strategy.placement)
+
+        # Очередность и флоты здесь уже проверены, поэтому выстрелы идут прямо в поля, минуя проверки fire
+        # и создание ShotResult: на партию 6x6 приходится около 45 выстрелов
+        fields, rngs, fleet, shots = self.__fields, self.__rngs, self.__fleet, self.__shots
+        choose = (players[0].shooting.choose, players[1].shooting.choose)
+        player = self.__turn
+        while self.__winner is None:
+            target = fields[1 - player]
+            row, col = choose[player](target, fleet, rngs[player])
+            shots[player] += 1
+            if target.fire(row, col) and target.all_ships_sunk():
+                self.__winner = player
+            player = 1 - player
+            self.__turn = player
+        return self.__winner
+
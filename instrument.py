@@ -0,0 +1,402 @@
+"""
+Замеры горячих методов игры: сколько раз вызван каждый метод и сколько длился каждый вызов.
+
+Instrumentation подменяет методы классов обертками, которые замеряют время вызова time.perf_counter_ns
+и добавляют его в гистограмму метода. Выключенные замеры возвращают классам исходные методы, поэтому
+без замеров игра не платит ничего, даже проверки флага.
+
+По умолчанию замеряются (см. hot_paths):
+- расстановка (placement): possible_ships_areas, create_ship_borders, check_ships_hit (его вызывает только
+  ручная расстановка HumansField) и place стратегий расстановки;
+- стрельба (firing): fire и all_ships_sunk полей, shot полей консольной игры и choose стратегий стрельбы
+  (ход игрока движка Engine);
+- отрисовка (rendering): show_fields и alive_decks_num (его вызывает только отрисовщик).
+
+Метод, который переопределен в наследнике и вызывает версию предка (например,
+BitboardField.possible_ships_areas), замеряется под обоими именами: вызов версии предка попадает в гистограмму
+предка. Повторный (рекурсивный) вызов того же метода того же класса отдельно не замеряется.
+
+Гистограммы выводятся в JSON (to_json) или в текстовом формате Prometheus (to_prometheus), отдельно
+по каждому методу и по каждой фазе. Длительность фазы замеряется по внешнему вызову: вызов замеряемого
+метода фазы внутри другого такого же (например, possible_ships_areas внутри place) входит в гистограмму
+своего метода, но не добавляется к фазе второй раз. Границы корзин - степени двойки наносекунд.
+
+Пример:
+    with Instrumentation() as instrumentation:
+        Engine.new(seed=1).play((random_player(), random_player()))
+    print(instrumentation.to_prometheus())
+
+Профилирование пакета партий целиком (cProfile) - python main.py tournament --profile PATH
+"""
+import cProfile
+import functools
+import json
+import pstats
+import time
+
+# Фазы игры
+PLACEMENT, FIRING, RENDERING = 'placement', 'firing', 'rendering'
+PHASES = (PLACEMENT, FIRING, RENDERING)
+
+# Корзины гистограмм: вызов длительностью ns попадает в корзину k, если 2 ** (k - 1) < ns <= 2 ** k.
+# Корзины до 2 ** FIRST_BUCKET нс (256 нс) и после 2 ** LAST_BUCKET нс (~1 с) при выводе объединяются
+FIRST_BUCKET, LAST_BUCKET = 8, 30
+
+# Названия метрик в формате Prometheus
+CALL_METRIC = 'sea_battle_call_duration_seconds'
+PHASE_METRIC = 'sea_battle_phase_duration_seconds'
+
+
+def hot_paths():
+    """
+    Методы, которые замеряются по умолчанию. Модули игры подключаются здесь, а не в начале файла,
+    чтобы main мог подключать этот модуль
+    :return: list Тройки (класс, название метода, фаза)
+    """
+    from bitboard import BitboardField
+    from compact import ArrayField
+    from lean import LeanField
+    from main import ConsoleField, Field, Game, HumansField, SkynetField
+    from placement import BacktrackingPlacement
+    from shared import SharedField
+    from strategies import DensityShooting, RandomPlacement, RandomShooting
+
+    targets = []
+    for field_class in (Field, BitboardField, ArrayField):
+        targets += [(field_class, 'possible_ships_areas', PLACEMENT), (field_class, 'create_ship_borders', PLACEMENT)]
+    targets += [(Field, 'check_ships_hit', PLACEMENT), (Field, 'fire', FIRING), (SharedField, 'fire', FIRING),
+                (LeanField, 'fire', FIRING), (Field, 'all_ships_sunk', FIRING), (LeanField, 'all_ships_sunk', FIRING),
+                (HumansField, 'shot', FIRING), (SkynetField, 'shot', FIRING),
+                (RandomShooting, 'choose', FIRING), (DensityShooting, 'choose', FIRING),
+                (RandomPlacement, 'place', PLACEMENT), (BacktrackingPlacement, 'place', PLACEMENT),
+                (ConsoleField, 'show_fields', RENDERING), (Game, 'show_fields', RENDERING),
+                (Field, 'alive_decks_num', RENDERING), (LeanField, 'alive_decks_num', RENDERING)]
+    return targets
+
+
+class Histogram:
+    """
+    Гистограмма длительностей вызовов по корзинам - степеням двойки наносекунд
+
+    Свойства
+    -----------
+    count : int
+        Количество вызовов
+
+    total : int
+        Суммарная длительность вызовов в наносекундах
+
+    buckets : list
+        Количество вызовов в каждой корзине: в корзине k - вызовы длительностью от 2 ** (k - 1) до 2 ** k нс
+
+    Методы
+    -----------
+    add(ns) : -> None
+        Добавляет вызов длительностью ns наносекунд
+
+    merge(other) : -> None
+        Добавляет все вызовы другой гистограммы
+
+    quantile(q) : -> float
+        Оценка сверху квантиля q в секундах (верхняя граница корзины)
+    """
+
+    def __init__(self):
+        self.__buckets = [0] * (LAST_BUCKET + 2)
+        self.__count = 0
+        self.__total = 0
+
+    @property
+    def count(self):
+        return self.__count
+
+    @property
+    def total(self):
+        return self.__total
+
+    @property
+    def buckets(self):
+        return list(self.__buckets)
+
+    def add(self, ns):
+        """
+        :param ns: int Длительность вызова в наносекундах
+        :return: None
+        """
+        self.__buckets[min((ns - 1).bit_length(), LAST_BUCKET + 1)] += 1
+        self.__count += 1
+        self.__total += ns
+
+    def merge(self, other):
+        """
+        :param other: Histogram
+        :return: None
+        """
+        for k, count in enumerate(other.buckets):
+            self.__buckets[k] += count
+        self.__count += other.count
+        self.__total += other.total
+
+    def cumulative(self):
+        """
+        :return: list Пары (граница корзины в секундах, вызовов не длиннее нее) от 2 ** FIRST_BUCKET
+        до 2 ** LAST_BUCKET нс и последняя пара (inf, все вызовы)
+        """
+        pairs = []
+        running = sum(self.__buckets[:FIRST_BUCKET])
+        for k in range(FIRST_BUCKET, LAST_BUCKET + 1):
+            running += self.__buckets[k]
+            pairs.append((2 ** k / 1e9, running))
+        pairs.append((float('inf'), self.__count))
+        return pairs
+
+    def quantile(self, q):
+        """
+        :param q: float Квантиль от 0 до 1
+        :return: float Верхняя граница корзины, в которую попадает квантиль, в секундах, или None без вызовов
+        """
+        if not self.__count:
+            return None
+        rank = q * self.__count
+        running = 0
+        for k, count in enumerate(self.__buckets):
+            running += count
+            if running >= rank:
+                return 2 ** k / 1e9
+        return None
+
+
+class Instrumentation:
+    """
+    Замеры горячих методов: подменяет методы классов обертками и собирает гистограммы их длительности
+
+    Свойства
+    -----------
+    enabled : bool
+        Подменены ли методы обертками
+
+    calls : dict
+        Гистограммы по методам: ключ - (фаза, 'Класс.метод'), значение - Histogram
+
+    Методы
+    -----------
+    enable() : -> None
+        Подменяет методы обертками
+
+    disable() : -> None
+        Возвращает классам исходные методы. Собранные гистограммы сохраняются
+
+    reset() : -> None
+        Очищает гистограммы
+
+    phases() : -> dict
+        Гистограммы по фазам: длительности внешних вызовов методов фазы
+
+    to_json() : -> str
+        Гистограммы по методам и по фазам в формате JSON
+
+    to_prometheus() : -> str
+        Гистограммы по методам и по фазам в текстовом формате Prometheus
+    """
+
+    def __init__(self, targets=None):
+        """
+        :param targets: Тройки (класс, название метода, фаза), по умолчанию hot_paths()
+        """
+        self.__targets = list(hot_paths() if targets is None else targets)
+        self.__calls = {(phase, f'{cls.__name__}.{name}'): Histogram() for cls, name, phase in self.__targets}
+        self.__phases = {}
+        for _, _, phase in self.__targets:
+            self.__phases.setdefault(phase, Histogram())
+        # Сколько вызовов методов каждой фазы сейчас выполняется под замером
+        self.__depths = dict.fromkeys(self.__phases, 0)
+        # Исходные атрибуты классов, которые подменены обертками: (класс, название, атрибут)
+        self.__originals = []
+        # Методы 'Класс.метод', которые сейчас выполняются под замером (рекурсивный вызов не замеряется еще раз)
+        self.__active = set()
+
+    @property
+    def enabled(self):
+        return bool(self.__originals)
+
+    @property
+    def calls(self):
+        return dict(self.__calls)
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disable()
+
+    def __timed(self, method, call, phase, histogram):
+        """
+        :param call: str Метод в виде 'Класс.метод'
+        :return: Обертка метода, которая замеряет вызов, если этот метод уже не замеряется выше по стеку,
+        и добавляет его к фазе, если выше по стеку нет замеряемых методов этой фазы
+        """
+        active, depths, clock = self.__active, self.__depths, time.perf_counter_ns
+        phase_histogram = self.__phases[phase]
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            if call in active:
+                return method(*args, **kwargs)
+            active.add(call)
+            outermost = not depths[phase]
+            depths[phase] += 1
+            started = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = clock() - started
+                histogram.add(elapsed)
+                if outermost:
+                    phase_histogram.add(elapsed)
+                depths[phase] -= 1
+                active.discard(call)
+        return timed
+
+    def enable(self):
+        """
+        Подменяет методы обертками. Замеряются только методы, определенные в самом классе
+        :return: None
+        """
+        if self.__originals:
+            return
+        for cls, name, phase in self.__targets:
+            original = cls.__dict__.get(name)
+            if original is None:
+                continue
+            call = f'{cls.__name__}.{name}'
+            histogram = self.__calls[(phase, call)]
+            if isinstance(original, staticmethod):
+                wrapper = staticmethod(self.__timed(original.__func__, call, phase, histogram))
+            else:
+                wrapper = self.__timed(original, call, phase, histogram)
+            setattr(cls, name, wrapper)
+            self.__originals.append((cls, name, original))
+
+    def disable(self):
+        """
+        Возвращает классам исходные методы
+        :return: None
+        """
+        for cls, name, original in reversed(self.__originals):
+            setattr(cls, name, original)
+        self.__originals = []
+        self.__active.clear()
+        for phase in self.__depths:
+            self.__depths[phase] = 0
+
+    def reset(self):
+        """
+        :return: None
+        """
+        for key in self.__calls:
+            self.__calls[key] = Histogram()
+        for phase in self.__phases:
+            self.__phases[phase] = Histogram()
+        if self.__originals:
+            # Обертки держат ссылки на прежние гистограммы, поэтому подменяем методы заново
+            self.disable()
+            self.enable()
+
+    def phases(self):
+        """
+        :return: dict Гистограммы по фазам в порядке PHASES: длительности вызовов методов фазы, выше которых
+        по стеку нет других замеряемых методов этой фазы
+        """
+        phases = {phase: Histogram() for phase in PHASES}
+        for phase, histogram in self.__phases.items():
+            phases.setdefault(phase, Histogram()).merge(histogram)
+        return phases
+
+    @staticmethod
+    def __summary(histogram):
+        """
+        :return: dict Количество вызовов, суммарная и средняя длительность, квантили и корзины гистограммы
+        """
+        return {
+            'count': histogram.count,
+            'total_seconds': histogram.total / 1e9,
+            'mean_seconds': histogram.total / histogram.count / 1e9 if histogram.count else None,
+            'p50_seconds': histogram.quantile(0.5),
+            'p99_seconds': histogram.quantile(0.99),
+            'buckets': [['+Inf' if le == float('inf') else le, count] for le, count in histogram.cumulative()],
+        }
+
+    def to_json(self):
+        """
+        :return: str Объект {"calls": [...], "phases": {...}}; корзины - пары [граница в секундах, вызовов
+        не длиннее нее], как у гистограмм Prometheus
+        """
+        calls = [dict(call=call, phase=phase, **self.__summary(histogram))
+                 for (phase, call), histogram in self.__calls.items() if histogram.count]
+        phases = {phase: self.__summary(histogram) for phase, histogram in self.phases().items()}
+        return json.dumps({'calls': calls, 'phases': phases}, indent=2)
+
+    def to_prometheus(self):
+        """
+        :return: str Гистограммы в текстовом формате Prometheus: CALL_METRIC с метками call и phase,
+        PHASE_METRIC с меткой phase
+        """
+        lines = [f'# HELP {CALL_METRIC} Duration of instrumented game method calls.',
+                 f'# TYPE {CALL_METRIC} histogram']
+        for (phase, call), histogram in self.__calls.items():
+            if histogram.count:
+                lines += self.__prometheus_series(CALL_METRIC, f'call="{call}",phase="{phase}"', histogram)
+        lines += [f'# HELP {PHASE_METRIC} Duration of outermost instrumented calls by game phase.',
+                  f'# TYPE {PHASE_METRIC} histogram']
+        for phase, histogram in self.phases().items():
+            lines += self.__prometheus_series(PHASE_METRIC, f'phase="{phase}"', histogram)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def __prometheus_series(metric, labels, histogram):
+        """
+        :return: list Строки корзин, суммы и количества одной гистограммы
+        """
+        lines = [f'{metric}_bucket{{{labels},le="{"+Inf" if le == float("inf") else repr(le)}"}} {count}'
+                 for le, count in histogram.cumulative()]
+        lines.append(f'{metric}_sum{{{labels}}} {histogram.total / 1e9!r}')
+        lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+        return lines
+
+    def write(self, path, fmt='json'):
+        """
+        Записывает гистограммы в файл
+        :param path: str Путь к файлу
+        :param fmt: str 'json' или 'prometheus'
+        :return: None
+        """
+        if fmt not in ('json', 'prometheus'):
+            raise ValueError(f'Unknown metrics format {fmt!r}')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.to_json() if fmt == 'json' else self.to_prometheus())
+
+
+def write_profile(profile, path, sort='cumulative', limit=50):
+    """
+    Записывает отчет cProfile, отсортированный по sort
+    :param profile: cProfile.Profile Профиль после выполнения
+    :param path: str Путь к файлу отчета
+    :param sort: str Ключ сортировки pstats ('cumulative', 'tottime', 'calls', ...)
+    :param limit: int Сколько функций выводить
+    :return: None
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        pstats.Stats(profile, stream=file).sort_stats(sort).print_stats(limit)
+
+
+def profiled(func, path, sort='cumulative', limit=50):
+    """
+    Выполняет func() под cProfile и записывает отчет в path (см. write_profile)
+    :return: Результат func()
+    """
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func)
+    finally:
+        write_profile(profile, path, sort, limit)
@@ -0,0 +1,330 @@
+"""
+Игровое поле для массового моделирования партий на небольших полях.
+
+В партии "стратегия против стратегии" (Engine.play) на поле не смотрят ни подписчики, ни журнал снимков,
+ни объекты Ship, но Field.place_ship и Field.fire все равно создают корабли и клетки-представления, ведут
+индекс палуб и сообщают status_changed о каждой клетке приватного слоя. LeanField хранит статусы в массивах
+байтов, как ArrayField, а корабли - номерами в клетках и счетчиками живых палуб, и ставит корабли по заранее
+построенной таблице зон (window_table): проверка зоны и отметка границ - операции над масками, а свободные
+зоны отбираются из таблицы по маске свободных клеток без перебора клеток на Python. Выстрел записывает
+публичный статус в массив и сообщает о нем Field.status_changed, поэтому индексы зон, карты плотности и хеши
+публичного слоя обновляются так же, как у остальных полей, и стратегии работают с LeanField без изменений.
+
+Это быстрый режим поля. Первое обращение к тому, что требует объектов Ship или слежения за приватным слоем
+(ships, ship_at, snapshot, add_listener, set_status и т.д.), переводит поле в обычный режим (materialize):
+приватный слой стирается, и все корабли ставятся заново методом Field.place_ship. Публичный слой
+не меняется, и Field сам считает уже подбитые палубы. Дальше поле работает как ArrayField, поэтому правила
+игры одни и те же, а партия Engine с LeanField совпадает с партией с ArrayField при том же зерне.
+
+Таблицы зон строятся для каждого размера поля и корабля, поэтому поле рассчитано на небольшие размеры.
+
+Пример:
+    engine = Engine.new(6, (3, 2, 2, 1, 1, 1), seed=1, field_class=LeanField)
+    winner = engine.play((random_player(), random_player()))
+"""
+from array import array
+from collections import namedtuple
+from itertools import compress
+from operator import itemgetter
+
+from compact import ArrayField
+from main import neighbourhood_table, repeat_bits, run_starts
+
+# Зоны корабля на поле заданного размера: full - маска всех клеток поля (бит (row - 1) * size + (col - 1)),
+# lines - строки WindowLine для горизонтальных и (у многопалубных кораблей) вертикальных зон, placements - по тройке
+# (строка, колонка, ориентация) любой ориентации: (маска клеток корабля, номера клеток корабля, номера клеток
+# прямоугольника корабля с соседями по строкам, маска этого прямоугольника)
+WindowTable = namedtuple('WindowTable', ['full', 'lines', 'placements'])
+
+# Зоны одной ориентации: starts - маска клеток, в которых может начинаться зона, step - шаг между клетками зоны,
+# order - перестановка клеток в порядок Field.free_windows (None - порядок клеток уже тот), packed и keys - зона,
+# начинающаяся в каждой клетке, в этом порядке: тройка, упакованная в байты array('I'), и ключ WindowIndex
+WindowLine = namedtuple('WindowLine', ['starts', 'step', 'order', 'packed', 'keys'])
+
+# Таблицы зон по размерам полей и кораблей, см. window_table
+_WINDOW_TABLES = {}
+
+# Перекодировка цифр двоичной записи числа в байты 0 и 1 для itertools.compress
+_BITS = bytes.maketrans(b'01', b'\0\1')
+
+
+def window_line(size, orientation, starts, step, order):
+    """
+    :param size: int Размер поля
+    :param orientation: int 0 - горизонтальные зоны, 1 - вертикальные
+    :param starts: int Маска клеток, в которых может начинаться зона
+    :param step: int Шаг между клетками зоны
+    :param order: Последовательность номеров клеток в порядке Field.free_windows
+    :return: WindowLine
+    """
+    packed = [array('I', (pos // size + 1, pos % size + 1, orientation)).tobytes() for pos in order]
+    keys = [pos * 2 + orientation for pos in order]
+    getter = None if isinstance(order, range) else itemgetter(*order)
+    return WindowLine(starts, step, getter, packed, keys)
+
+
+def window_table(size, decks_num):
+    """
+    Возвращает таблицу зон корабля. Строится один раз для каждого размера поля и корабля
+    :param size: int Размер поля
+    :param decks_num: int Количество палуб
+    :return: WindowTable
+    """
+    table = _WINDOW_TABLES.get((size, decks_num))
+    if table is not None:
+        return table
+
+    neighbours = neighbourhood_table(size)
+    placements = {}
+    for orientation in (0, 1):
+        for row in range(size - (decks_num - 1) * orientation):
+            for col in range(size - (decks_num - 1) * (1 - orientation)):
+                last_row, last_col = row + (decks_num - 1) * orientation, col + (decks_num - 1) * (1 - orientation)
+                decks = tuple(range(row * size + col, last_row * size + last_col + 1, size if orientation else 1))
+                area = tuple(x * size + y for x in range(neighbours[row][0], neighbours[last_row][1])
+                             for y in range(neighbours[col][0], neighbours[last_col][1]))
+                placements[(row + 1, col + 1, orientation)] = (sum(1 << pos for pos in decks), decks, area,
+                                                                sum(1 << pos for pos in area))
+
+    # Как и у Field.free_windows: горизонтальная зона начинается в первых size - decks_num + 1 колонках,
+    # и зоны идут по строкам, вертикальная (только у многопалубного корабля) - в первых size - decks_num + 1
+    # строках, и зоны идут по колонкам
+    lines = []
+    if decks_num <= size:
+        lines.append(window_line(size, 0, repeat_bits((1 << (size - decks_num + 1)) - 1, size, size), 1,
+                                 range(size * size)))
+        if decks_num > 1:
+            columns = [row * size + col for col in range(size) for row in range(size)]
+            lines.append(window_line(size, 1, (1 << (size * (size - decks_num + 1))) - 1, size, columns))
+    table = WindowTable((1 << (size * size)) - 1, lines, placements)
+    _WINDOW_TABLES[(size, decks_num)] = table
+    return table
+
+
+class LeanField(ArrayField):
+    """
+    Игровое поле ArrayField с быстрым режимом для массового моделирования партий
+
+    Свойства
+    -----------
+    Все свойства такие же, как и у родительского класса ArrayField, и дополнительно:
+
+    lean : bool
+        True - поле в быстром режиме, False - в обычном
+
+    Методы
+    -----------
+    materialize() : -> None
+        Переводит поле в обычный режим: создает объекты Ship для всех поставленных кораблей
+
+    free_windows и free_window_keys в обоих режимах отбирают зоны из таблицы зон. В быстром режиме place_ship,
+    fire, all_ships_sunk и alive_decks_num работают по таблице зон и счетчикам поля, а place_ship не создает
+    объект Ship и возвращает None. Методы ships, ship_at, check_ships_hit, add_ship, set_status, create_ship_borders,
+    delete_ship_borders, snapshot, add_listener, add_event_listener, а также window_index и zobrist приватного слоя
+    сначала вызывают materialize
+    """
+
+    def __init__(self, size: int, ships_list=None, fleet=None):
+        super().__init__(size, ships_list, fleet)
+        # С готовыми кораблями поле сразу работает в обычном режиме
+        self.__lean = not ships_list
+        # Быстрый режим: номер корабля (с 1) в каждой клетке, живые палубы каждого корабля, клетки прямоугольника
+        # каждого корабля с соседями, маска занятых клеток приватного слоя и общий счетчик живых палуб
+        self.__ship_numbers = [0] * (size * size)
+        self.__afloat = []
+        self.__areas = []
+        self.__blocked = 0
+        self.__alive = 0
+        # Поставленные корабли по порядку: по ним materialize ставит корабли заново
+        self.__placed = []
+
+    def _allocate_layers(self, cells):
+        """
+        Выделяет массивы статусов так же, как ArrayField, и запоминает их для быстрого режима
+        :param cells: int Количество клеток поля
+        :return: tuple (приватный массив, публичный массив)
+        """
+        self.__layers = super()._allocate_layers(cells)
+        return self.__layers
+
+    @property
+    def lean(self):
+        return self.__lean
+
+    def materialize(self):
+        """
+        Переводит поле в обычный режим: стирает приватный слой и ставит все корабли заново методом
+        Field.place_ship. Публичный слой остается прежним, поэтому уже подбитые палубы считаются подбитыми.
+        За приватным слоем в быстром режиме никто не следит, поэтому его можно стереть без уведомлений
+        :return: None
+        """
+        if not self.__lean:
+            return
+        self.__lean = False
+        private = self.__layers[False]
+        private[:] = b' ' * len(private)
+        for row, col, orientation, decks_num in self.__placed:
+            super().place_ship(row, col, orientation, decks_num)
+        self.__ship_numbers = self.__afloat = self.__areas = self.__placed = None
+
+    def place_ship(self, row, col, orientation, decks_num):
+        """
+        То же, что Field.place_ship. В быстром режиме зона проверяется по маске занятых клеток, а объект Ship
+        не создается
+        :return: Созданный объект Ship или None в быстром режиме
+        """
+        if not self.__lean:
+            return super().place_ship(row, col, orientation, decks_num)
+        placement = window_table(self.size, decks_num).placements.get((row, col, orientation))
+        if placement is None or placement[0] & self.__blocked:
+            raise ValueError(f'Cannot place a {decks_num}-deck ship at ({row}, {col}), orientation {orientation}')
+
+        _, decks, area, area_mask = placement
+        private, public, numbers = self.__layers[False], self.__layers[True], self.__ship_numbers
+        number = len(self.__afloat) + 1
+        for pos in decks:
+            private[pos] = 42  # '*'
+            numbers[pos] = number
+        for pos in area:
+            if private[pos] == 32:  # ' '
+                private[pos] = 45  # '-'
+        # Палубы, в которые уже стреляли, живыми не считаются, как и у Field
+        alive = sum(1 for pos in decks if public[pos] == 32)
+        self.__afloat.append(alive)
+        self.__areas.append(area)
+        self.__alive += alive
+        self.__blocked |= area_mask
+        self.__placed.append((row, col, orientation, decks_num))
+
+    def fire(self, row, col):
+        """
+        То же, что Field.fire. В быстром режиме попадание определяется по номеру корабля в клетке, а события
+        выстрела не создаются: подписаться на них можно только в обычном режиме
+        """
+        if not self.__lean:
+            return super().fire(row, col)
+        size = self.size
+        if not (1 <= row <= size and 1 <= col <= size):
+            raise ValueError(f'Cell ({row}, {col}) is outside of the field')
+        pos = (row - 1) * size + (col - 1)
+        public = self.__layers[True]
+        if public[pos] != 32:  # ' '
+            raise ValueError(f'Cell ({row}, {col}) has already been shot')
+
+        number = self.__ship_numbers[pos]
+        if not number:
+            public[pos] = 84  # 'T'
+            self.status_changed(row, col, ' ', 'T', True)
+            return False
+
+        public[pos] = 88  # 'X'
+        self.status_changed(row, col, ' ', 'X', True)
+        self.__alive -= 1
+        afloat = self.__afloat
+        afloat[number - 1] -= 1
+        if not afloat[number - 1]:
+            # Корабль потоплен: как и Field.fire, закрываем свободные клетки вокруг него по строкам
+            for pos in self.__areas[number - 1]:
+                if public[pos] == 32:
+                    public[pos] = 45  # '-'
+                    self.status_changed(pos // size + 1, pos % size + 1, ' ', '-', True)
+        return True
+
+    def __selections(self, decks_num, public):
+        """
+        Отбирает свободные зоны из таблицы зон: начала зон находятся сдвигами маски свободных клеток,
+        как у Field.free_windows, а вместо перебора битов двоичная запись маски (с лишним старшим битом,
+        чтобы ее длина была ровно по числу клеток) становится байтами 0 и 1 для itertools.compress
+        :param decks_num: int Количество палуб
+        :param public: bool True - по публичным статусам, False - по приватным
+        :return: Генератор пар (WindowLine, байты 0 и 1 по клеткам в порядке free_windows)
+        """
+        table = window_table(self.size, decks_num)
+        if self.__lean and not public:
+            free = table.full & ~self.__blocked
+        else:
+            free = self.free_mask(public)
+        for line in table.lines:
+            selected = bin(run_starts(free, decks_num, line.step) & line.starts | table.full + 1)[:2:-1].encode()
+            selected = selected.translate(_BITS)
+            yield line, line.order(selected) if line.order else selected
+
+    def free_windows(self, decks_num, public=False):
+        """
+        То же, что Field.free_windows, но зоны отбираются из таблицы зон. В быстром режиме маска свободных
+        клеток приватного слоя не строится по массиву, а уже есть
+        """
+        windows = array('I')
+        for line, selected in self.__selections(decks_num, public):
+            windows.frombytes(b''.join(compress(line.packed, selected)))
+        return windows
+
+    def free_window_keys(self, decks_num, public=False):
+        """
+        То же, что Field.free_window_keys, но ключи берутся из таблицы зон
+        """
+        keys = []
+        for line, selected in self.__selections(decks_num, public):
+            keys += compress(line.keys, selected)
+        return keys
+
+    def all_ships_sunk(self):
+        if not self.__lean:
+            return super().all_ships_sunk()
+        return self.__alive == 0
+
+    def alive_decks_num(self):
+        if not self.__lean:
+            return super().alive_decks_num()
+        return self.__alive
+
+    @property
+    def ships(self):
+        self.materialize()
+        return super().ships
+
+    def ship_at(self, row, col):
+        self.materialize()
+        return super().ship_at(row, col)
+
+    def check_ships_hit(self, row, col):
+        self.materialize()
+        return super().check_ships_hit(row, col)
+
+    def add_ship(self, ship):
+        self.materialize()
+        super().add_ship(ship)
+
+    def set_status(self, row, col, status, public=False):
+        self.materialize()
+        super().set_status(row, col, status, public)
+
+    def create_ship_borders(self, ship):
+        self.materialize()
+        super().create_ship_borders(ship)
+
+    def delete_ship_borders(self):
+        self.materialize()
+        super().delete_ship_borders()
+
+    def snapshot(self):
+        self.materialize()
+        return super().snapshot()
+
+    def add_listener(self, listener):
+        self.materialize()
+        super().add_listener(listener)
+
+    def add_event_listener(self, listener):
+        self.materialize()
+        super().add_event_listener(listener)
+
+    def window_index(self, decks_num, public=False):
+        if not public:
+            self.materialize()
+        return super().window_index(decks_num, public)
+
+    def zobrist(self, public=False, symmetric=False):
+        if not public:
+            self.materialize()
+        return super().zobrist(public, symmetric)
@@ -1,4 +1,147 @@
+import hashlib
 import random
+from array import array
+from collections import namedtuple
+from operator import attrgetter
+
+from render import BoardRenderer
+
+# События выстрела, которые поле сообщает подписчикам Field.add_event_listener: попадание, промах,
+# потопленный корабль (ship - объект Ship, border - клетки вокруг него, отмеченные '-' на публичном слое)
+# и потопление всего флота
+Hit = namedtuple('Hit', ['row', 'col'])
+Miss = namedtuple('Miss', ['row', 'col'])
+Sunk = namedtuple('Sunk', ['ship', 'border'])
+GameOver = namedtuple('GameOver', [])
+
+
+def popcount(mask):
+    """
+    Считает количество установленных битов в маске (int.bit_count появился только в Python 3.10)
+    :param mask: int Битовая маска
+    :return: int Количество единичных битов
+    """
+    return bin(mask).count('1')
+
+
+def repeat_bits(pattern, step, count):
+    """
+    Повторяет битовый шаблон count раз с шагом step бит. Удвоением получается за O(log count) сдвигов
+    :param pattern: int Исходный шаблон
+    :param step: int Шаг между повторениями в битах
+    :param count: int Количество повторений
+    :return: int Маска с повторенным шаблоном
+    """
+    result = 0
+    filled = 0  # сколько повторений уже записано в result
+    chunk, chunk_count = pattern, 1
+    while count:
+        if count & 1:
+            result |= chunk << (filled * step)
+            filled += chunk_count
+        chunk |= chunk << (chunk_count * step)
+        chunk_count *= 2
+        count >>= 1
+    return result
+
+
+def iter_bits(mask):
+    """
+    Перебирает номера установленных битов маски по возрастанию. Работает за линейное время от длины маски,
+    поэтому годится и для масок в миллионы бит
+    :param mask: int Битовая маска
+    :return: Генератор номеров битов
+    """
+    bits = bin(mask)[:1:-1]
+    pos = bits.find('1')
+    while pos != -1:
+        yield pos
+        pos = bits.find('1', pos + 1)
+
+
+def run_starts(mask, length, step=1):
+    """
+    Находит начала всех непрерывных серий установленных битов заданной длины. Серия состоит из битов
+    p, p + step, ..., p + (length - 1) * step, т.е. step=1 ищет серии в строке, step=size - в колонке.
+    Серии длины length получаются удвоением за O(log length) операций над всей маской сразу
+    :param mask: int Битовая маска
+    :param length: int Длина серии
+    :param step: int Расстояние между соседними битами серии
+    :return: int Маска, в которой установлен бит p для каждой найденной серии
+    """
+    result, span = mask, 1
+    while span * 2 <= length:
+        result &= result >> (span * step)
+        span *= 2
+    if span < length:
+        result &= result >> ((length - span) * step)
+    return result
+
+
+def validate_config(size, fleet):
+    """
+    Проверяет размер поля и состав флота до начала игры
+    :param size: int Размер поля (количество строк и колонок)
+    :param fleet: Последовательность размеров кораблей
+    :return: tuple Состав флота. Если конфигурация недопустима - ValueError
+    """
+    if isinstance(size, bool) or not isinstance(size, int) or size < 1:
+        raise ValueError(f'Field size must be a positive integer, got {size!r}')
+    fleet = tuple(fleet)
+    if not fleet:
+        raise ValueError('Fleet must contain at least one ship')
+    for decks_num in fleet:
+        if isinstance(decks_num, bool) or not isinstance(decks_num, int) or decks_num < 1:
+            raise ValueError(f'Ship size must be a positive integer, got {decks_num!r}')
+        if decks_num > size:
+            raise ValueError(f'A {decks_num}-deck ship does not fit a {size}x{size} field')
+    # Корабль вместе с границей справа и снизу занимает прямоугольник 2 x (decks_num + 1) на поле,
+    # расширенном на одну строку и колонку, и у разных кораблей эти прямоугольники не пересекаются
+    if sum(2 * (decks_num + 1) for decks_num in fleet) > (size + 1) ** 2:
+        raise ValueError(f'Fleet {fleet} is too large for a {size}x{size} field')
+    return fleet
+
+
+def derive_seed(*parts):
+    """
+    Детерминированно получает 64-битное зерно из произвольного набора значений (например, главного зерна
+    турнира, названий стратегий и номера партии). В отличие от hash() не зависит от PYTHONHASHSEED,
+    поэтому одинаково в любом процессе
+    :param parts: Значения, из которых получается зерно
+    :return: int Зерно
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def player_rng(seed, player):
+    """
+    Собственный генератор случайных чисел игрока партии. Генераторы игроков независимы друг от друга
+    и от модуля random, поэтому партию с тем же зерном можно переиграть в точности в любом процессе
+    :param seed: int Зерно партии или None - генератор со случайным зерном
+    :param player: int Номер игрока
+    :return: random.Random
+    """
+    return random.Random() if seed is None else random.Random(derive_seed(seed, 'player', player))
+
+
+# Таблицы окрестностей по размерам полей, см. neighbourhood_table
+_NEIGHBOURHOOD_TABLES = {}
+
+
+def neighbourhood_table(size):
+    """
+    Возвращает таблицу окрестностей для поля заданного размера: для каждого номера строки (колонки) i от 0
+    до size - 1 пару (первый, следующий за последним) номеров соседних строк, уже обрезанных границами поля.
+    Строится один раз для каждого размера, поэтому границы кораблей отмечаются без проверок выхода за поле
+    :param size: int Размер поля
+    :return: list Пары (начало, конец) для срезов списков
+    """
+    table = _NEIGHBOURHOOD_TABLES.get(size)
+    if table is None:
+        table = [(max(0, i - 1), min(size, i + 2)) for i in range(size)]
+        _NEIGHBOURHOOD_TABLES[size] = table
+    return table
 
 
 class Cell:
@@ -24,6 +167,10 @@ class Cell:
     status_public : str
         Указывает состояние клетки, которое видит противник (только результаты ходов - попадания и промахи)
 
+    field : Field
+        Игровое поле, которому принадлежит клетка. Поле получает уведомление при каждом изменении статуса,
+        чтобы поддерживать свои индексы в актуальном состоянии. У отдельно созданной клетки - None
+
     Методы
     -----------
     status() -> str
@@ -35,12 +182,18 @@ class Cell:
     hit(row, col) -> Bool
         Принимает координаты (номер строки и номер колонки) и возвращает True, если они совпадают с координатами
         клетки, иначе False
+
+    Атрибуты хранятся в слотах (__slots__), без словаря у каждого объекта: на поле 1000x1000 это миллион клеток,
+    и слоты уменьшают и память, и время доступа к атрибутам
     """
 
-    def __init__(self, row=0, col=0, status=' ', status_public=' '):
+    __slots__ = ('__row', '__col', '__status', '__status_public', '__field')
+
+    def __init__(self, row=0, col=0, status=' ', status_public=' ', field=None):
         self.__set_cords(row, col)
         self.__set_status(status)
         self.__set_status_public(status_public)
+        self.__field = field
 
     def __set_cords(self, row: int, col: int):
         """
@@ -81,12 +234,9 @@ class Cell:
         else:
             return False
 
-    @property
-    def status(self):
-        """
-        :return: str Статус клетки
-        """
-        return self.__status
+    # Чтение статусов и координат - самая частая операция при просмотре поля, поэтому их геттеры - attrgetter:
+    # он читает слот без вызова функции на Python
+    status = property(attrgetter('_Cell__status'), doc='str Статус клетки')
 
     @status.setter
     def status(self, status):
@@ -95,14 +245,12 @@ class Cell:
         :param status: str Статус, который нужно установить
         :return: None
         """
+        old_status = self.__status
         self.__set_status(status)
+        if self.__field is not None and old_status != status:
+            self.__field.status_changed(self.__row, self.__col, old_status, status)
 
-    @property
-    def status_public(self):
-        """
-        :return: str Публичный статус клетки
-        """
-        return self.__status_public
+    status_public = property(attrgetter('_Cell__status_public'), doc='str Публичный статус клетки')
 
     @status_public.setter
     def status_public(self, status_public):
@@ -111,16 +259,56 @@ class Cell:
         :param status_public: str Статус, который нужно установить
         :return: None
         """
-        self.__status_public = status_public
+        old_status = self.__status_public
+        self.__set_status_public(status_public)
+        if self.__field is not None and old_status != status_public:
+            self.__field.status_changed(self.__row, self.__col, old_status, status_public, True)
+
+    row = property(attrgetter('_Cell__row'))
+
+    col = property(attrgetter('_Cell__col'))
+
+    @property
+    def field(self):
+        return self.__field
+
+
+class CellView(Cell):
+    """
+    Клетка-представление для полей, которые хранят статусы клеток сами (например, в битовых слоях или массивах)
+
+    Собственного состояния не хранит: чтение и запись status и status_public перенаправляются в поле,
+    которому принадлежит клетка, через Field.get_status и Field.set_status. Координаты и метод hit()
+    наследуются от Cell без изменений
+    """
+
+    __slots__ = ()
+
+    def __init__(self, field, row, col):
+        super().__init__(row, col, field=field)
 
     @property
-    def row(self):
-        return self.__row
+    def status(self):
+        """
+        :return: str Статус клетки, прочитанный из поля
+        """
+        return self.field.get_status(self.row, self.col)
 
+    @status.setter
+    def status(self, status):
+        self.field.set_status(self.row, self.col, status)
 
     @property
-    def col(self):
-        return self.__col
+    def status_public(self):
+        """
+        :return: str Публичный статус клетки, прочитанный из поля
+        """
+        return self.field.get_status(self.row, self.col, True)
+
+    @status_public.setter
+    def status_public(self, status_public):
+        self.field.set_status(self.row, self.col, status_public, True)
+
 
 class Ship:
     """
@@ -131,6 +319,15 @@ class Ship:
     decks : []
         Список объектов Cell, т.е. список ячеек, которые занимает корабль (список палуб)
 
+    field : Field
+        Игровое поле, на котором стоит корабль. Устанавливается методом Field.add_ship
+
+    alive_decks : int
+        Количество палуб, в которые еще не стреляли. Поддерживается полем при каждом выстреле
+
+    sunk : bool
+        Потоплен ли корабль (подбиты все его палубы)
+
     Методы
     -----------
     add_deck(deck) : -> None
@@ -138,18 +335,38 @@ class Ship:
 
     decks() : -> list
         Возвращает список палуб корабля (объектов Cell)
+
+    change_alive_decks(delta) : -> None
+        Изменяет счетчик живых палуб. Вызывается полем при изменении публичного статуса палубы
     """
 
+    __slots__ = ('__field', '__decks', '__alive_decks')
+
     def __init__(self, decks=None):
+        self.__field = None
         self.__set_decks(decks)
+        self.__alive_decks = sum(1 for deck in self.__decks if deck.status_public == ' ')
 
     def add_deck(self, deck):
         """
-        Добавляет ячейку (объект Cell) в список палуб корабля (decks)
+        Добавляет ячейку (объект Cell) в список палуб корабля (decks). Если корабль уже стоит на поле,
+        поле обновляет свой индекс палуб
         :param deck: Объект Cell
         :return: None
         """
         self.__decks.append(deck)
+        if deck.status_public == ' ':
+            self.__alive_decks += 1
+        if self.__field is not None:
+            self.__field.deck_added(self, len(self.__decks) - 1)
+
+    def change_alive_decks(self, delta):
+        """
+        Изменяет счетчик живых палуб корабля
+        :param delta: int -1 при попадании в палубу, +1 если статус палубы вернули в ' '
+        :return: None
+        """
+        self.__alive_decks += delta
 
     def __set_decks(self, decks):
         """
@@ -166,6 +383,350 @@ class Ship:
     def decks(self):
         return self.__decks
 
+    @property
+    def alive_decks(self):
+        return self.__alive_decks
+
+    @property
+    def sunk(self):
+        return self.__alive_decks == 0 and bool(self.__decks)
+
+    @property
+    def field(self):
+        return self.__field
+
+    @field.setter
+    def field(self, field):
+        self.__field = field
+
+
+class IndexedSet:
+    """
+    Множество, поддерживающее добавление, удаление и выбор случайного элемента за O(1).
+    Элементы хранятся в списке, а словарь хранит позицию каждого элемента в списке. При удалении
+    на место удаляемого элемента переносится последний элемент списка
+
+    Методы
+    -----------
+    add(item) : -> None
+        Добавляет элемент в множество
+
+    discard(item) : -> None
+        Удаляет элемент из множества, если он там есть
+
+    choice(rng) : -> object
+        Возвращает случайный элемент множества. Если множество пустое - выбрасывает IndexError
+    """
+
+    def __init__(self, items=()):
+        # Повторы отбрасываются так же, как в add: остается первое вхождение
+        self.__items = list(dict.fromkeys(items))
+        self.__positions = dict(zip(self.__items, range(len(self.__items))))
+
+    def add(self, item):
+        """
+        Добавляет элемент в множество
+        :param item: Хешируемый объект
+        :return: None
+        """
+        if item not in self.__positions:
+            self.__positions[item] = len(self.__items)
+            self.__items.append(item)
+
+    def discard(self, item):
+        """
+        Удаляет элемент из множества, если он там есть
+        :param item: Хешируемый объект
+        :return: None
+        """
+        position = self.__positions.pop(item, None)
+        if position is None:
+            return
+        last = self.__items.pop()
+        if position < len(self.__items):
+            self.__items[position] = last
+            self.__positions[last] = position
+
+    def choice(self, rng=None):
+        """
+        Возвращает случайный элемент множества
+        :param rng: random.Random Генератор случайных чисел. Если не указан - используется модуль random
+        :return: Случайный элемент
+        """
+        if not self.__items:
+            raise IndexError('Cannot choose from an empty set')
+        return (rng or random).choice(self.__items)
+
+    def __contains__(self, item):
+        return item in self.__positions
+
+    def __len__(self):
+        return len(self.__items)
+
+    def __iter__(self):
+        return iter(self.__items)
+
+
+class WindowIndex:
+    """
+    Индекс свободных зон игрового поля для корабля заданного размера.
+
+    Строится один раз через Field.free_window_keys, а дальше обновляется инкрементально: когда клетка становится
+    занятой, из индекса удаляются только зоны, которые ее накрывают (не больше 2 * decks_num зон), а когда
+    освобождается - проверяются только эти же зоны. Зона хранится одним числом-ключом:
+    ((row - 1) * size + (col - 1)) * 2 + ориентация
+
+    Свойства
+    -----------
+    decks_num : int
+        Размер корабля (длина зоны)
+
+    public : bool
+        True - индекс строится по публичным статусам клеток (цели для выстрелов), False - по приватным
+        (зоны для расстановки кораблей)
+
+    Методы
+    -----------
+    choice(rng) : -> tuple
+        Возвращает случайную свободную зону в виде тройки (строка, колонка, ориентация)
+
+    windows() : -> array
+        Возвращает все свободные зоны в том же формате и порядке, что и Field.free_windows
+
+    cell_taken(row, col) : -> None
+        Удаляет из индекса зоны, которые накрывают ставшую занятой клетку
+
+    cell_freed(row, col) : -> None
+        Добавляет в индекс зоны, которые накрывают освободившуюся клетку и теперь свободны целиком
+    """
+
+    def __init__(self, field, decks_num, public=False):
+        self.__field = field
+        self.__decks_num = decks_num
+        self.__public = public
+        self.__size = field.size
+        self.__keys = IndexedSet(field.free_window_keys(decks_num, public))
+
+    @property
+    def decks_num(self):
+        return self.__decks_num
+
+    @property
+    def public(self):
+        return self.__public
+
+    def __key(self, row, col, orientation):
+        return ((row - 1) * self.__size + (col - 1)) * 2 + orientation
+
+    def __window(self, key):
+        pos, orientation = divmod(key, 2)
+        row, col = divmod(pos, self.__size)
+        return row + 1, col + 1, orientation
+
+    def __covering(self, row, col):
+        """
+        Перечисляет все зоны, помещающиеся в поле, которые накрывают клетку
+        :return: Генератор троек (строка, колонка, ориентация)
+        """
+        decks_num, size = self.__decks_num, self.__size
+        for start in range(max(1, col - decks_num + 1), min(col, size - decks_num + 1) + 1):
+            yield row, start, 0
+        if decks_num > 1:
+            for start in range(max(1, row - decks_num + 1), min(row, size - decks_num + 1) + 1):
+                yield start, col, 1
+
+    def cell_taken(self, row, col):
+        """
+        Удаляет из индекса зоны, которые накрывают ставшую занятой клетку
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: None
+        """
+        # Ключи зон считаются прямо здесь, без __covering и __key: метод вызывается на каждое изменение статуса
+        decks_num, size, discard = self.__decks_num, self.__size, self.__keys.discard
+        if decks_num == 1:
+            # Однопалубную зону клетка накрывает только одну - горизонтальную, начинающуюся в ней самой
+            discard(((row - 1) * size + col - 1) * 2)
+            return
+        row_key = (row - 1) * size * 2
+        for start in range(max(1, col - decks_num + 1), min(col, size - decks_num + 1) + 1):
+            discard(row_key + (start - 1) * 2)
+        if decks_num > 1:
+            col_key = (col - 1) * 2 + 1
+            for start in range(max(1, row - decks_num + 1), min(row, size - decks_num + 1) + 1):
+                discard((start - 1) * size * 2 + col_key)
+
+    def cell_freed(self, row, col):
+        """
+        Добавляет в индекс зоны, которые накрывают освободившуюся клетку, если все их клетки свободны
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: None
+        """
+        get_status, public = self.__field.get_status, self.__public
+        for start_row, start_col, orientation in self.__covering(row, col):
+            for j in range(self.__decks_num):
+                if orientation:
+                    free = get_status(start_row + j, start_col, public) == ' '
+                else:
+                    free = get_status(start_row, start_col + j, public) == ' '
+                if not free:
+                    break
+            else:
+                self.__keys.add(self.__key(start_row, start_col, orientation))
+
+    def choice(self, rng=None):
+        """
+        Возвращает случайную свободную зону
+        :param rng: random.Random Генератор случайных чисел. Если не указан - используется модуль random
+        :return: tuple (строка, колонка, ориентация). Если свободных зон нет - выбрасывает IndexError
+        """
+        return self.__window(self.__keys.choice(rng))
+
+    def windows(self):
+        """
+        :return: array Все свободные зоны плоским массивом троек в порядке Field.free_windows:
+        сначала горизонтальные по строкам, затем вертикальные по колонкам
+        """
+        size = self.__size
+
+        def order(key):
+            pos, orientation = divmod(key, 2)
+            return (1, pos % size, pos) if orientation else (0, 0, pos)
+
+        windows = array('I')
+        for key in sorted(self.__keys, key=order):
+            windows.extend(self.__window(key))
+        return windows
+
+    def __contains__(self, window):
+        row, col, orientation = window
+        return self.__key(row, col, orientation) in self.__keys
+
+    def __len__(self):
+        return len(self.__keys)
+
+
+class HeatMap:
+    """
+    Карта плотности вероятности для выбора выстрела.
+
+    Для каждой клетки хранит, сколько возможных положений кораблей флота накрывают ее: положение - это зона
+    из клеток, в которые еще не стреляли (публичный статус ' '), корабль из нескольких одинаковых кораблей
+    учитывается с кратностью. Карта строится один раз, а дальше обновляется инкрементально: выстрел в клетку
+    убирает вклад только тех зон, которые накрывали эту клетку
+
+    Свойства
+    -----------
+    lengths : tuple
+        Размеры кораблей флота, для которого считается карта
+
+    Методы
+    -----------
+    heat(row, col) : -> int
+        Возвращает количество положений кораблей, накрывающих клетку
+
+    best(blocked) : -> tuple
+        Возвращает клетку с наибольшей плотностью, пропуская клетки из blocked
+
+    cell_taken(row, col) : -> None
+        Убирает вклад зон, накрывавших клетку, в которую выстрелили
+
+    cell_freed(row, col) : -> None
+        Возвращает вклад зон, накрывающих клетку, статус которой снова стал ' '
+    """
+
+    def __init__(self, field, lengths):
+        self.__field = field
+        self.__size = field.size
+        self.__lengths = tuple(sorted(lengths))
+        # Кратность каждого размера корабля
+        self.__weights = {}
+        for decks_num in self.__lengths:
+            self.__weights[decks_num] = self.__weights.get(decks_num, 0) + 1
+
+        size = self.__size
+        self.__heat = [0] * (size * size)
+        for decks_num, weight in self.__weights.items():
+            windows = field.free_windows(decks_num, True)
+            for i in range(0, len(windows), 3):
+                self.__add_window(windows[i], windows[i + 1], windows[i + 2], decks_num, weight)
+
+    @property
+    def lengths(self):
+        return self.__lengths
+
+    def __add_window(self, row, col, orientation, decks_num, weight):
+        heat, size = self.__heat, self.__size
+        pos = (row - 1) * size + (col - 1)
+        step = size if orientation else 1
+        for _ in range(decks_num):
+            heat[pos] += weight
+            pos += step
+
+    def __covering_free(self, row, col, decks_num):
+        """
+        Перечисляет зоны, накрывающие клетку, у которых все остальные клетки свободны
+        :return: Генератор троек (строка, колонка, ориентация)
+        """
+        size, get_status = self.__size, self.__field.get_status
+        for start in range(max(1, col - decks_num + 1), min(col, size - decks_num + 1) + 1):
+            if all(get_status(row, y, True) == ' ' for y in range(start, start + decks_num) if y != col):
+                yield row, start, 0
+        if decks_num > 1:
+            for start in range(max(1, row - decks_num + 1), min(row, size - decks_num + 1) + 1):
+                if all(get_status(x, col, True) == ' ' for x in range(start, start + decks_num) if x != row):
+                    yield start, col, 1
+
+    def cell_taken(self, row, col):
+        """
+        Убирает вклад зон, накрывавших клетку, в которую выстрелили
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: None
+        """
+        for decks_num, weight in self.__weights.items():
+            for start_row, start_col, orientation in self.__covering_free(row, col, decks_num):
+                self.__add_window(start_row, start_col, orientation, decks_num, -weight)
+
+    def cell_freed(self, row, col):
+        """
+        Возвращает вклад зон, накрывающих клетку, статус которой снова стал ' '
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: None
+        """
+        for decks_num, weight in self.__weights.items():
+            for start_row, start_col, orientation in self.__covering_free(row, col, decks_num):
+                self.__add_window(start_row, start_col, orientation, decks_num, weight)
+
+    def heat(self, row, col):
+        """
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: int Количество положений кораблей, накрывающих клетку
+        """
+        return self.__heat[(row - 1) * self.__size + (col - 1)]
+
+    def best(self, blocked=()):
+        """
+        Находит клетку с наибольшей плотностью. Поиск максимума идет встроенными max и list.index,
+        поэтому даже на поле 100x100 занимает доли миллисекунды
+        :param blocked: Номера клеток ((row - 1) * size + (col - 1)), которые нужно пропустить
+        :return: tuple (строка, колонка) или None, если ни одна клетка не накрыта ни одной зоной
+        """
+        heat = self.__heat
+        if blocked:
+            heat = heat[:]
+            for pos in blocked:
+                heat[pos] = 0
+        top = max(heat)
+        if not top:
+            return None
+        row, col = divmod(heat.index(top), self.__size)
+        return row + 1, col + 1
+
+
 class Field:
     """
     Класс используется для представления игрового поля
@@ -178,8 +739,79 @@ class Field:
     ships_area_list list
         Содержит список списков (вложенный список = строка) всех объектов Cell игрового поля
 
+    size : int
+        Размер игрового поля (количество строк и колонок)
+
+    fleet : tuple
+        Состав флота, который расставляется на поле (количество палуб каждого корабля)
+
     Методы
     -----------
+    cell(row, col) : -> Cell
+        Возвращает ячейку игрового поля по ее координатам
+
+    get_status(row, col, public) : -> str
+        Возвращает приватный или публичный статус ячейки по ее координатам
+
+    set_status(row, col, status, public) : -> None
+        Устанавливает приватный или публичный статус ячейки по ее координатам
+
+    row_statuses(row, public) : -> list
+        Возвращает приватные или публичные статусы всех ячеек строки
+
+    status_changed(row, col, old_status, new_status, public) : -> None
+        Вызывается при каждом изменении статуса ячейки и обновляет индексы поля
+
+    add_listener(listener) : -> None
+        Подписывает функцию listener(field, row, col, old_status, new_status, public) на изменения статусов клеток
+
+    remove_listener(listener) : -> None
+        Отписывает функцию от изменений статусов клеток
+
+    add_event_listener(listener) : -> None
+        Подписывает функцию listener(field, event) на события выстрелов: Hit, Miss, Sunk, GameOver
+
+    remove_event_listener(listener) : -> None
+        Отписывает функцию от событий выстрелов
+
+    window_index(decks_num, public) : -> WindowIndex
+        Возвращает инкрементально поддерживаемый индекс свободных зон для корабля заданного размера
+
+    heat_map(lengths) : -> HeatMap
+        Возвращает инкрементально поддерживаемую карту плотности положений кораблей для выбора выстрела
+
+    discard_heat_map(lengths) : -> None
+        Перестает поддерживать карту плотности, которая больше не нужна
+
+    zobrist(public, symmetric) : -> ZobristHash
+        Возвращает инкрементально поддерживаемый хеш Зобриста слоя поля (модуль zobrist)
+
+    snapshot() : -> int
+        Запоминает текущее состояние поля и возвращает его метку для restore
+
+    restore(token) : -> None
+        Возвращает поле в состояние, запомненное snapshot, откатывая журнал изменений. Метка и все более
+        поздние метки после этого недействительны
+
+    discard_snapshots() : -> None
+        Забывает все снимки и перестает вести журнал изменений
+
+    deck_added(ship, deck_index) : -> None
+        Вызывается кораблем при добавлении палубы и заносит ее в индекс палуб по координатам
+
+    ship_at(row, col) : -> tuple
+        Возвращает пару (корабль, номер палубы), стоящую в ячейке, или None
+
+    place_ship(row, col, orientation, decks_num) : -> Ship
+        Ставит корабль в свободную зону и отмечает его границы. Не использует ввод-вывод
+
+    fire(row, col) : -> bool
+        Выполняет выстрел по ячейке: выставляет ее публичный статус и сообщает, было ли попадание.
+        Если корабль потоплен, отмечает его границы на публичном слое. Не использует ввод-вывод
+
+    ship_border(ship) : -> list
+        Возвращает клетки вокруг корабля (включая диагональных соседей), в которых по правилам нет кораблей
+
     add_ship(ship) : -> None
         Добавляет объект Ship к списку кораблей игрового поля
 
@@ -196,7 +828,20 @@ class Field:
         По полученным на вход координатам (номеру строки и номеру колонки) определяет в списке кораблей, было ли
         попадание в какую-то палубу
 
-    possible_ships_areas(decks_num, public) : -> list
+    free_mask(public) : -> int
+        Возвращает битовую маску свободных клеток (бит (row - 1) * size + (col - 1) соответствует клетке)
+
+    free_windows(decks_num, public) : -> array
+        Векторно находит все свободные зоны для корабля заданного размера и возвращает их компактно,
+        в виде плоского массива троек (строка, колонка, ориентация)
+
+    free_window_keys(decks_num, public) : -> list
+        Возвращает свободные зоны в порядке free_windows, каждую - одним числом-ключом, как в WindowIndex
+
+    windows_to_areas(windows, decks_num) : -> list
+        Преобразует результат free_windows в список списков объектов Cell, как у possible_ships_areas
+
+    possible_ships_areas(decks_num, public, vectorized) : -> list
         Анализирует уже занятые ячейки игрового поля и определяет доступные группы ячеек,
         в которые может поместиться корабль с требуемым количеством палуб. Используется как для заполнения
         игрового поля при расстановке кораблей (ручном или автоматическом), так и в процессе игры, предоставляя
@@ -208,11 +853,43 @@ class Field:
 
     alive_decks_num(self):
         Проверяет, сколько неподбитых палуб осталось на игровом поле
+
+    Палубы всех кораблей проиндексированы по координатам, а живые палубы подсчитываются при каждом выстреле,
+    поэтому check_ships_hit, ship_at, all_ships_sunk и alive_decks_num работают за O(1), и за O(1) же
+    fire узнает, что попадание потопило корабль
+
+    Снимки состояния не копируют поле: после первого snapshot поле ведет журнал изменений (статусы клеток,
+    добавленные корабли и палубы), а restore откатывает его с конца. Стоимость снимка - O(1),
+    восстановления - O(количества изменений после снимка)
     """
 
-    def __init__(self, size: int, ships_list=None):
+    def __init__(self, size: int, ships_list=None, fleet=None):
+        self.__fleet = validate_config(size, Game.FLEET() if fleet is None else fleet)
+        self.__size = size
         self.__set_ships_list(ships_list)
-        self.__fill_cells(size)
+        # Индексы свободных зон: отдельно для приватного (False) и публичного (True) статусов,
+        # в каждом словаре ключ - количество палуб
+        self.__window_indexes = ({}, {})
+        # Карты плотности для выбора выстрела, ключ - отсортированный кортеж размеров кораблей
+        self.__heat_maps = {}
+        # Хеши Зобриста: отдельно для приватного (False) и публичного (True) слоя, ключ - symmetric
+        self.__hashes = ({}, {})
+        # Индекс палуб: (строка, колонка) -> (корабль, номер палубы) и общий счетчик живых палуб
+        self.__decks_map = {}
+        self.__alive_decks = 0
+        # Подписчики на изменения статусов клеток (например, отрисовщик, перерисовывающий только изменения)
+        self.__listeners = []
+        # Подписчики на события выстрелов (Hit, Miss, Sunk, GameOver)
+        self.__event_listeners = []
+        # Журнал изменений для snapshot/restore (None, пока нет ни одного снимка) и стек снимков:
+        # метки возрастают от дна к вершине, длины журнала на момент снимков не убывают
+        self.__journal = None
+        self.__snapshots = []
+        self.__snapshot_positions = {}
+        self.__snapshot_serial = 0
+        self._fill_cells()
+        for ship in self.__ships_list:
+            self.__register_ship(ship)
 
     def __set_ships_list(self, ships_list):
         """
@@ -224,21 +901,20 @@ class Field:
             self.__ships_list = []
         else: self.__ships_list = ships_list
 
-    def __fill_cells(self, size):
+    def _fill_cells(self):
         """
         Автоматически заполняет все пространство игрового поля объектами Cell
         при создании объекта Field так, чтобы любое обращение к любой ячейке поля по координатам
-        возвращало объект Cell
-        :param size: Константа - размер игрового поля
+        возвращало объект Cell.
+        Наследники с другим способом хранения клеток (например, BitboardField) переопределяют этот метод
         :return: None
         """
-        self.__size = size
         self.__ships_area_list = []
 
-        for x in range(1, size+1):
+        for x in range(1, self.__size+1):
             row_list = []
-            for y in range(1, size+1):
-                cell = Cell(x, y)
+            for y in range(1, self.__size+1):
+                cell = Cell(x, y, field=self)
                 row_list.append(cell)
             self.__ships_area_list.append(row_list)
 
@@ -249,6 +925,43 @@ class Field:
         :return: None
         """
         self.__ships_list.append(ship)
+        self.__register_ship(ship)
+        if self.__journal is not None:
+            self.__journal.append((ship,))
+
+    def __register_ship(self, ship):
+        """
+        Привязывает корабль к полю и заносит все его палубы в индекс палуб
+        :param ship: объект Ship
+        :return: None
+        """
+        ship.field = self
+        self.__alive_decks += ship.alive_decks
+        for deck_index, deck in enumerate(ship.decks):
+            self.__decks_map[(deck.row, deck.col)] = (ship, deck_index)
+
+    def deck_added(self, ship, deck_index):
+        """
+        Заносит новую палубу корабля в индекс палуб. Вызывается из Ship.add_deck
+        :param ship: объект Ship
+        :param deck_index: int Номер палубы в списке палуб корабля
+        :return: None
+        """
+        deck = ship.decks[deck_index]
+        self.__decks_map[(deck.row, deck.col)] = (ship, deck_index)
+        if deck.status_public == ' ':
+            self.__alive_decks += 1
+        if self.__journal is not None:
+            self.__journal.append((ship, deck_index))
+
+    def ship_at(self, row, col):
+        """
+        Находит палубу корабля по координатам
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: tuple (объект Ship, номер палубы) или None, если в ячейке нет палубы
+        """
+        return self.__decks_map.get((row, col))
 
     @property
     def ships(self):
@@ -264,6 +977,361 @@ class Field:
         """
         return self.__ships_area_list
 
+    @property
+    def size(self):
+        """
+        :return: int Размер игрового поля (количество строк и колонок)
+        """
+        return self.__size
+
+    @property
+    def fleet(self):
+        """
+        :return: tuple Состав флота, который расставляется на поле
+        """
+        return self.__fleet
+
+    def cell(self, row, col):
+        """
+        Возвращает ячейку игрового поля по ее координатам
+        :param row: int Номер строки (начиная с 1)
+        :param col: int Номер колонки (начиная с 1)
+        :return: Объект Cell
+        """
+        return self.ships_area_list[row-1][col-1]
+
+    def get_status(self, row, col, public=False):
+        """
+        Возвращает статус ячейки по ее координатам
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :param public: bool True - публичный статус, False - приватный
+        :return: str Статус ячейки
+        """
+        cell = self.ships_area_list[row-1][col-1]
+        return cell.status_public if public else cell.status
+
+    def row_statuses(self, row, public=False):
+        """
+        Возвращает статусы всех ячеек строки. Нужен, когда строку читают целиком (например, при отрисовке):
+        наследники с другим способом хранения клеток извлекают строку за одну операцию
+        :param row: int Номер строки
+        :param public: bool True - публичные статусы, False - приватные
+        :return: list Статусы ячеек строки по порядку колонок
+        """
+        if public:
+            return [cell.status_public for cell in self.ships_area_list[row-1]]
+        return [cell.status for cell in self.ships_area_list[row-1]]
+
+    def set_status(self, row, col, status, public=False):
+        """
+        Устанавливает статус ячейки по ее координатам
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :param status: str Новый статус
+        :param public: bool True - публичный статус, False - приватный
+        :return: None
+        """
+        cell = self.ships_area_list[row-1][col-1]
+        if public:
+            cell.status_public = status
+        else:
+            cell.status = status
+
+    def status_changed(self, row, col, old_status, new_status, public=False):
+        """
+        Вызывается при каждом изменении статуса ячейки поля (из сеттеров Cell или методов поля)
+        и инкрементально обновляет индексы свободных зон
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :param old_status: str Статус до изменения
+        :param new_status: str Статус после изменения
+        :param public: bool True - изменился публичный статус, False - приватный
+        :return: None
+        """
+        if self.__journal is not None:
+            self.__journal.append((row, col, old_status, public))
+
+        # Метод вызывается на каждое изменение статуса, а подписчиков и хешей обычно нет, поэтому циклы
+        # по ним запускаются только для непустых коллекций
+        if self.__listeners:
+            for listener in self.__listeners:
+                listener(self, row, col, old_status, new_status, public)
+
+        # Хеш меняет любая смена статуса, а не только занятие или освобождение клетки
+        hashes = self.__hashes[public]
+        if hashes:
+            for zobrist_hash in hashes.values():
+                zobrist_hash.cell_changed(row, col, old_status, new_status)
+
+        # Индексы интересует только переход между свободной и занятой клеткой
+        if (old_status == ' ') == (new_status == ' '):
+            return
+
+        # Выстрел в палубу (или отмена выстрела) меняет счетчики живых палуб корабля и поля
+        if public:
+            deck = self.__decks_map.get((row, col))
+            if deck is not None:
+                delta = 1 if new_status == ' ' else -1
+                deck[0].change_alive_decks(delta)
+                self.__alive_decks += delta
+
+        # Карты плотности строятся только по публичным статусам
+        heat_maps = self.__heat_maps.values() if public and self.__heat_maps else ()
+        if new_status == ' ':
+            for index in self.__window_indexes[public].values():
+                index.cell_freed(row, col)
+            for heat_map in heat_maps:
+                heat_map.cell_freed(row, col)
+        else:
+            for index in self.__window_indexes[public].values():
+                index.cell_taken(row, col)
+            for heat_map in heat_maps:
+                heat_map.cell_taken(row, col)
+
+    def add_listener(self, listener):
+        """
+        Подписывает функцию на изменения статусов клеток поля
+        :param listener: Функция listener(field, row, col, old_status, new_status, public)
+        :return: None
+        """
+        self.__listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Отписывает функцию от изменений статусов клеток поля
+        :param listener: Функция, переданная в add_listener
+        :return: None
+        """
+        self.__listeners.remove(listener)
+
+    def add_event_listener(self, listener):
+        """
+        Подписывает функцию на события выстрелов по полю. За один выстрел приходит Hit или Miss, затем,
+        если корабль потоплен, Sunk, и, если потоплен весь флот, GameOver
+        :param listener: Функция listener(field, event)
+        :return: None
+        """
+        self.__event_listeners.append(listener)
+
+    def remove_event_listener(self, listener):
+        """
+        Отписывает функцию от событий выстрелов
+        :param listener: Функция, переданная в add_event_listener
+        :return: None
+        """
+        self.__event_listeners.remove(listener)
+
+    def snapshot(self):
+        """
+        Запоминает текущее состояние поля. Пока есть хотя бы один снимок, поле ведет журнал изменений
+        :return: int Метка снимка для restore
+        """
+        if self.__journal is None:
+            self.__journal = []
+        self.__snapshot_serial += 1
+        self.__snapshots.append((self.__snapshot_serial, len(self.__journal)))
+        self.__snapshot_positions[self.__snapshot_serial] = len(self.__journal)
+        return self.__snapshot_serial
+
+    def restore(self, token):
+        """
+        Возвращает поле в состояние на момент снимка, откатывая журнал с конца. Статусы клеток возвращаются
+        через set_status, поэтому индексы зон, карты плотности, счетчики палуб и подписчики обновляются так же,
+        как при обычных ходах. Снимки работают как стек: этот снимок и все сделанные после него становятся
+        недействительными. Чтобы вернуться в то же состояние еще раз, после restore делают новый snapshot
+        :param token: int Метка, которую вернул snapshot
+        :return: None
+        """
+        position = self.__snapshot_positions.get(token)
+        if position is None:
+            raise ValueError(f'Unknown or discarded snapshot {token!r}')
+        while True:
+            serial, _ = self.__snapshots.pop()
+            del self.__snapshot_positions[serial]
+            if serial == token:
+                break
+
+        # Пока идет откат, журнал не ведется: записи откатываемых изменений не нужны
+        journal, self.__journal = self.__journal, None
+        try:
+            while len(journal) > position:
+                entry = journal.pop()
+                if len(entry) == 4:
+                    # Изменение статуса: (строка, колонка, старый статус, публичный ли)
+                    row, col, old_status, public = entry
+                    self.set_status(row, col, old_status, public)
+                elif len(entry) == 2:
+                    # Добавленная палуба: (корабль, номер палубы), она всегда последняя в списке палуб
+                    ship, _ = entry
+                    deck = ship.decks.pop()
+                    del self.__decks_map[(deck.row, deck.col)]
+                    if deck.status_public == ' ':
+                        ship.change_alive_decks(-1)
+                        self.__alive_decks -= 1
+                else:
+                    # Добавленный корабль: (корабль,), он всегда последний в списке кораблей
+                    ship = self.__ships_list.pop()
+                    for deck in ship.decks:
+                        del self.__decks_map[(deck.row, deck.col)]
+                    self.__alive_decks -= ship.alive_decks
+                    ship.field = None
+        finally:
+            # Без снимков журнал не нужен
+            self.__journal = journal if self.__snapshots else None
+
+    def discard_snapshots(self):
+        """
+        Забывает все снимки и перестает вести журнал изменений, пока не будет сделан новый снимок
+        :return: None
+        """
+        self.__journal = None
+        self.__snapshots = []
+        self.__snapshot_positions = {}
+
+    def window_index(self, decks_num, public=False):
+        """
+        Возвращает индекс свободных зон для корабля заданного размера. При первом обращении индекс строится
+        по всему полю, после этого поддерживается инкрементально при каждом изменении статусов ячеек
+        :param decks_num: int Количество палуб корабля
+        :param public: bool True - по публичным статусам (цели для выстрелов), False - по приватным
+        :return: Объект WindowIndex
+        """
+        index = self.__window_indexes[public].get(decks_num)
+        if index is None:
+            index = WindowIndex(self, decks_num, public)
+            self.__window_indexes[public][decks_num] = index
+        return index
+
+    def place_ship(self, row, col, orientation, decks_num):
+        """
+        Ставит корабль в свободную зону: присваивает палубам статус '*', добавляет корабль на поле
+        и отмечает его границы. Свобода зоны проверяется по статусам ее ячеек за O(decks_num)
+        :param row: int Номер строки первой палубы
+        :param col: int Номер колонки первой палубы
+        :param orientation: int 0 - горизонтальный корабль, 1 - вертикальный
+        :param decks_num: int Количество палуб
+        :return: Созданный объект Ship
+        """
+        if orientation:
+            cords = [(row + i, col) for i in range(decks_num)]
+        else:
+            cords = [(row, col + i) for i in range(decks_num)]
+
+        size = self.__size
+        for x, y in cords:
+            if not (1 <= x <= size and 1 <= y <= size) or self.get_status(x, y) != ' ':
+                raise ValueError(f'Cannot place a {decks_num}-deck ship at ({row}, {col}), orientation {orientation}')
+
+        ship = Ship()
+        self.add_ship(ship)
+        for x, y in cords:
+            deck = self.cell(x, y)
+            deck.status = '*'
+            ship.add_deck(deck)
+        self.create_ship_borders(ship)
+        return ship
+
+    def fire(self, row, col):
+        """
+        Выполняет выстрел по ячейке: публичный статус ячейки становится 'X' при попадании в палубу
+        и 'T' при промахе. Если попадание потопило корабль, свободные клетки вокруг него получают публичный
+        статус '-'. Подписчики add_event_listener получают события выстрела
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: True если было попадание, иначе False
+        """
+        if not (1 <= row <= self.__size and 1 <= col <= self.__size):
+            raise ValueError(f'Cell ({row}, {col}) is outside of the field')
+        if self.get_status(row, col, True) != ' ':
+            raise ValueError(f'Cell ({row}, {col}) has already been shot')
+
+        deck = self.__decks_map.get((row, col))
+        if deck is None:
+            self.set_status(row, col, 'T', True)
+            self.__emit(Miss(row, col))
+            return False
+
+        self.set_status(row, col, 'X', True)
+        ship = deck[0]
+        if ship.alive_decks:
+            self.__emit(Hit(row, col))
+            return True
+        # Корабль потоплен: по правилам вокруг него кораблей нет, открываем это на публичном слое,
+        # чтобы в эти клетки больше не стреляли
+        border = []
+        for x, y in self.ship_border(ship):
+            if self.get_status(x, y, True) == ' ':
+                self.set_status(x, y, '-', True)
+                border.append((x, y))
+        events = [Hit(row, col), Sunk(ship, tuple(border))]
+        if self.__alive_decks == 0:
+            events.append(GameOver())
+        self.__emit(*events)
+        return True
+
+    def __emit(self, *events):
+        """
+        Сообщает события выстрела подписчикам add_event_listener
+        """
+        for listener in self.__event_listeners:
+            for event in events:
+                listener(self, event)
+
+    def ship_border(self, ship):
+        """
+        Клетки вокруг корабля: прямоугольник от соседей первой палубы до соседей последней без самих палуб
+        :param ship: Объект Ship
+        :return: list Координаты (строка, колонка)
+        """
+        if not ship.decks:
+            return []
+        size = self.__size
+        first_row, last_row = min(deck.row for deck in ship.decks), max(deck.row for deck in ship.decks)
+        first_col, last_col = min(deck.col for deck in ship.decks), max(deck.col for deck in ship.decks)
+        return [(x, y) for x in range(max(1, first_row - 1), min(size, last_row + 1) + 1)
+                for y in range(max(1, first_col - 1), min(size, last_col + 1) + 1)
+                if not (first_row <= x <= last_row and first_col <= y <= last_col)]
+
+    def heat_map(self, lengths):
+        """
+        Возвращает карту плотности положений кораблей по публичным статусам ячеек. При первом обращении карта
+        строится по всему полю, после этого поддерживается инкрементально при каждом выстреле
+        :param lengths: Размеры кораблей флота
+        :return: Объект HeatMap
+        """
+        key = tuple(sorted(lengths))
+        heat_map = self.__heat_maps.get(key)
+        if heat_map is None:
+            heat_map = HeatMap(self, key)
+            self.__heat_maps[key] = heat_map
+        return heat_map
+
+    def discard_heat_map(self, lengths):
+        """
+        Удаляет карту плотности для этих размеров кораблей, чтобы поле больше не обновляло ее при выстрелах.
+        Следующий вызов heat_map с теми же размерами построит карту заново
+        :param lengths: Размеры кораблей флота
+        :return: None
+        """
+        self.__heat_maps.pop(tuple(sorted(lengths)), None)
+
+    def zobrist(self, public=False, symmetric=False):
+        """
+        Возвращает хеш Зобриста слоя поля. При первом обращении хеш вычисляется по всему полю, после этого
+        поддерживается инкрементально при каждом изменении статуса клетки за O(1)
+        :param public: bool True - хеш публичного слоя, False - приватного
+        :param symmetric: bool Вести хеши всех 8 симметричных образов слоя (нужен для ZobristHash.canonical)
+        :return: Объект ZobristHash
+        """
+        zobrist_hash = self.__hashes[public].get(symmetric)
+        if zobrist_hash is None:
+            # Модуль zobrist импортирует этот модуль, поэтому подключаем его здесь, а не в начале файла
+            from zobrist import ZobristHash
+            zobrist_hash = ZobristHash(self, public, symmetric)
+            self.__hashes[public][symmetric] = zobrist_hash
+        return zobrist_hash
+
     def create_ship_borders(self, ship):
         """
         Присваивает всем ячейкам, находящимся рядом с кораблем, status '-', который исключает эти ячейки
@@ -273,32 +1341,18 @@ class Field:
         :return: None
         """
 
-        # Пройдемся вокруг всех палуб корабля и отметим соседние ячейки как границу,
-        # в которой ставить другие корабли нельзя
-
-        for deck in ship.decks:
-            border_row = deck.row - 1
-            border_col = deck.col - 1
-            for x in range(border_row, border_row+3):
-                for y in range(border_col, border_col+3):
-
-                    if x == 0:
-                        xx = 1
-                    elif x > 5:
-                        xx = 5
-                    else:
-                        xx = x - 1
-
-                    if y == 0:
-                        yy = 1
-                    elif y > 5:
-                        yy = 5
-                    else:
-                        yy = y - 1
-
-                    cell = self.ships_area_list[xx][yy]
-                    if cell.status == ' ':
-                        cell.status = '-'
+        # Корабль - прямая линия палуб, поэтому его окрестность - прямоугольник от соседей первой палубы
+        # до соседей последней. Границы прямоугольника берем из таблицы окрестностей, уже обрезанными краями поля
+        if not ship.decks:
+            return
+        table = neighbourhood_table(self.__size)
+        first_row, last_row = min(deck.row for deck in ship.decks), max(deck.row for deck in ship.decks)
+        first_col, last_col = min(deck.col for deck in ship.decks), max(deck.col for deck in ship.decks)
+        col_from, col_to = table[first_col - 1][0], table[last_col - 1][1]
+        for line in self.ships_area_list[table[first_row - 1][0]:table[last_row - 1][1]]:
+            for cell in line[col_from:col_to]:
+                if cell.status == ' ':
+                    cell.status = '-'
 
     def delete_ship_borders(self):
         """
@@ -319,24 +1373,100 @@ class Field:
         :param col: int Номер колонки
         :return: True если попадание было, иначе False
         """
-        for curr_ship in self.ships:
-            for curr_deck in curr_ship.decks:
-                if curr_deck.hit(row, col):
-                    return True
+        return (row, col) in self.__decks_map
 
-        return False
+    def free_mask(self, public=False):
+        """
+        Возвращает битовую маску свободных клеток поля
+        :param public: bool True - проверяется публичный статус, False - приватный
+        :return: int Маска, в которой бит (row - 1) * size + (col - 1) установлен, если статус клетки ' '
+        """
+        if public:
+            bits = ['1' if cell.status_public == ' ' else '0' for line in self.ships_area_list for cell in line]
+        else:
+            bits = ['1' if cell.status == ' ' else '0' for line in self.ships_area_list for cell in line]
+        # Первая клетка должна стать младшим битом, поэтому строку разворачиваем
+        return int(''.join(reversed(bits)) or '0', 2)
+
+    def free_windows(self, decks_num, public=False):
+        """
+        Векторно находит все свободные зоны для корабля заданного размера: вместо перебора смещений по каждой
+        строке и колонке серии свободных клеток ищутся сдвигами битовой маски свободных клеток сразу по всему полю
+        :param decks_num: int Количество палуб корабля
+        :param public: bool True - проверяется публичный статус, False - приватный
+        :return: array Плоский массив троек (строка, колонка, ориентация): строка и колонка - первая клетка зоны,
+        ориентация 0 - горизонтальная зона, 1 - вертикальная. Порядок зон такой же, как у possible_ships_areas
+        """
+        size = self.size
+        windows = array('I')
+        if decks_num > size:
+            return windows
+
+        free = self.free_mask(public)
+
+        # Горизонтальная зона может начинаться только в первых size - decks_num + 1 колонках,
+        # иначе она перешла бы на следующую строку
+        starts_mask = repeat_bits((1 << (size - decks_num + 1)) - 1, size, size)
+        for pos in iter_bits(run_starts(free, decks_num) & starts_mask):
+            windows.extend((pos // size + 1, pos % size + 1, 0))
+
+        # Вертикальные зоны ищем только для многопалубных кораблей и выдаем по колонкам, как possible_ships_areas
+        if decks_num > 1:
+            vertical = sorted(iter_bits(run_starts(free, decks_num, size)), key=lambda p: (p % size, p))
+            for pos in vertical:
+                windows.extend((pos // size + 1, pos % size + 1, 1))
+
+        return windows
+
+    def free_window_keys(self, decks_num, public=False):
+        """
+        Находит все свободные зоны для корабля заданного размера, как free_windows, и возвращает каждую зону
+        одним числом: ((row - 1) * size + (col - 1)) * 2 + ориентация. В этом виде зоны хранит WindowIndex
+        :param decks_num: int Количество палуб корабля
+        :param public: bool True - проверяется публичный статус, False - приватный
+        :return: list Ключи зон в порядке free_windows
+        """
+        windows, size = self.free_windows(decks_num, public), self.__size
+        return [((windows[i] - 1) * size + windows[i + 1] - 1) * 2 + windows[i + 2] for i in range(0, len(windows), 3)]
 
-    def possible_ships_areas(self, decks_num, public=False):
+    def windows_to_areas(self, windows, decks_num):
+        """
+        Преобразует компактный результат free_windows в список списков объектов Cell
+        :param windows: array Плоский массив троек (строка, колонка, ориентация)
+        :param decks_num: int Количество палуб корабля
+        :return: list Список зон, каждая зона - список объектов Cell
+        """
+        areas = []
+        for i in range(0, len(windows), 3):
+            row, col, orientation = windows[i], windows[i + 1], windows[i + 2]
+            if orientation:
+                areas.append([self.cell(row + j, col) for j in range(decks_num)])
+            else:
+                areas.append([self.cell(row, col + j) for j in range(decks_num)])
+        return areas
+
+    def possible_ships_areas(self, decks_num, public=False, vectorized=False):
         """
         Определяет доступные группы ячеек, в которые может поместиться корабль с требуемым количеством палуб
         :param decks_num: количество палуб (ячеек). Определяет размер корабля, который нужно поместить в поле
+        :param public: bool True - проверяется публичный статус клеток, False - приватный
+        :param vectorized: bool True - зоны ищутся векторно через free_windows, False - перебором клеток
         :return: Список списков. Каждый вложенный список представляет собой набор рядом расположенных объектов cell,
         подходящих для размещения корабля требуемого размера, т.е. свободных ячеек, не занятых другими кораблями
         и не граничащих с другими кораблями
         """
+        # Если по этому размеру уже ведется индекс - берем зоны из него, без сканирования поля
+        index = self.__window_indexes[public].get(decks_num)
+        if index is not None:
+            return self.windows_to_areas(index.windows(), decks_num)
+
+        if vectorized:
+            return self.windows_to_areas(self.free_windows(decks_num, public), decks_num)
 
-        size = Game.FIELD_SIZE()
+        size = self.size
         ships_areas = []
+        # Список ячеек берем один раз: ships_area_list - свойство, и обращение к нему в цикле по клеткам дорого
+        area_list = self.ships_area_list
 
         for x in range(1, size + 1):
             # Вводим смещение - т.е. потенциальную группу ячеек, которую проверяем на предмет того, свободны ли они
@@ -344,7 +1474,7 @@ class Field:
             for offset in range(1, size - decks_num + 2):
                 area = []
                 for y in range(offset, offset + decks_num):
-                    cell = self.ships_area_list[x-1][y-1]
+                    cell = area_list[x-1][y-1]
                     # Добавляем ячейку в список только если статус у нее пустой, т.е. ячейка свободна
                     # При этом учитываем, внутренний или публичный статус нужно проверять
                     if public:
@@ -366,7 +1496,7 @@ class Field:
                 for offset in range(1, size - decks_num + 2):
                     area = []
                     for x in range(offset, offset + decks_num):
-                        cell = self.ships_area_list[x-1][y-1]
+                        cell = area_list[x-1][y-1]
                         # Добавляем ячейку в список только если статус у нее пустой, т.е. ячейка свободна
                         # При этом учитываем, внутренний или публичный статус нужно проверять
                         if public:
@@ -386,36 +1516,65 @@ class Field:
     def all_ships_sunk(self):
         """
         Проверяет, что все корабли на игровом поле подбиты
-        :return: True если все ячейки (палубы), входящие во все корабли, имеют публичный статус '*', иначе False
+        :return: True если все ячейки (палубы), входящие во все корабли, имеют непустой публичный статус, иначе False
         """
-        thats_all = True
-        for ship in self.__ships_list:
-            for deck in ship.decks:
-                if deck.status_public == ' ':
-                    thats_all = False
-                    break
-
-        return thats_all
+        return self.__alive_decks == 0
 
     def alive_decks_num(self):
         """
         Проверяет, сколько неподбитых палуб осталось на игровом поле
         :return: int Количество неподбитых палуб
         """
-        alive_decks = 0
-        for ship in self.__ships_list:
-            for deck in ship.decks:
-                if deck.status_public == ' ':
-                    alive_decks += 1
+        return self.__alive_decks
+
+
+class ConsoleField(Field):
+    """
+    Общий предок игровых полей консольной игры (человека и компьютера)
+
+    Свойства
+    -----------
+    game : Game
+        Консольная игра, в которой участвует поле. Через нее поле показывает игровые поля после каждого хода.
+        Если поле создано без игры (например, для проверки логики), ничего не выводится
+
+    rng : random.Random
+        Собственный генератор случайных чисел игрока поля: им компьютер расставляет корабли и выбирает выстрелы
+
+    Методы
+    -----------
+    show_fields() -> None
+        Выводит игровые поля через объект Game, если он задан
+    """
+
+    def __init__(self, size: int, ships_list=None, game=None, fleet=None, rng=None):
+        super().__init__(size, ships_list, fleet)
+        self.__game = game
+        self.__rng = random.Random() if rng is None else rng
+
+    @property
+    def game(self):
+        return self.__game
+
+    @property
+    def rng(self):
+        return self.__rng
 
-        return alive_decks
+    def show_fields(self):
+        """
+        Выводит игровые поля через объект Game, если он задан
+        :return: None
+        """
+        if self.__game is not None:
+            self.__game.show_fields()
 
-class HumansField(Field):
+
+class HumansField(ConsoleField):
     """
     Представляет собой игровое поле человека
     Свойства
     -----------
-    Все свойства такие же, как и у родительского класса Field
+    Все свойства такие же, как и у родительского класса ConsoleField
 
     Статические методы
     -----------
@@ -433,16 +1592,26 @@ class HumansField(Field):
         Реализует операцию интерактивного ввода пользователем информации в ячейку игрового поля
         (при расстановке кораблей и при стрельбе человеком)
 
+    parse_cell(text) -> tuple
+        Разбирает и проверяет координаты клетки без ввода-вывода
+
+    place_deck(ship, areas_by_cell, row, col) -> dict
+        Ставит очередную палубу строящегося корабля без ввода-вывода
+
+    check_target(enemy_field, row, col) -> None
+        Проверяет без ввода-вывода, что в клетку поля противника еще не стреляли
+
     fill_ships() -> None
-        Интерактивно заполняет игровое поле кораблями (объектами Ship). При этом создает:
-            - один трехпалубный корабль
-            - два двухпалубных корабля
-            - три однопалубных корабля
+        Интерактивно заполняет игровое поле кораблями (объектами Ship) флота поля (свойство fleet)
 
     shot() -> None
         Реализует процедуру интерактивного хода (выстрела) человека по кораблям компьютера
     """
 
+    # Названия кораблей и порядковые номера палуб для подсказок при расстановке
+    DECKS_NAMES = {1: 'однопалубный', 2: 'двухпалубный', 3: 'трехпалубный', 4: 'четырехпалубный'}
+    DECK_ORDINALS = {0: 'первой', 1: 'второй', 2: 'третьей', 3: 'четвертой'}
+
     @staticmethod
     def victory_speech():
         """
@@ -464,34 +1633,52 @@ class HumansField(Field):
         else:
             question = f'Введите координаты {current_deck} палубы корабля (номер строки - пробел - номер колонки): '
 
-        valid_cords = False
-        while not valid_cords:
-
-            cords = input(question).split()
+        while True:
+            try:
+                return self.parse_cell(input(question))
+            except ValueError as e:
+                print(e)
 
-            # Проверим, что введено именно два знака координат
-            if len(cords) != 2:
-                print(' Введите 2 координаты! ')
-                continue
+    def parse_cell(self, text):
+        """
+        Разбирает координаты клетки, введенные пользователем (номер строки - пробел - номер колонки).
+        Не использует ввод-вывод, поэтому те же правила проверки применяются и к ходам, пришедшим по сети
+        :param text: str Введенная строка
+        :return: tuple (строка, колонка). Если координаты введены неверно - ValueError с текстом подсказки
+        """
+        cords = text.split()
 
-            row, col = cords
+        # Проверим, что введено именно два знака координат
+        if len(cords) != 2:
+            raise ValueError(' Введите 2 координаты! ')
 
-            # Проверим, что эти два знака являются числами
-            if not (row.isdigit()) or not (col.isdigit()):
-                print(' Введите числа! ')
-                continue
+        row, col = cords
 
-            row, col = int(row), int(col)
+        # Проверим, что эти два знака являются числами
+        if not (row.isdigit()) or not (col.isdigit()):
+            raise ValueError(' Введите числа! ')
 
-            # Проверим, что координаты попали в игровое поле
-            if 0 > row or row > Game.FIELD_SIZE() or 0 > col or col > Game.FIELD_SIZE():
-                print(' Координаты вне игрового поля! ')
-                continue
+        row, col = int(row), int(col)
 
-            valid_cords = True
+        # Проверим, что координаты попали в игровое поле
+        if 1 > row or row > self.size or 1 > col or col > self.size:
+            raise ValueError(' Координаты вне игрового поля! ')
 
         return row, col
 
+    @staticmethod
+    def areas_by_cell(areas):
+        """
+        Строит индекс зон по координатам ячеек: для каждой ячейки - список зон, в которые она входит
+        :param areas: list Список зон (списков объектов Cell)
+        :return: dict (строка, колонка) -> список зон
+        """
+        index = {}
+        for area in areas:
+            for cell in area:
+                index.setdefault((cell.row, cell.col), []).append(area)
+        return index
+
     def __create_ship(self, decks_num):
         """
         Интерактивно создает корабль (объект Ship) с заданным количеством палуб и помещает его в список
@@ -510,89 +1697,94 @@ class HumansField(Field):
         # Сразу добавим его в поле
         self.add_ship(ship)
 
-        # decks_num(количество палуб) может быть только целым числом от 1 до 3
-        decks_num_str = ''
-        if decks_num == 3:
-            decks_num_str = 'трехпалубный'
-        elif decks_num == 2:
-            decks_num_str = 'двухпалубный'
-        else:
-            decks_num_str = 'однопалубный'
+        # Корабли до четырех палуб называем словами, остальные - числом палуб
+        decks_num_str = self.DECKS_NAMES.get(decks_num, f'{decks_num}-палубный')
 
         print(f'Cоздаем {decks_num_str} корабль:')
 
         created_decks = 0  # Количество созданных палуб корабля
-        ships_areas = self.possible_ships_areas(decks_num) #Список всех доступных зон размещения корабля указанного размера
+        # Индекс всех доступных зон размещения корабля указанного размера по координатам входящих в них ячеек
+        areas_by_cell = self.areas_by_cell(self.possible_ships_areas(decks_num))
         while created_decks < decks_num:
 
             # Создаваемая в данный момент палуба корабля
-            if created_decks == 0:
-                current_deck = 'первой'
-            elif created_decks == 1:
-                current_deck = 'второй'
-            elif created_decks == 2:
-                current_deck = 'третьей'
+            current_deck = self.DECK_ORDINALS.get(created_decks, f'{created_decks + 1}-й')
 
             row, col = self.input_cell(current_deck)
 
-            # Проверим, не попал ли пользователь в какой-то другой корабль
-            if self.check_ships_hit(row, col):
-                print('В этой клетке уже стоит палуба корабля или она граничит с какой-то палубой.  Выберите другую')
+            try:
+                areas_by_cell = self.place_deck(ship, areas_by_cell, row, col)
+            except ValueError as e:
+                print(e)
                 continue
 
-            # Пройдемся по списку доступных зон размещения кораблей и проверим, входит ли выбранная пользователем ячейка
-            # хотя бы в одну зону
-            used_ships_areas = []
-            for area in ships_areas:
-                for cell in area:
-                    if cell.hit(row, col):
-                        used_ships_areas.append(area)
-
-            # Если не нашлось ни одной зоны, куда входит ячейка - построить корабль заданного размера в этой точке
-            # невозможно. Предлагаем выбрать правильную точку, которая лежит в заданных зонах
-            if len(used_ships_areas):
-                ship_sell = self.ships_area_list[row-1][col-1]
-                ship_sell.status = '*'
-                ship.add_deck(ship_sell)
-            else:
-                print('В этой клетке нельзя ставить палубу корабля. выберите клетку, соседнюю с уже имеющимися палубами')
-                continue
-
-            # Заменим первоначальный список списков тем, которые подходят для данной ячейки.
-            # Далее искать будем только в них
-            ships_areas = used_ships_areas.copy()
-
             created_decks += 1
 
             # Покажем пользователю поле, чтобы он видел, куда ткнул
-            game.show_fields()
+            self.show_fields()
 
 
         self.create_ship_borders(ship)
-        game.show_fields()
+        self.show_fields()
         print(f'{decks_num_str} корабль создан')
 
-    def fill_ships(self):
+    def place_deck(self, ship, areas_by_cell, row, col):
+        """
+        Ставит очередную палубу строящегося корабля в клетку, выбранную пользователем. Не использует ввод-вывод
+        :param ship: Объект Ship, который строится
+        :param areas_by_cell: dict Индекс зон, в которых еще может стоять корабль (см. areas_by_cell)
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: dict Индекс только тех зон, в которые входит поставленная палуба. Далее искать нужно в них.
+        Если палубу в клетку поставить нельзя - ValueError с текстом подсказки
+        """
+        # Проверим, не попал ли пользователь в какой-то другой корабль
+        if self.check_ships_hit(row, col):
+            raise ValueError('В этой клетке уже стоит палуба корабля или она граничит с какой-то палубой.  '
+                             'Выберите другую')
+
+        # Найдем по индексу зоны размещения корабля, в которые входит выбранная пользователем ячейка
+        used_ships_areas = areas_by_cell.get((row, col), [])
+
+        # Если не нашлось ни одной зоны, куда входит ячейка - построить корабль заданного размера в этой точке
+        # невозможно. Предлагаем выбрать правильную точку, которая лежит в заданных зонах
+        if not used_ships_areas:
+            raise ValueError('В этой клетке нельзя ставить палубу корабля. '
+                             'выберите клетку, соседнюю с уже имеющимися палубами')
+
+        ship_sell = self.cell(row, col)
+        ship_sell.status = '*'
+        ship.add_deck(ship_sell)
+
+        # Заменим первоначальный список списков тем, которые подходят для данной ячейки
+        return self.areas_by_cell(used_ships_areas)
+
+    @staticmethod
+    def check_target(enemy_field, row, col):
+        """
+        Проверяет, что в клетку поля противника еще не стреляли. Не использует ввод-вывод
+        :param enemy_field: Объект Field противника
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: None. Если в клетку уже стреляли - ValueError с текстом подсказки
         """
-        Интерактивно заполняет игровое поле кораблями (объектами Ship). При этом создает:
-        - один трехпалубный корабль
-        - два двухпалубных корабля
-        - три однопалубных корабля
+        # Стрелять можно только в клетки, в которые еще не стреляли. Вместо перебора списка доступных ходов
+        # смотрим публичный статус самой клетки
+        status = enemy_field.get_status(row, col, True)
+        if status == '-':
+            raise ValueError('Рядом с потопленным кораблем других кораблей нет. Сделай выстрел в другое поле')
+        if status != ' ':
+            raise ValueError('В это поле уже стреляли. Сделай выстрел в другое поле')
 
+    def fill_ships(self):
+        """
+        Интерактивно заполняет игровое поле кораблями (объектами Ship) флота поля: от больших кораблей к меньшим
         :return: None
         """
         print('Заполним игровое кораблями')
 
-        #Интерактивное создание трехпалубного корабля
-        self.__create_ship(3)
-
-        #Интерактивное создание двух двухпалубных кораблей
-        for i in range(2):
-            self.__create_ship(2)
-
-        #Интерактивное создание трех однопалубных кораблей
-        for i in range(3):
-            self.__create_ship(1)
+        for decks_num in sorted(self.fleet, reverse=True):
+            self.__create_ship(decks_num)
 
         self.delete_ship_borders()
         print('Отлично! корабли заняли свои места на поле!')
@@ -603,44 +1795,37 @@ class HumansField(Field):
         :param skynet_field: Объект SkynetField
         :return: None
         """
-        # Заполним список доступных ходов
-        shot_var = skynet_field.possible_ships_areas(1, True)
-
         correct_shot = None
         while correct_shot is None:
 
             row, col = self.input_cell()
 
-            for area in shot_var:
-                for cell in area:
-                    if cell.hit(row, col):
-                        if cell.status == '*':
-                            print('Есть попадание! Так держать!')
-                            cell.status_public = 'X'
-                            correct_shot = True
-                        else:
-                            print('Промах!')
-                            cell.status_public = 'T'
-                            correct_shot = False
-
-                        break
-
-            # Пользователь ткнул куда-то повторно
-            if correct_shot is None:
-                print('В это поле уже стреляли. Сделай выстрел в другое поле')
+            try:
+                self.check_target(skynet_field, row, col)
+            except ValueError as e:
+                # Пользователь ткнул куда-то повторно
+                print(e)
+                continue
 
-            continue
+            correct_shot = skynet_field.fire(row, col)
+            if correct_shot and skynet_field.ship_at(row, col)[0].sunk:
+                print('Корабль потоплен! Так держать!')
+            elif correct_shot:
+                print('Есть попадание! Так держать!')
+            else:
+                print('Промах!')
 
         # Покажем результат выстрела
-        game.show_fields()
+        self.show_fields()
 
-class SkynetField(Field):
+
+class SkynetField(ConsoleField):
     """
     Представляет собой игровое поле компьютера
 
     Свойства
     -----------
-    Все свойства такие же, как и у родительского класса Field
+    Все свойства такие же, как и у родительского класса ConsoleField
 
     Статические методы
     -----------
@@ -652,93 +1837,111 @@ class SkynetField(Field):
     Методы предполагают автоматическое выполнение действий за играющий компьютер
 
     fill_ships() -> None
-        Программно заполняет игровое поле кораблями (объектами Ship). При этом создает:
-            - один трехпалубный корабль
-            - два двухпалубных корабля
-            - три однопалубных корабля
+        Программно заполняет игровое поле кораблями (объектами Ship) флота поля (свойство fleet)
 
     shot() -> None
         Реализует процедуру программного хода (выстрела) компьютера по кораблям человека
-    """
-    @staticmethod
-    def victory_speech():
-        """
-        Возвращает текст речи в случае победы компьютера по окончании игры
-        :return: текст речи
-        """
-        return 'Компьютер в этот раз победил. Собирайся с силами и приходи брать реванш!'
-
-    def __create_ship(self, decks_num):
-        """
-            Программно создает корабль (объект Ship) с заданным количеством палуб и помещает его в список
-            кораблей игрового поля.
 
-            Случайно выбирает ячейки из доступных зон (списков ячеек, в которые помещается корабль выбранного размера),
-            и создает из этих ячеек корабль (объект Ship), т.е. присваивает выбранным ячейкам статус '*',
-            при этом также помещает ячейку в список палуб корабля объекта Ship. Это позволяет, оперируя ячейками
-            игрового поля, отслеживать статус всего корабля, поскольку каждая отдельная ячейка входит в объект Field и
-            объект Ship одновременно
+    remembered_shot(enemy_field) -> tuple
+        Выстрел для текущей позиции поля противника из таблицы транспозиций или None
 
-            :param decks_num: int количество палуб создаваемого корабля
-            :return: None
-            """
-        # Теоретически возможно, что при неудачном случайном расположении кораблей на каком-то ходе
-        # создание следующего корабля флотилии станет невозможным из-за ограничений,
-        # связанных с соблюдением границ других, уже созданных кораблей
+    remember_shot(enemy_field, row, col, depth) -> None
+        Запоминает выстрел для текущей позиции поля противника в таблице транспозиций
 
-        try:
+    Если задана дебютная книга (book.OpeningBook), расстановка берется из ее пула, а первые выстрелы -
+    из книги: в клетку, где палуба стоит с наибольшей вероятностью
 
-            # Создаем объект корабля, пока без палуб
-            ship = Ship()
-            # Сразу добавим его в поле
-            self.add_ship(ship)
+    Если задана таблица транспозиций (zobrist.TranspositionTable, свойство table), выбранные выстрелы
+    запоминаются в ней по каноническому хешу Зобриста публичного слоя поля противника, и в уже встречавшейся
+    позиции (с точностью до симметрии поля) выстрел берется из таблицы. Наследники с поиском могут хранить
+    в этой же таблице свои оценки позиций
 
-            # Список всех доступных зон размещения корабля указанного размера
-            ships_areas = self.possible_ships_areas(decks_num)
+    Если задана стратегия стрельбы (свойство shooting, например mcts.MCTSShooting), выстрелы вне книги
+    выбирает она, а не случайный выбор клетки
+    """
 
-            # Выбираем случайно зону, подходящую для размещения корабля
-            # Она и станет кораблем нужного нам размера
-            ship_area = random.choice(ships_areas)
-            for deck in ship_area:
-                deck.status = '*'
-                ship.add_deck(deck)
+    def __init__(self, size: int, ships_list=None, game=None, fleet=None, rng=None, book=None, table=None,
+                 shooting=None):
+        super().__init__(size, ships_list, game, fleet, rng)
+        self.__book = book
+        self.__table = table
+        self.__shooting = shooting
 
-            # Заполним границы вокруг корабля, чтобы следующий корабль учел их и исключил эти клетки
-            # из списка доступных зон для размещения кораблей
-            self.create_ship_borders(ship)
+    @property
+    def book(self):
+        return self.__book
 
-        except IndexError as e:
+    @property
+    def table(self):
+        return self.__table
 
-            # Не получилось найти зону (группу непрерывных ячеек) для создания корабля требуемого размера
-            # вероятно из-за неудачного случайного расположения ранее созданных кораблей
-            # принимаем решение, что в этом случае комп играет теми кораблями, которые смог создать
+    @property
+    def shooting(self):
+        return self.__shooting
 
-            print('')
-            print(
-                f'Компьютер запутался и не смог создать корабль с количеством палуб {decks_num}. будет играть без него')
-            print('')
+    @staticmethod
+    def victory_speech():
+        """
+        Возвращает текст речи в случае победы компьютера по окончании игры
+        :return: текст речи
+        """
+        return 'Компьютер в этот раз победил. Собирайся с силами и приходи брать реванш!'
 
     def fill_ships(self):
         """
-        Программно заполняет игровое поле кораблями (объектами Ship)
+        Программно заполняет игровое поле кораблями (объектами Ship). Расстановку строит LayoutGenerator
+        (поиск с возвратом), поэтому компьютер всегда расставляет весь флот, а не играет без кораблей,
+        которым не нашлось места при неудачном случайном выборе зон
         :return: None
         """
-        #Автоматическое создание трехпалубного корабля
-        self.__create_ship(3)
+        # Генератор импортирует этот модуль, поэтому подключаем его здесь, а не в начале файла
+        from placement import LayoutGenerator
 
-        #Автоматическое создание двух двухпалубных кораблей
-        for i in range(2):
-            self.__create_ship(2)
+        free = self.free_mask()
+        # Пул книги строится для пустого поля
+        if self.__book is not None and free == (1 << self.size * self.size) - 1:
+            layout = self.__book.layout(self.size, self.fleet, self.rng)
+        else:
+            layout = LayoutGenerator(self.size, self.fleet).generate(self.rng, free)
 
-        # Автоматическое создание трех однопалубных кораблей
-        for i in range(3):
-            self.__create_ship(1)
+        # place_ship присвоит палубам статус '*' и отметит границы кораблей, как при ручной расстановке
+        for row, col, orientation, decks_num in layout:
+            self.place_ship(row, col, orientation, decks_num)
 
         print('')
         print('Компьютер расставил свои корабли и к игре готов!')
         print('')
 
-        game.show_fields()
+        self.show_fields()
+
+    def remembered_shot(self, enemy_field):
+        """
+        Ищет выстрел для текущей позиции поля противника в таблице транспозиций
+        :param enemy_field: объект Field противника
+        :return: tuple (строка, колонка) или None, если таблицы нет или позиции в ней нет
+        """
+        if self.__table is None:
+            return None
+        position = enemy_field.zobrist(True, True)
+        pos = self.__table.get(position.canonical)
+        if pos is None:
+            return None
+        row, col = position.from_canonical(pos)
+        # Совпадение 64-битных хешей разных позиций маловероятно, но выстрел в занятую клетку недопустим
+        return (row, col) if enemy_field.get_status(row, col, True) == ' ' else None
+
+    def remember_shot(self, enemy_field, row, col, depth=0):
+        """
+        Запоминает выстрел для текущей позиции поля противника в таблице транспозиций
+        :param enemy_field: объект Field противника
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :param depth: int Ценность записи для вытеснения (см. TranspositionTable.put)
+        :return: None
+        """
+        if self.__table is not None:
+            position = enemy_field.zobrist(True, True)
+            self.__table.put(position.canonical, position.to_canonical(row, col), depth)
 
     def shot(self, humans_field):
         """
@@ -748,22 +1951,31 @@ class SkynetField(Field):
         """
         print('Выстрел компьютера:')
 
-        # Заполним список доступных ходов
-        shot_var = humans_field.possible_ships_areas(1, True)
-
-        area = random.choice(shot_var)
-        for cell in area:
-            if cell.status == '*':
-                print('Есть попадание в твой корабль!')
-                cell.status_public = 'X'
-                cell.status = 'X'
+        target = self.remembered_shot(humans_field)
+        if target is None and self.__book is not None:
+            target = self.__book.best_shot(humans_field, humans_field.fleet, self.rng)
+            if target is not None:
+                self.remember_shot(humans_field, *target)
+        if target is None and self.__shooting is not None:
+            target = self.__shooting.choose(humans_field, humans_field.fleet, self.rng)
+            self.remember_shot(humans_field, *target)
+        if target is not None:
+            row, col = target
+        else:
+            # Выбираем случайно клетку, в которую еще не стреляли. Индекс таких клеток поддерживается полем
+            # инкрементально, поэтому выбор не требует просмотра всего поля
+            row, col, _ = humans_field.window_index(1, True).choice(self.rng)
+        if humans_field.fire(row, col):
+            if humans_field.ship_at(row, col)[0].sunk:
+                print('Компьютер потопил твой корабль!')
             else:
-                print('Компьютер промазал!')
-                cell.status_public = 'T'
-                cell.status = 'T'
+                print('Есть попадание в твой корабль!')
+        else:
+            print('Компьютер промазал!')
 
         # Покажем результат выстрела
-        game.show_fields()
+        self.show_fields()
+
 
 class Game:
     """
@@ -773,6 +1985,22 @@ class Game:
     -----------
     FIELD_SIZE - размер игрового поля
 
+    FLEET - состав флота (количество палуб каждого корабля)
+
+    Значения констант используются по умолчанию, игру можно создать с другим размером поля и составом флота
+
+    Свойства
+    -----------
+    size : int
+        Размер игровых полей
+
+    fleet : tuple
+        Состав флота каждого игрока
+
+    seed : int
+        Зерно партии. Генераторы случайных чисел игроков получаются из него и номера игрока (player_rng),
+        поэтому с тем же зерном и теми же ходами человека компьютер играет так же
+
     Методы
     -----------
     show_fields() -> None
@@ -784,35 +2012,81 @@ class Game:
     start() -> None
         Запускает игру и управляет игровым процессом:
         Игроки ходят по очереди. Даже после попадания по вражескому кораблю ход переходит к другому игроку.
-        Компьютер туп: после попадания по палубе корабля человека следующий ход он делает случайно
+        Без стратегии стрельбы (shooting) компьютер туп: после попадания по палубе корабля человека следующий ход
+        он делает случайно
+
+    snapshot() -> tuple
+        Запоминает состояние обоих игровых полей (статусы клеток и корабли) и возвращает метку для restore
+
+    restore(token) -> None
+        Возвращает оба игровых поля в состояние, запомненное snapshot
 
     Статические методы
     -----------
-    greet() -> None
+    greet(size, fleet) -> None
         Выводит начальное приветствие и правила игры
     """
 
-    def __init__(self):
+    def __init__(self, size=None, fleet=None, renderer=None, recorder=None, seed=None, book=None, shooting=None):
+        """
+        :param size: int Размер игровых полей, по умолчанию FIELD_SIZE()
+        :param fleet: Последовательность размеров кораблей, по умолчанию FLEET().
+        Недопустимая конфигурация отвергается сразу (ValueError), до начала игры
+        :param renderer: BoardRenderer Отрисовщик полей, по умолчанию - полные кадры в sys.stdout
+        :param recorder: Объект записи партий с методами attach(fields) и finish() (например, record.GameWriter)
+        или None - партия не записывается
+        :param seed: int Зерно партии, по умолчанию случайное
+        :param book: book.OpeningBook Дебютная книга и пул расстановок компьютера или None
+        :param shooting: Стратегия стрельбы компьютера (например, mcts.MCTSShooting) или None - случайные выстрелы
+        """
+        self.__size = Game.FIELD_SIZE() if size is None else size
+        self.__fleet = validate_config(self.__size, Game.FLEET() if fleet is None else fleet)
+        self.__renderer = BoardRenderer() if renderer is None else renderer
+        self.__recorder = recorder
+        self.__seed = random.getrandbits(64) if seed is None else seed
+        self.__book = book
+        self.__shooting = shooting
         self.__humans_field = []
         self.__skynet_field = []
 
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def fleet(self):
+        return self.__fleet
+
+    @property
+    def seed(self):
+        return self.__seed
+
     # Вводим константу для определения количества полей игрового поля
     @staticmethod
     def FIELD_SIZE():
         return 6
 
+    # Состав флота: количество палуб каждого корабля
+    @staticmethod
+    def FLEET():
+        return 3, 2, 2, 1, 1, 1
+
     @staticmethod
-    def greet():
+    def greet(size=None, fleet=None):
+        size = Game.FIELD_SIZE() if size is None else size
+        fleet = Game.FLEET() if fleet is None else fleet
+        ships = ', '.join(f'{HumansField.DECKS_NAMES.get(decks_num, f"{decks_num}-палубный")} - {fleet.count(decks_num)}'
+                          for decks_num in sorted(set(fleet), reverse=True))
 
-        greet_text = '''
+        greet_text = f'''
         Добро пожаловать в игру Морской бой!
         -----------
         Тебе предстоит сыграть с компьютером
             
         Правила игры:
         -----------
-        Сначала нужно будет расставить корабли на игровом поле
-        В битве участвует один трехпалубный корабль, два двухпалубных и три однопалубных корабля
+        Сначала нужно будет расставить корабли на игровом поле размером {size}x{size}
+        В битве участвуют корабли (сколько палуб - сколько кораблей): {ships}
         Корабли должны располагаться на расстоянии как минимум одной клетки друг от друга 
         
         Стреляем по очереди с компьютером
@@ -832,31 +2106,29 @@ class Game:
         результатами выстрелов, поле компьютера - только с результатами выстрелов)
         :return: None
         """
-        # Создадим шаблон игрового поля
-        indent = ['          ']
-        field_base = [[" "] * Game.FIELD_SIZE() + indent + [" "] * Game.FIELD_SIZE()for i in range(Game.FIELD_SIZE())]
-
-        for x, ships_row in enumerate(self.__humans_field.ships_area_list):
-            for y, cell in enumerate(ships_row):
-                field_base[x][y] = cell.status
-        humans_alive_decks_num = self.__humans_field.alive_decks_num()
-
-        # Если поле еще не заполнялось - выводить нечего
-        skynet_alive_decks_num = 0
-        if self.__skynet_field:
-            for x, ships_row in enumerate(self.__skynet_field.ships_area_list):
-                for y, cell in enumerate(ships_row):
-                    field_base[x][y+7] = cell.status_public
-            skynet_alive_decks_num = self.__skynet_field.alive_decks_num()
-
-        print(f'     Мои корабли (живых палуб - {humans_alive_decks_num})         Корабли компьютера (живых палуб - {skynet_alive_decks_num})')
-        print('    | 1 | 2 | 3 | 4 | 5 | 6 |            | 1 | 2 | 3 | 4 | 5 | 6 |')
-        print('  ---------------------------         ---------------------------- ')
-        for i, row in enumerate(field_base):
-            row_str = f'  {i + 1} | {" | ".join(row)} | '
-            print(row_str)
-            print(' ----------------------------         ---------------------------- ')
-        print('')
+        # Кадр собирается целиком и выводится одним вызовом write
+        self.__renderer.draw(self.__humans_field, self.__skynet_field)
+
+    def snapshot(self):
+        """
+        Запоминает состояние игровых полей. Поля не копируются: каждое ведет журнал изменений,
+        поэтому снимок стоит O(1), а restore - O(количества изменений после снимка). Снимки работают как стек,
+        см. Field.restore
+        :return: tuple Метка для restore: пары (поле, метка снимка поля), для еще не созданного поля - None
+        """
+        return tuple((field, field.snapshot() if field else None)
+                     for field in (self.__humans_field, self.__skynet_field))
+
+    def restore(self, token):
+        """
+        Возвращает игровые поля в состояние, запомненное snapshot
+        :param token: tuple Метка, которую вернул snapshot
+        :return: None
+        """
+        for field, field_token in token:
+            if field_token is not None:
+                field.restore(field_token)
+        (self.__humans_field, _), (self.__skynet_field, _) = token
 
     def start(self):
         """
@@ -864,16 +2136,23 @@ class Game:
         :return: None
         """
         # Выведем приветствие
-        Game.greet()
+        Game.greet(self.__size, self.__fleet)
 
         #Создадим игровое поле человека
-        self.__humans_field = HumansField(Game.FIELD_SIZE())
+        self.__humans_field = HumansField(self.__size, game=self, fleet=self.__fleet,
+                                          rng=player_rng(self.__seed, 0))
         self.__humans_field.fill_ships()
 
         # Создадим игровое поле компа
-        self.__skynet_field = SkynetField(Game.FIELD_SIZE())
+        self.__skynet_field = SkynetField(self.__size, game=self, fleet=self.__fleet,
+                                          rng=player_rng(self.__seed, 1), book=self.__book,
+                                          shooting=self.__shooting)
         self.__skynet_field.fill_ships()
 
+        # Выстрелы записываются подпиской на изменения клеток обоих полей, человек - игрок 0
+        if self.__recorder is not None:
+            self.__recorder.attach((self.__humans_field, self.__skynet_field))
+
         game_over = False
         current_field = self.__humans_field
         current_enemys_field = self.__skynet_field
@@ -888,8 +2167,65 @@ class Game:
 
             current_field, current_enemys_field = current_enemys_field, current_field
 
+        if self.__recorder is not None:
+            self.__recorder.finish()
+
 
 if __name__ == '__main__':
 
-    game = Game()
-    game.start()
\ No newline at end of file
+    import sys
+
+    # python main.py tournament ... - турнир стратегий без консольной игры
+    if len(sys.argv) > 1 and sys.argv[1] == 'tournament':
+        import tournament
+        tournament.main(sys.argv[2:])
+    else:
+        import argparse
+
+        parser = argparse.ArgumentParser(prog='main.py', description='Морской бой с компьютером')
+        parser.add_argument('--size', type=int, default=Game.FIELD_SIZE(), help='размер игрового поля')
+        parser.add_argument('--fleet', type=int, nargs='+', default=list(Game.FLEET()),
+                            help='количество палуб каждого корабля флота')
+        parser.add_argument('--record', metavar='PATH', help='дописать партию в файл записей')
+        parser.add_argument('--seed', type=int, help='зерно партии: с тем же зерном компьютер играет так же')
+        parser.add_argument('--book', metavar='PATH', help='файл дебютной книги и пула расстановок компьютера')
+        parser.add_argument('--mcts', type=float, metavar='SECONDS',
+                            help='компьютер стреляет поиском MCTS с этим временем на ход')
+        parser.add_argument('--mcts-workers', type=int, help='процессов поиска MCTS (по умолчанию - все ядра)')
+        parser.add_argument('--metrics', metavar='PATH', help='записать гистограммы горячих методов после игры')
+        parser.add_argument('--metrics-format', choices=('json', 'prometheus'), default='json')
+        args = parser.parse_args()
+        recorder = None
+        if args.record:
+            import record
+            recorder = record.GameWriter(args.record, append=True)
+        opening_book = None
+        if args.book:
+            import book
+            opening_book = book.OpeningBook(args.book)
+        shooting = None
+        if args.mcts is not None:
+            import mcts
+            shooting = mcts.MCTSShooting(seconds=args.mcts, workers=args.mcts_workers)
+        instrumentation = None
+        if args.metrics:
+            import instrument
+            instrumentation = instrument.Instrumentation()
+            instrumentation.enable()
+        try:
+            game = Game(args.size, args.fleet, recorder=recorder, seed=args.seed, book=opening_book,
+                        shooting=shooting)
+        except ValueError as e:
+            parser.error(str(e))
+        try:
+            game.start()
+        finally:
+            if recorder is not None:
+                recorder.close()
+            if opening_book is not None:
+                opening_book.close()
+            if shooting is not None:
+                shooting.close()
+            if instrumentation is not None:
+                instrumentation.disable()
+                instrumentation.write(args.metrics, args.metrics_format)
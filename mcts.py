@@ -0,0 +1,387 @@
+"""
+Стрельба поиском по дереву методом Монте-Карло (MCTS).
+
+Скрытая расстановка противника неизвестна, поэтому каждый проход поиска начинается с детерминизации:
+случайной расстановки флота, согласованной с публичным видом поля (LayoutSolver.sample_layout). В ней
+исход любого выстрела известен: промах, попадание или потопление (тогда, как и на настоящем поле,
+клетки вокруг корабля закрываются). Узел дерева - история наблюдений (выстрелы и их исходы), поэтому
+одно дерево накапливает статистику по всем детерминизациям.
+
+Проход: спуск по дереву по правилу UCB1, расширение одним новым узлом, затем доигрывание быстрой
+политикой (добивание соседей подбитых палуб, иначе случайная клетка) не дальше horizon выстрелов.
+Награда - 1 минус доля неизвестных клеток, потраченных на потопление флота; если флот не потоплен
+за horizon выстрелов, оставшиеся выстрелы оцениваются по плотности оставшихся палуб. Число ходов узла
+растет по мере посещений (progressive widening: не больше widening * sqrt(посещений) ходов), новые ходы
+берутся из клеток добивания или из неизвестных палуб текущей детерминизации - то есть с вероятностью,
+пропорциональной вероятности попадания. Поэтому поиск работает и на больших полях, где клеток
+слишком много, чтобы попробовать каждую.
+
+Поиск параллелится по корню: каждый процесс пула строит свое дерево со своим зерном, статистика
+ходов корня складывается, выбирается самый посещаемый ход. Время хода ограничено seconds: процессы
+сами завершают поиск к сроку, а результаты, не пришедшие к сроку с небольшим запасом, не ждут - ход
+выбирается по тем, что уже есть (anytime). Без ограничения времени поиск выполняет ровно rollouts
+проходов, и при заданном генераторе случайных чисел ход повторяется в точности.
+
+Сила против скорости: больше rollouts и seconds - сильнее ход, короче horizon - больше проходов
+в секунду, но грубее оценка, exploration - баланс исследования и использования в UCB1.
+
+Пример:
+    with MCTSShooting(seconds=0.5) as shooting:
+        row, col = shooting.choose(field, fleet, rng)
+        print(shooting.last_stats)
+"""
+import math
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from main import derive_seed
+from solver import LayoutSolver
+
+# Статистика одного хода: проходов поиска, секунд, узлов во всех деревьях, процессов,
+# и не пришли ли к сроку результаты части процессов
+MoveStats = namedtuple('MoveStats', ['rollouts', 'seconds', 'nodes', 'workers', 'timed_out'])
+
+# Исходы выстрела в узлах дерева
+MISS, HIT, SUNK = 0, 1, 2
+
+# Сколько раз подряд можно не суметь построить детерминизацию, прежде чем прекратить поиск
+SAMPLE_FAILURES = 16
+
+
+class _Node:
+    """
+    Узел дерева: количество посещений и ходы. Ход - список [посещений, сумма наград, {исход: узел}]
+    """
+    __slots__ = ('visits', 'actions')
+
+    def __init__(self):
+        self.visits = 0
+        self.actions = {}
+
+
+class _Simulation:
+    """
+    Партия в одной детерминизации: исходы выстрелов, закрытые клетки и подбитые, но не потопленные палубы
+    """
+
+    def __init__(self, size, layout, hits, unknown, unknown_set, rng):
+        self.size = size
+        self.rng = rng
+        self.unknown = unknown
+        self.unknown_set = unknown_set
+        # Клетки из unknown, которые в этом проходе уже обстреляны или закрыты границами потопленных кораблей
+        self.closed = set()
+        self.decks = {}
+        self.ships = []
+        self.left = []
+        for ship, (row, col, orientation, decks_num) in enumerate(layout):
+            cells = [(row - 1 + i * orientation) * size + col - 1 + i * (1 - orientation) for i in range(decks_num)]
+            for pos in cells:
+                self.decks[pos] = ship
+            self.ships.append(cells)
+            self.left.append(sum(pos not in hits for pos in cells))
+        self.alive = sum(self.left)
+        self.open_hits = [pos for pos in hits if self.left[self.decks[pos]]]
+        self.shots = 0
+
+    def is_unknown(self, pos):
+        return pos in self.unknown_set and pos not in self.closed
+
+    def fire(self, pos):
+        """
+        :return: int Исход: MISS, HIT или SUNK
+        """
+        self.shots += 1
+        self.closed.add(pos)
+        ship = self.decks.get(pos)
+        if ship is None:
+            return MISS
+        self.left[ship] -= 1
+        self.alive -= 1
+        if self.left[ship]:
+            self.open_hits.append(pos)
+            return HIT
+        size, cells = self.size, self.ships[ship]
+        self.open_hits = [hit for hit in self.open_hits if self.decks[hit] != ship]
+        for pos in cells:
+            row, col = divmod(pos, size)
+            for x in range(max(0, row - 1), min(size, row + 2)):
+                for y in range(max(0, col - 1), min(size, col + 2)):
+                    if x * size + y in self.unknown_set:
+                        self.closed.add(x * size + y)
+        return SUNK
+
+    def targets(self):
+        """
+        :return: list Неизвестные клетки по горизонтали и вертикали от подбитых, но не потопленных палуб
+        """
+        size, result = self.size, []
+        for pos in self.open_hits:
+            row, col = divmod(pos, size)
+            for x, y in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if 0 <= x < size and 0 <= y < size and self.is_unknown(x * size + y):
+                    result.append(x * size + y)
+        return result
+
+    def random_unknown(self):
+        unknown, closed, rng = self.unknown, self.closed, self.rng
+        # Пока закрыта небольшая доля клеток, выборка с отбрасыванием дешевле, чем список свободных клеток
+        for _ in range(16):
+            pos = unknown[rng.randrange(len(unknown))]
+            if pos not in closed:
+                return pos
+        return rng.choice([pos for pos in unknown if pos not in closed])
+
+    def policy(self):
+        """
+        Быстрая политика доигрывания: добивание, иначе случайная неизвестная клетка
+        """
+        targets = self.targets()
+        return self.rng.choice(targets) if targets else self.random_unknown()
+
+    def candidate(self, actions):
+        """
+        Новый ход для расширения узла: клетка добивания или неизвестная палуба этой детерминизации
+        :param actions: Ходы, которые у узла уже есть
+        :return: int Клетка или None, если подходящих новых клеток нет
+        """
+        targets = [pos for pos in self.targets() if pos not in actions]
+        if self.open_hits:
+            return self.rng.choice(targets) if targets else None
+        decks = [pos for pos in self.decks if pos not in actions and self.is_unknown(pos)]
+        return self.rng.choice(decks) if decks else None
+
+
+def search(size, fleet, hits, misses, seconds=None, rollouts=None, exploration=2.0, widening=2.0, horizon=100,
+           seed=None):
+    """
+    Строит дерево поиска для позиции и возвращает статистику ходов корня. Функция верхнего уровня модуля,
+    чтобы ее можно было выполнять в процессах пула
+    :param size: int Размер поля
+    :param fleet: Состав флота противника
+    :param hits: Координаты (строка, колонка) попаданий
+    :param misses: Координаты (строка, колонка) клеток без кораблей
+    :param seconds: float Время поиска или None - без ограничения
+    :param rollouts: int Наибольшее количество проходов или None - без ограничения
+    :param exploration: float Коэффициент исследования UCB1
+    :param widening: float Коэффициент роста числа ходов узла
+    :param horizon: int Наибольшее количество выстрелов доигрывания
+    :param seed: Зерно генератора случайных чисел
+    :return: tuple ({клетка: (посещений, сумма наград)} для ходов корня, проходов, узлов)
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    solver = LayoutSolver(size, fleet, hits, misses)
+    known = {(row - 1) * size + col - 1 for row, col in tuple(hits) + tuple(misses)}
+    hit_cells = frozenset((row - 1) * size + col - 1 for row, col in hits)
+    unknown = [pos for pos in range(size * size) if pos not in known]
+    unknown_set = frozenset(unknown)
+    root, nodes, done, failures = _Node(), 1, 0, 0
+    # Сколько детерминизаций ставят палубу в клетку: оценка вероятности попадания для ходов корня
+    deck_counts = dict.fromkeys(unknown, 0)
+    while (rollouts is None or done < rollouts) and failures < SAMPLE_FAILURES and unknown:
+        # Хотя бы один проход выполняется даже после срока, иначе ходу не из чего выбирать
+        if seconds is not None and done and time.perf_counter() - started >= seconds:
+            break
+        layout = solver.sample_layout(rng)
+        if layout is None:
+            failures += 1
+            continue
+        failures = 0
+        simulation = _Simulation(size, layout, hit_cells, unknown, unknown_set, rng)
+        for pos in simulation.decks:
+            if pos in unknown_set:
+                deck_counts[pos] += 1
+
+        # Спуск и расширение
+        node, path = root, []
+        while simulation.alive:
+            action = None
+            if len(node.actions) < widening * math.sqrt(node.visits + 1):
+                action = simulation.candidate(node.actions)
+            if action is None and node is root and node.actions:
+                # В корне исследование взвешено вероятностью попадания (PUCT): ходы в клетки, где палуба
+                # стоит чаще, проверяются больше
+                scale = exploration * math.sqrt(node.visits) / (done + 1)
+                action = max(node.actions, key=lambda a: node.actions[a][1] / node.actions[a][0]
+                             + scale * deck_counts[a] / (1 + node.actions[a][0]))
+            elif action is None and node.actions:
+                log_visits = math.log(node.visits + 1)
+                action = max(node.actions, key=lambda a: node.actions[a][1] / node.actions[a][0]
+                             + exploration * math.sqrt(log_visits / node.actions[a][0]))
+            if action is None:
+                break
+            entry = node.actions.get(action)
+            if entry is None:
+                entry = node.actions[action] = [0, 0.0, {}]
+            path.append((node, entry))
+            outcome = simulation.fire(action)
+            child = entry[2].get(outcome)
+            if child is None:
+                entry[2][outcome] = _Node()
+                nodes += 1
+                break
+            node = child
+
+        # Доигрывание
+        shots = simulation.shots
+        while simulation.alive and simulation.shots - shots < horizon:
+            simulation.fire(simulation.policy())
+        total = simulation.shots
+        if simulation.alive:
+            free = len(unknown) - len(simulation.closed)
+            total += free * simulation.alive / (simulation.alive + 1)
+        reward = 1.0 - total / len(unknown)
+        for node, entry in path:
+            node.visits += 1
+            entry[0] += 1
+            entry[1] += reward
+        done += 1
+    return {pos: (entry[0], entry[1]) for pos, entry in root.actions.items()}, done, nodes
+
+
+class MCTSShooting:
+    """
+    Стратегия стрельбы поиском MCTS (см. описание модуля). Реализует тот же интерфейс, что и стратегии
+    модуля strategies, поэтому годится и для Engine, и для компьютера консольной игры (SkynetField)
+
+    Свойства
+    -----------
+    seconds : float
+        Время на ход или None - без ограничения (тогда ход определяется только rollouts)
+
+    rollouts : int
+        Наибольшее количество проходов поиска на ход (на все процессы вместе) или None - без ограничения
+
+    workers : int
+        Количество процессов поиска. 1 - поиск в текущем процессе
+
+    last_stats : MoveStats
+        Статистика последнего хода или None
+
+    history : list
+        Статистика всех ходов (объекты MoveStats)
+
+    Методы
+    -----------
+    choose(field, fleet, rng) : -> tuple
+        Выбирает клетку для выстрела по полю противника
+
+    close() : -> None
+        Останавливает процессы поиска
+    """
+
+    # Сколько ждать результаты процессов сверх времени хода, прежде чем выбрать ход без них
+    GRACE = 0.05
+
+    def __init__(self, seconds=1.0, rollouts=None, workers=None, exploration=2.0, widening=2.0, horizon=100):
+        """
+        :param seconds: float Время на ход или None
+        :param rollouts: int Наибольшее количество проходов на ход или None
+        :param workers: int Количество процессов, по умолчанию - все ядра
+        :param exploration: float Коэффициент исследования UCB1
+        :param widening: float Коэффициент роста числа ходов узла
+        :param horizon: int Наибольшее количество выстрелов доигрывания
+        """
+        if seconds is None and rollouts is None:
+            raise ValueError('Either seconds or rollouts must limit the search')
+        self.__seconds = seconds
+        self.__rollouts = rollouts
+        self.__workers = workers or os.cpu_count() or 1
+        self.__options = {'exploration': exploration, 'widening': widening, 'horizon': horizon}
+        self.__executor = None
+        self.__history = []
+
+    @property
+    def seconds(self):
+        return self.__seconds
+
+    @property
+    def rollouts(self):
+        return self.__rollouts
+
+    @property
+    def workers(self):
+        return self.__workers
+
+    @property
+    def last_stats(self):
+        return self.__history[-1] if self.__history else None
+
+    @property
+    def history(self):
+        return list(self.__history)
+
+    def choose(self, field, fleet, rng):
+        """
+        :param field: Объект Field противника
+        :param fleet: Состав флота противника
+        :param rng: random.Random Генератор случайных чисел: из него получаются зерна поиска
+        :return: tuple (строка, колонка)
+        """
+        started = time.perf_counter()
+        hits, misses = [], []
+        for row in range(1, field.size + 1):
+            for col, status in enumerate(field.row_statuses(row, True), 1):
+                if status == 'X':
+                    hits.append((row, col))
+                elif status != ' ':
+                    misses.append((row, col))
+        seed = rng.getrandbits(64)
+        workers = self.__workers
+        rollouts = self.__rollouts if self.__rollouts is None else -(-self.__rollouts // workers)
+        # Чтение поля тоже входит во время хода: на поиск остается только остаток
+        seconds = None if self.__seconds is None else max(0.0, self.__seconds - (time.perf_counter() - started))
+        arguments = (field.size, tuple(fleet), hits, misses, seconds, rollouts)
+
+        timed_out = False
+        if workers == 1:
+            results = [search(*arguments, seed=seed, **self.__options)]
+        else:
+            if self.__executor is None:
+                self.__executor = ProcessPoolExecutor(max_workers=workers)
+            futures = [self.__executor.submit(search, *arguments, seed=derive_seed(seed, worker), **self.__options)
+                       for worker in range(workers)]
+            timeout = None if seconds is None else seconds + self.GRACE
+            finished, pending = wait(futures, timeout=timeout)
+            for future in pending:
+                future.cancel()
+            timed_out = bool(pending)
+            # Порядок результатов не зависит от того, какой процесс закончил раньше
+            results = [future.result() for future in futures if future in finished]
+
+        actions = {}
+        for stats, _, _ in results:
+            for pos, (visits, total) in stats.items():
+                merged = actions.setdefault(pos, [0, 0.0])
+                merged[0] += visits
+                merged[1] += total
+        if actions:
+            pos = max(actions, key=lambda p: (actions[p][0], actions[p][1] / actions[p][0], -p))
+            target = divmod(pos, field.size)
+            target = target[0] + 1, target[1] + 1
+        else:
+            # Ни один поиск не успел закончиться: лучший из известных ходов - случайная неизвестная клетка
+            row, col, _ = field.window_index(1, True).choice(rng)
+            target = row, col
+        self.__history.append(MoveStats(sum(result[1] for result in results), time.perf_counter() - started,
+                                        sum(result[2] for result in results), len(results), timed_out))
+        return target
+
+    def close(self):
+        """
+        Останавливает процессы поиска. Следующий ход запустит их заново
+        :return: None
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
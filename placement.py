@@ -0,0 +1,319 @@
+"""
+Генератор расстановок флота, который всегда находит допустимую расстановку, если она существует.
+
+Вместо случайного выбора зон с отказом от корабля, которому не нашлось места (так раньше делал SkynetField),
+используется поиск с возвратом по битовым маскам. Для каждого размера корабля хранятся маски начал свободных
+зон (горизонтальных и вертикальных), после постановки корабля они обновляются инкрементально: из них
+убираются зоны, задевающие корабль или его границу. Очередным ставится самый ограниченный корабль - тот размер,
+для которого осталось меньше всего зон, а ветка отбрасывается сразу, как только для какого-то размера зон
+стало меньше, чем осталось кораблей этого размера.
+
+В режиме uniform расстановки выбираются равновероятно среди всех допустимых: на небольших полях по счетчикам
+точного перебора LayoutSolver, на больших - выборкой с отклонением (корабли независимо ставятся в случайные
+зоны пустого поля, расстановка с касающимися кораблями отбрасывается целиком)
+"""
+import random
+from collections import Counter
+
+from main import iter_bits, popcount, repeat_bits, run_starts
+from solver import LayoutSolver
+
+
+def spread_back(mask, length, step=1):
+    """
+    Отмечает все позиции p, для которых хотя бы один из битов p, p + step, ..., p + (length - 1) * step
+    установлен в маске. Двойственна run_starts и тоже работает удвоением за O(log length) операций
+    :param mask: int Битовая маска
+    :param length: int Длина серии
+    :param step: int Расстояние между соседними битами серии
+    :return: int Маска начал серий, задевающих установленные биты
+    """
+    result, span = mask, 1
+    while span * 2 <= length:
+        result |= result >> (span * step)
+        span *= 2
+    if span < length:
+        result |= result >> ((length - span) * step)
+    return result
+
+
+class LayoutGenerator:
+    """
+    Генератор допустимых расстановок флота
+
+    Свойства
+    -----------
+    size : int
+        Размер поля
+
+    fleet : tuple
+        Состав флота
+
+    uniform : bool
+        True - расстановки выбираются равновероятно среди всех допустимых
+
+    Методы
+    -----------
+    generate(rng, free) : -> list
+        Строит расстановку в виде списка кораблей (строка, колонка, ориентация, количество палуб)
+    """
+
+    # Сколько случайных проб сделать при выборе зоны, прежде чем перебрать все зоны в случайном порядке
+    PROBES = 16
+
+    # Сколько попыток выборки с отклонением сделать в режиме uniform, прежде чем перейти к поиску с возвратом
+    UNIFORM_ATTEMPTS = 1000
+
+    def __init__(self, size, fleet, uniform=False):
+        """
+        :param size: int Размер поля
+        :param fleet: Последовательность размеров кораблей
+        :param uniform: bool True - выбирать расстановки равновероятно
+        """
+        self.__size = size
+        self.__fleet = tuple(fleet)
+        self.__uniform = uniform
+        self.__full = (1 << (size * size)) - 1
+        # Маски клеток, из которых можно сдвинуться влево и вправо, не перейдя на другую строку
+        self.__not_last_col = repeat_bits((1 << (size - 1)) - 1, size, size)
+        self.__not_first_col = self.__not_last_col << 1
+        # Маски клеток, с которых может начинаться горизонтальная зона каждого размера
+        self.__starts = {decks_num: repeat_bits((1 << (size - decks_num + 1)) - 1, size, size)
+                         for decks_num in set(self.__fleet) if decks_num <= size}
+        self.__solvers = {}
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def fleet(self):
+        return self.__fleet
+
+    @property
+    def uniform(self):
+        return self.__uniform
+
+    def generate(self, rng=None, free=None):
+        """
+        Строит допустимую расстановку флота
+        :param rng: random.Random Генератор случайных чисел
+        :param free: int Маска клеток, в которые можно ставить корабли (например, Field.free_mask()).
+        None - все поле свободно
+        :return: list Корабли в виде (строка, колонка, ориентация, количество палуб).
+        Если расставить флот невозможно - IndexError
+        """
+        rng = rng or random
+        free = self.__full if free is None else free & self.__full
+        if any(decks_num not in self.__starts for decks_num in self.__fleet):
+            raise IndexError(f'Fleet {self.__fleet} does not fit a {self.__size}x{self.__size} field')
+
+        if self.__uniform:
+            if self.__size * self.__size <= LayoutSolver.EXACT_CELLS_LIMIT:
+                layout = self.__solver(free).sample_uniform(rng)
+                if layout is None:
+                    raise IndexError(f'Fleet {self.__fleet} cannot be placed on the field')
+                return layout
+            layout = self.__rejection_sample(free, rng)
+            if layout is not None:
+                return layout
+            # Выборка с отклонением почти всегда отклоняется на слишком плотных флотах,
+            # тогда расстановку строит поиск с возвратом, уже не строго равновероятно
+        return self.__search(free, rng)
+
+    def __solver(self, free):
+        """
+        :return: LayoutSolver для маски свободных клеток. Решатели кэшируются, чтобы точный перебор
+        выполнялся один раз
+        """
+        solver = self.__solvers.get(free)
+        if solver is None:
+            size = self.__size
+            misses = [(pos // size + 1, pos % size + 1) for pos in iter_bits(self.__full & ~free)]
+            solver = LayoutSolver(size, self.__fleet, misses=misses)
+            self.__solvers[free] = solver
+        return solver
+
+    def __neighbourhood(self, cells):
+        """
+        :return: int Маска клеток корабля вместе с соседними по горизонтали, вертикали и диагонали
+        """
+        line = cells | ((cells << 1) & self.__not_first_col) | ((cells >> 1) & self.__not_last_col)
+        return (line | (line << self.__size) | (line >> self.__size)) & self.__full
+
+    def __ship_cells(self, pos, orientation, decks_num):
+        step = self.__size if orientation else 1
+        return repeat_bits(1, step, decks_num) << pos
+
+    def __windows(self, free):
+        """
+        :return: dict Для каждого размера корабля пара масок начал свободных зон (горизонтальных, вертикальных)
+        """
+        size = self.__size
+        return {decks_num: (run_starts(free, decks_num) & starts,
+                            run_starts(free, decks_num, size) if decks_num > 1 else 0)
+                for decks_num, starts in self.__starts.items()}
+
+    def __place(self, windows, remaining, pos, orientation, decks_num):
+        """
+        Обновляет маски зон после постановки корабля: убирает зоны, задевающие корабль и его границу
+        :return: dict Новые маски зон для размеров, корабли которых еще осталось поставить
+        """
+        size = self.__size
+        taken = self.__neighbourhood(self.__ship_cells(pos, orientation, decks_num))
+        updated = {}
+        for length, (horizontal, vertical) in windows.items():
+            if remaining[length]:
+                updated[length] = (horizontal & ~spread_back(taken, length),
+                                   vertical & ~spread_back(taken, length, size) if vertical else 0)
+        return updated
+
+    @staticmethod
+    def __most_constrained(windows, remaining):
+        """
+        Выбирает размер корабля, для которого осталось меньше всего зон
+        :return: int Размер корабля или None, если для какого-то размера зон меньше, чем оставшихся кораблей
+        """
+        best, best_count = None, None
+        for decks_num, left in remaining.items():
+            if not left:
+                continue
+            horizontal, vertical = windows[decks_num]
+            count = popcount(horizontal) + (popcount(vertical) if vertical else 0)
+            if count < left:
+                return None
+            if best is None or count < best_count or (count == best_count and decks_num > best):
+                best, best_count = decks_num, count
+        return best
+
+    def __candidates(self, horizontal, vertical, rng):
+        """
+        Перебирает зоны в случайном порядке: сначала несколько случайных проб (на просторном поле их хватает),
+        затем все оставшиеся зоны, перемешанные
+        :return: Генератор пар (номер первой клетки, ориентация)
+        """
+        cells = self.__size * self.__size
+        tried = set()
+        for _ in range(self.PROBES):
+            orientation = rng.randrange(2) if vertical else 0
+            pos = rng.randrange(cells)
+            if ((vertical if orientation else horizontal) >> pos) & 1 and (pos, orientation) not in tried:
+                tried.add((pos, orientation))
+                yield pos, orientation
+        rest = [(pos, 0) for pos in iter_bits(horizontal)] + [(pos, 1) for pos in iter_bits(vertical)]
+        rng.shuffle(rest)
+        for candidate in rest:
+            if candidate not in tried:
+                yield candidate
+
+    def __search(self, free, rng):
+        """
+        Поиск с возвратом без рекурсии, чтобы флоты из сотен кораблей не упирались в глубину стека
+        :return: list Расстановка. Если ее не существует - IndexError
+        """
+        size = self.__size
+        remaining = Counter(self.__fleet)
+        left = len(self.__fleet)
+        windows = self.__windows(free)
+        # Кадр стека: размер корабля, генератор его зон и маски зон до его постановки.
+        # Если корабль кадра поставлен, он последний в layout и len(layout) == len(stack)
+        stack, layout = [], []
+        descend = True
+        while True:
+            if descend:
+                if not left:
+                    return [(pos // size + 1, pos % size + 1, orientation, decks_num)
+                            for pos, orientation, decks_num in layout]
+                decks_num = self.__most_constrained(windows, remaining)
+                if decks_num is not None:
+                    stack.append((decks_num, self.__candidates(*windows[decks_num], rng), windows))
+
+            descend = False
+            while stack and not descend:
+                decks_num, candidates, before = stack[-1]
+                if len(layout) == len(stack):
+                    layout.pop()
+                    remaining[decks_num] += 1
+                    left += 1
+                candidate = next(candidates, None)
+                if candidate is None:
+                    stack.pop()
+                    continue
+                pos, orientation = candidate
+                remaining[decks_num] -= 1
+                left -= 1
+                layout.append((pos, orientation, decks_num))
+                windows = self.__place(before, remaining, pos, orientation, decks_num)
+                descend = True
+
+            if not descend:
+                raise IndexError(f'Fleet {self.__fleet} cannot be placed on the field')
+
+    def __rejection_sample(self, free, rng):
+        """
+        Выборка с отклонением: каждый корабль независимо ставится в равновероятно выбранную зону, расстановка
+        принимается, только если корабли не касаются друг друга. Принятые расстановки равновероятны
+        :return: list Расстановка или None, если за UNIFORM_ATTEMPTS попыток ничего не принято
+        """
+        size, cells = self.__size, self.__size * self.__size
+        windows = self.__windows(free)
+        for decks_num in self.__fleet:
+            if not any(windows[decks_num]):
+                return None
+        for _ in range(self.UNIFORM_ATTEMPTS):
+            blocked = 0
+            layout = []
+            for decks_num in self.__fleet:
+                horizontal, vertical = windows[decks_num]
+                # Равновероятная зона: пробуем случайные (клетка, ориентация), пока не попадем в свободную зону
+                while True:
+                    orientation = rng.randrange(2) if decks_num > 1 else 0
+                    pos = rng.randrange(cells)
+                    if ((vertical if orientation else horizontal) >> pos) & 1:
+                        break
+                ship = self.__ship_cells(pos, orientation, decks_num)
+                if ship & blocked:
+                    break
+                blocked |= self.__neighbourhood(ship)
+                layout.append((pos // size + 1, pos % size + 1, orientation, decks_num))
+            else:
+                return layout
+        return None
+
+
+class BacktrackingPlacement:
+    """
+    Стратегия расстановки для движка Engine: расстановку строит LayoutGenerator, поэтому она никогда
+    не заходит в тупик, если флот вообще помещается на поле
+    """
+
+    def __init__(self, uniform=False):
+        """
+        :param uniform: bool True - выбирать расстановки равновероятно
+        """
+        self.__uniform = uniform
+        self.__generators = {}
+
+    def place(self, field, fleet, rng):
+        """
+        :param field: Объект Field, на котором расставляются корабли
+        :param fleet: Последовательность размеров кораблей
+        :param rng: random.Random Генератор случайных чисел
+        :return: None
+        """
+        key = (field.size, tuple(fleet))
+        generator = self.__generators.get(key)
+        if generator is None:
+            generator = LayoutGenerator(field.size, fleet, self.__uniform)
+            self.__generators[key] = generator
+        for row, col, orientation, decks_num in generator.generate(rng, field.free_mask()):
+            field.place_ship(row, col, orientation, decks_num)
+
+
+class UniformPlacement(BacktrackingPlacement):
+    """
+    Стратегия расстановки, выбирающая расстановки равновероятно среди всех допустимых
+    """
+
+    def __init__(self):
+        super().__init__(uniform=True)
@@ -0,0 +1,443 @@
+"""
+Компактный двоичный формат записи партий и потоковое воспроизведение.
+
+Файл записей начинается с сигнатуры MAGIC, за ней идут записи партий. Запись - длина содержимого (varint),
+затем содержимое, все числа в котором - varint (беззнаковые LEB128: 7 бит на байт, старший бит - признак
+продолжения, поэтому числа до 127 занимают один байт):
+    размер поля
+    для каждого из двух игроков: количество кораблей, затем для каждого корабля
+        (номер первой палубы << 1) | ориентация и количество палуб
+    количество выстрелов, затем выстрелы, упакованные по битам
+        (номер клетки << 2) | (номер стрелявшего игрока << 1) | попадание
+
+Номер клетки - (row - 1) * size + (col - 1), как в битовых масках полей. Каждый выстрел занимает
+shot_width(size) бит (на поле 6x6 - ровно байт), поэтому группа из восьми выстрелов - целое число байтов,
+и выстрелы кодируются и декодируются группами за линейное время. Партия на поле 6x6 со стандартным флотом
+и случайной стрельбой занимает около 100 байт, в JSON - больше килобайта.
+
+Рядом с файлом записей хранится индекс (файл с суффиксом INDEX_SUFFIX): сигнатура INDEX_MAGIC и смещения
+начала каждой записи - 64-битные беззнаковые числа. GameArchive отображает оба файла в память (mmap),
+поэтому партия с номером N читается без чтения остальных.
+
+Запись партии подключается к полям через Field.add_listener: каждый выстрел меняет публичный статус клетки
+с ' ' на 'X' или 'T', и GameWriter записывает его, ничего не меняя в логике ходов
+"""
+import mmap
+import os
+from array import array
+from collections import namedtuple
+
+from bitboard import BitboardField
+from engine import ShotResult
+
+MAGIC = b'SBREC1\n\x00'
+INDEX_MAGIC = b'SBIDX1\n\x00'
+INDEX_SUFFIX = '.idx'
+
+# Записанная партия: размер поля, расстановки обоих игроков (кортежи кораблей (строка, колонка, ориентация,
+# количество палуб)) и выстрелы (кортежи (игрок, строка, колонка, попадание))
+GameRecord = namedtuple('GameRecord', ['size', 'layouts', 'shots'])
+
+
+def write_varint(buffer, value):
+    """
+    Дописывает число в формате varint
+    :param buffer: bytearray Буфер
+    :param value: int Неотрицательное число
+    :return: None
+    """
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, pos):
+    """
+    Читает число в формате varint
+    :param data: bytes, bytearray, mmap или memoryview
+    :param pos: int Позиция первого байта числа
+    :return: tuple (число, позиция следующего за ним байта)
+    """
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def shot_width(size):
+    """
+    :param size: int Размер поля
+    :return: int Количество бит на один выстрел: номер клетки, номер игрока и признак попадания
+    """
+    return max(1, (size * size - 1).bit_length()) + 2
+
+
+def encode_game(record):
+    """
+    :param record: GameRecord Партия
+    :return: bytearray Содержимое записи (без длины)
+    """
+    size = record.size
+    buffer = bytearray()
+    write_varint(buffer, size)
+    for layout in record.layouts:
+        write_varint(buffer, len(layout))
+        for row, col, orientation, decks_num in layout:
+            write_varint(buffer, (((row - 1) * size + col - 1) << 1) | orientation)
+            write_varint(buffer, decks_num)
+    shots = record.shots
+    write_varint(buffer, len(shots))
+    width = shot_width(size)
+    for first in range(0, len(shots), 8):
+        group = 0
+        for i, (player, row, col, hit) in enumerate(shots[first:first + 8]):
+            group |= ((((row - 1) * size + col - 1) << 2) | (player << 1) | int(hit)) << (i * width)
+        buffer += group.to_bytes(width, 'little')
+    return buffer
+
+
+def decode_game(data, pos=0):
+    """
+    :param data: Байты, в которых лежит содержимое записи
+    :param pos: int Позиция начала содержимого
+    :return: GameRecord Партия
+    """
+    size, pos = read_varint(data, pos)
+    layouts = []
+    for _ in range(2):
+        count, pos = read_varint(data, pos)
+        layout = []
+        for _ in range(count):
+            packed, pos = read_varint(data, pos)
+            decks_num, pos = read_varint(data, pos)
+            cell = packed >> 1
+            layout.append((cell // size + 1, cell % size + 1, packed & 1, decks_num))
+        layouts.append(tuple(layout))
+    count, pos = read_varint(data, pos)
+    width = shot_width(size)
+    mask = (1 << width) - 1
+    shots = []
+    for first in range(0, count, 8):
+        group = int.from_bytes(data[pos:pos + width], 'little')
+        pos += width
+        for _ in range(min(8, count - first)):
+            packed = group & mask
+            group >>= width
+            cell = packed >> 2
+            shots.append(((packed >> 1) & 1, cell // size + 1, cell % size + 1, bool(packed & 1)))
+    return GameRecord(size, tuple(layouts), tuple(shots))
+
+
+def field_layout(field):
+    """
+    Описывает расстановку кораблей поля
+    :param field: Объект Field
+    :return: tuple Корабли в виде (строка, колонка, ориентация, количество палуб)
+    """
+    return ships_layout(field.ships)
+
+
+def ships_layout(ships):
+    """
+    Описывает расстановку кораблей
+    :param ships: Последовательность объектов Ship (хотя бы с одной палубой)
+    :return: tuple Корабли в виде (строка, колонка, ориентация, количество палуб)
+    """
+    layout = []
+    for ship in ships:
+        first = min(ship.decks, key=lambda deck: (deck.row, deck.col))
+        orientation = int(len(ship.decks) > 1 and ship.decks[0].col == ship.decks[1].col)
+        layout.append((first.row, first.col, orientation, len(ship.decks)))
+    return tuple(layout)
+
+
+class GameWriter:
+    """
+    Запись партий в файл
+
+    Свойства
+    -----------
+    games : int
+        Количество записанных партий
+
+    Методы
+    -----------
+    attach(fields) : -> None
+        Начинает запись партии: подписывается на выстрелы по полям игроков 0 и 1
+
+    finish() : -> None
+        Заканчивает запись текущей партии: сохраняет расстановки и все выстрелы
+
+    write(record) : -> None
+        Записывает готовую партию GameRecord
+
+    close() : -> None
+        Закрывает файл записей и сохраняет индекс
+    """
+
+    def __init__(self, path, append=False):
+        """
+        :param path: str Путь к файлу записей. Индекс сохраняется в path + INDEX_SUFFIX
+        :param append: bool True - дописывать партии в существующий файл
+        """
+        self.__path = path
+        self.__offsets = array('Q')
+        exists = append and os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            self.__offsets.extend(record_offsets(path))
+        self.__stream = open(path, 'ab' if exists else 'wb')
+        if not exists:
+            self.__stream.write(MAGIC)
+        self.__fields = None
+        self.__shots = []
+
+    @property
+    def games(self):
+        return len(self.__offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def attach(self, fields):
+        """
+        Начинает запись партии. Поле с номером i - поле игрока i, выстрелы по нему делает игрок 1 - i
+        :param fields: Пара объектов Field
+        :return: None
+        """
+        if self.__fields is not None:
+            raise ValueError('Previous game is still being recorded, call finish() first')
+        self.__fields = tuple(fields)
+        self.__shots = []
+        for field in self.__fields:
+            field.add_listener(self.__status_changed)
+
+    def __status_changed(self, field, row, col, old_status, new_status, public):
+        # Выстрел - это смена публичного статуса пустой клетки на попадание или промах
+        if public and old_status == ' ' and new_status in ('X', 'T'):
+            player = 1 if field is self.__fields[0] else 0
+            self.__shots.append((player, row, col, new_status == 'X'))
+
+    def finish(self):
+        """
+        Заканчивает запись текущей партии и отписывается от полей
+        :return: None
+        """
+        if self.__fields is None:
+            raise ValueError('No game is being recorded')
+        for field in self.__fields:
+            field.remove_listener(self.__status_changed)
+        record = GameRecord(self.__fields[0].size, tuple(field_layout(field) for field in self.__fields),
+                            tuple(self.__shots))
+        self.__fields = None
+        self.__shots = []
+        self.write(record)
+
+    def write(self, record):
+        """
+        Записывает партию
+        :param record: GameRecord Партия
+        :return: None
+        """
+        payload = encode_game(record)
+        header = bytearray()
+        write_varint(header, len(payload))
+        self.__offsets.append(self.__stream.tell())
+        self.__stream.write(header)
+        self.__stream.write(payload)
+
+    def close(self):
+        """
+        Закрывает файл записей и сохраняет индекс смещений
+        :return: None
+        """
+        if self.__stream.closed:
+            return
+        self.__stream.close()
+        write_index(self.__path, self.__offsets)
+
+
+def write_index(path, offsets):
+    """
+    Сохраняет индекс смещений записей
+    :param path: str Путь к файлу записей
+    :param offsets: array('Q') Смещения записей
+    :return: None
+    """
+    offsets = array('Q', offsets)
+    with open(path + INDEX_SUFFIX, 'wb') as stream:
+        stream.write(INDEX_MAGIC)
+        stream.write(offsets.tobytes())
+
+
+def iter_records(path, chunk_size=1 << 16):
+    """
+    Потоково читает записи из файла: в памяти одновременно находятся только текущий кусок файла и одна запись
+    :param path: str Путь к файлу записей
+    :param chunk_size: int Размер куска, читаемого за раз
+    :return: Генератор пар (смещение записи, содержимое записи)
+    """
+    with open(path, 'rb') as stream:
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a game record file')
+        buffer = b''
+        buffer_offset = len(MAGIC)  # смещение в файле первого байта buffer
+        while True:
+            pos = 0
+            while True:
+                # Длина записи - varint не длиннее 10 байт, содержимое должно целиком поместиться в буфер
+                try:
+                    length, start = read_varint(buffer, pos)
+                except IndexError:
+                    break
+                if start + length > len(buffer):
+                    break
+                yield buffer_offset + pos, buffer[start:start + length]
+                pos = start + length
+            chunk = stream.read(max(chunk_size, len(buffer) - pos))
+            buffer, buffer_offset = buffer[pos:] + chunk, buffer_offset + pos
+            if not chunk:
+                if buffer:
+                    raise ValueError(f'{path} ends with a truncated record')
+                return
+
+
+def read_games(path):
+    """
+    Потоково читает партии из файла записей
+    :param path: str Путь к файлу записей
+    :return: Генератор объектов GameRecord
+    """
+    for _, payload in iter_records(path):
+        yield decode_game(payload)
+
+
+def index_is_stale(path):
+    """
+    Проверяет, нужно ли заново построить индекс файла записей: индекса нет, файл записей изменен после
+    индекса (например, дописан) или последнее смещение индекса не меньше размера файла (файл урезан)
+    :param path: str Путь к файлу записей
+    :return: bool True, если индекс нужно построить заново
+    """
+    index_path = path + INDEX_SUFFIX
+    if not os.path.exists(index_path) or os.stat(path).st_mtime_ns > os.stat(index_path).st_mtime_ns:
+        return True
+    with open(index_path, 'rb') as stream:
+        header = stream.read(len(INDEX_MAGIC))
+        last = array('Q')
+        if os.path.getsize(index_path) >= len(INDEX_MAGIC) + last.itemsize:
+            stream.seek(-last.itemsize, os.SEEK_END)
+            last.frombytes(stream.read(last.itemsize))
+    # Чужой файл индекса не перестраиваем молча: его отвергнет проверка сигнатуры в GameArchive
+    return header == INDEX_MAGIC and bool(last) and last[0] >= os.path.getsize(path)
+
+
+def record_offsets(path):
+    """
+    Находит смещения всех записей, проходя файл потоково (например, чтобы заново построить индекс)
+    :param path: str Путь к файлу записей
+    :return: array('Q') Смещения записей
+    """
+    return array('Q', (offset for offset, _ in iter_records(path)))
+
+
+def replay(record, field_class=BitboardField):
+    """
+    Воспроизводит партию на новых полях и проверяет, что результаты выстрелов совпадают с записанными
+    :param record: GameRecord Партия
+    :param field_class: Класс полей
+    :return: Генератор объектов ShotResult
+    """
+    fleets = [[decks_num for _, _, _, decks_num in layout] for layout in record.layouts]
+    fields = [field_class(record.size, fleet=fleet) for fleet in fleets]
+    for field, layout in zip(fields, record.layouts):
+        for row, col, orientation, decks_num in layout:
+            field.place_ship(row, col, orientation, decks_num)
+    for player, row, col, hit in record.shots:
+        target = fields[1 - player]
+        if not hit and target.get_status(row, col, True) == '-':
+            # Партии, записанные до того, как поле стало само закрывать клетки вокруг потопленных кораблей,
+            # могут содержать выстрелы в такие клетки - это промахи, и поле уже знает, что они пусты
+            yield ShotResult(player, row, col, hit, False)
+            continue
+        if target.fire(row, col) != hit:
+            raise ValueError(f'Recorded shot ({row}, {col}) of player {player} does not match the layout')
+        yield ShotResult(player, row, col, hit, hit and target.all_ships_sunk())
+
+
+class GameArchive:
+    """
+    Файл записей с произвольным доступом к партиям по номеру. Файл записей и индекс отображаются в память,
+    поэтому открытие архива и чтение одной партии не зависят от размера файла
+
+    Методы
+    -----------
+    len(archive) : -> int
+        Количество партий
+
+    archive[n] : -> GameRecord
+        Партия с номером n
+
+    iter(archive) : -> GameRecord
+        Все партии по порядку
+    """
+
+    def __init__(self, path):
+        """
+        :param path: str Путь к файлу записей. Если индекса нет или он устарел (см. index_is_stale), он строится
+        потоковым проходом по файлу
+        """
+        self.__offsets = ()
+        self.__data = self.__index_file = self.__index_data = None
+        self.__file = open(path, 'rb')
+        # Сигнатуру проверяем до построения индекса, чтобы не писать индекс рядом с чужим файлом
+        if self.__file.read(len(MAGIC)) != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a game record file')
+        self.__data = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        index_path = path + INDEX_SUFFIX
+        if index_is_stale(path):
+            write_index(path, record_offsets(path))
+        self.__index_file = open(index_path, 'rb')
+        if os.path.getsize(index_path) > len(INDEX_MAGIC):
+            self.__index_data = mmap.mmap(self.__index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.__index_data[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+                self.close()
+                raise ValueError(f'{index_path} is not a game record index')
+            self.__offsets = memoryview(self.__index_data)[len(INDEX_MAGIC):].cast('Q')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.__offsets)
+
+    def __getitem__(self, n):
+        offset = self.__offsets[n]
+        length, start = read_varint(self.__data, offset)
+        return decode_game(self.__data[start:start + length])
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self[n]
+
+    def close(self):
+        """
+        Закрывает отображения и файлы
+        :return: None
+        """
+        if isinstance(self.__offsets, memoryview):
+            self.__offsets.release()
+        for resource in (self.__index_data, self.__data, self.__index_file, self.__file):
+            if resource is not None and not resource.closed:
+                resource.close()
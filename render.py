@@ -0,0 +1,219 @@
+"""
+Отрисовка игровых полей консольной игры.
+
+Кадр (оба поля, заголовок со счетчиками живых палуб, номера строк и колонок) собирается в одну строку
+и выводится одним вызовом write, а не отдельным print на каждую строку и разделитель.
+
+BoardRenderer поддерживает три режима:
+- полный кадр (draw) - вид, который консольная игра выводит после каждого хода;
+- перерисовка только изменившихся клеток (redraw) - курсор ставится на клетку ANSI-последовательностью
+  и перерисовывается одна клетка. Изменения клеток поле сообщает подписчикам (Field.add_listener),
+  поэтому стоимость кадра зависит от количества изменений, а не от размера поля;
+- окно просмотра (viewport) - выводится только прямоугольная часть больших полей, окно можно сдвигать.
+
+Модуль не зависит от main: поле должно лишь предоставлять size, get_status, row_statuses, alive_decks_num
+и add_listener
+"""
+import sys
+
+# Отступ между полями человека и компьютера
+INDENT = ' ' * 10
+
+# Управляющие последовательности ANSI: очистить экран, поставить курсор в позицию (строка, колонка)
+CLEAR_SCREEN = '\x1b[2J\x1b[H'
+MOVE_CURSOR = '\x1b[{};{}H'
+
+
+class BoardRenderer:
+    """
+    Отрисовщик игровых полей человека и компьютера
+
+    Свойства
+    -----------
+    stream : поток вывода (по умолчанию sys.stdout)
+
+    viewport : tuple
+        Окно просмотра (первая строка, первая колонка, строк, колонок) или None - поле целиком
+
+    Методы
+    -----------
+    frame(humans_field, skynet_field) : -> str
+        Собирает кадр в одну строку
+
+    draw(humans_field, skynet_field) : -> None
+        Выводит полный кадр одним вызовом write
+
+    redraw(humans_field, skynet_field) : -> None
+        Перерисовывает только клетки, изменившиеся с прошлого кадра (ANSI). Первый кадр выводится целиком
+
+    scroll(row, col) : -> None
+        Сдвигает окно просмотра так, чтобы его левый верхний угол был в клетке (row, col)
+    """
+
+    def __init__(self, stream=None, viewport=None):
+        """
+        :param stream: Поток вывода с методом write. None - sys.stdout на момент вывода
+        :param viewport: tuple (первая строка, первая колонка, строк, колонок) или None
+        """
+        self.__stream = stream
+        self.__viewport = viewport
+        # Поля, на изменения которых подписан redraw, и накопленные с прошлого кадра изменившиеся клетки
+        self.__fields = None
+        self.__dirty = set()
+        self.__header = None
+        self.__full_redraw = True
+
+    @property
+    def stream(self):
+        return self.__stream if self.__stream is not None else sys.stdout
+
+    @property
+    def viewport(self):
+        return self.__viewport
+
+    def scroll(self, row, col):
+        """
+        Сдвигает окно просмотра. Следующий redraw выведет кадр целиком
+        :param row: int Первая строка окна
+        :param col: int Первая колонка окна
+        :return: None
+        """
+        if self.__viewport is None:
+            raise ValueError('Renderer has no viewport to scroll')
+        _, _, rows, cols = self.__viewport
+        self.__viewport = (row, col, rows, cols)
+        self.__full_redraw = True
+
+    def __window(self, size):
+        """
+        :return: tuple (первая строка, первая колонка, строк, колонок) окна, обрезанного границами поля
+        """
+        if self.__viewport is None:
+            return 1, 1, size, size
+        row, col, rows, cols = self.__viewport
+        row = min(max(1, row), size)
+        col = min(max(1, col), size)
+        return row, col, min(rows, size - row + 1), min(cols, size - col + 1)
+
+    @staticmethod
+    def __glyph(field, row, col, own):
+        """
+        :param own: bool True - поле человека: поверх кораблей показываются результаты выстрелов компьютера.
+        False - поле компьютера: только результаты выстрелов
+        :return: str Символ клетки
+        """
+        public = field.get_status(row, col, True)
+        if own and public == ' ':
+            return field.get_status(row, col)
+        return public
+
+    @staticmethod
+    def __header_line(humans_field, skynet_field):
+        humans_alive = humans_field.alive_decks_num()
+        skynet_alive = skynet_field.alive_decks_num() if skynet_field else 0
+        return (f'     Мои корабли (живых палуб - {humans_alive})         '
+                f'Корабли компьютера (живых палуб - {skynet_alive})')
+
+    def frame(self, humans_field, skynet_field):
+        """
+        Собирает кадр: заголовок, номера колонок, строки обоих полей и разделители
+        :param humans_field: Поле человека
+        :param skynet_field: Поле компьютера или None, если оно еще не создано
+        :return: str Кадр, заканчивающийся пустой строкой
+        """
+        size = humans_field.size
+        first_row, first_col, rows, cols = self.__window(size)
+        # Ширина колонки - по самому длинному номеру, на поле 6x6 это один символ
+        width = len(str(size))
+        col_range = range(first_col, first_col + cols)
+        col_slice = slice(first_col - 1, first_col - 1 + cols)
+
+        numbers = ' | '.join(str(col).rjust(width) for col in col_range)
+        line_length = (width + 3) * cols + width + 3
+        separator = f' {"-" * line_length}         {"-" * line_length} \n'
+        empty = ' | '.join([' ' * width] * cols)
+
+        lines = [self.__header_line(humans_field, skynet_field), '\n',
+                 f'  {" " * width} | {numbers} | {INDENT}{" " * width}| {numbers} |\n',
+                 f'  {"-" * (line_length - 1)}         {"-" * line_length} \n']
+        for row in range(first_row, first_row + rows):
+            # На своем поле поверх расположения кораблей показываем результаты выстрелов компьютера
+            own = zip(humans_field.row_statuses(row, True)[col_slice], humans_field.row_statuses(row)[col_slice])
+            humans = ' | '.join((public if public != ' ' else status).center(width) for public, status in own)
+            if skynet_field:
+                skynet = ' | '.join(status.center(width) for status in skynet_field.row_statuses(row, True)[col_slice])
+            else:
+                skynet = empty
+            lines.append(f'  {str(row).rjust(width)} | {humans} | {INDENT} | {skynet} | \n')
+            lines.append(separator)
+        lines.append('\n')
+        return ''.join(lines)
+
+    def draw(self, humans_field, skynet_field):
+        """
+        Выводит полный кадр одним вызовом write
+        :param humans_field: Поле человека
+        :param skynet_field: Поле компьютера или None
+        :return: None
+        """
+        self.stream.write(self.frame(humans_field, skynet_field))
+
+    def __attach(self, humans_field, skynet_field):
+        """
+        Подписывается на изменения клеток полей, если поля сменились с прошлого кадра
+        """
+        fields = (humans_field, skynet_field)
+        if self.__fields is not None and all(a is b for a, b in zip(fields, self.__fields)):
+            return
+        if self.__fields is not None:
+            for field in self.__fields:
+                if field:
+                    field.remove_listener(self.__cell_changed)
+        for field in fields:
+            if field:
+                field.add_listener(self.__cell_changed)
+        self.__fields = fields
+        self.__full_redraw = True
+
+    def __cell_changed(self, field, row, col, old_status, new_status, public):
+        self.__dirty.add((field, row, col))
+
+    def redraw(self, humans_field, skynet_field):
+        """
+        Перерисовывает только клетки, изменившиеся с прошлого кадра, и заголовок, если изменились счетчики.
+        Первый кадр, кадр после смены полей и кадр после сдвига окна выводятся целиком с очисткой экрана
+        :param humans_field: Поле человека
+        :param skynet_field: Поле компьютера или None
+        :return: None
+        """
+        self.__attach(humans_field, skynet_field)
+        header = self.__header_line(humans_field, skynet_field)
+        if self.__full_redraw:
+            self.__full_redraw = False
+            self.__dirty.clear()
+            self.__header = header
+            self.stream.write(CLEAR_SCREEN + self.frame(humans_field, skynet_field))
+            return
+
+        size = humans_field.size
+        first_row, first_col, rows, cols = self.__window(size)
+        width = len(str(size))
+        # Начало первой клетки в строке поля человека и поля компьютера (колонки терминала с 1)
+        humans_start = width + 6
+        skynet_start = humans_start + cols * (width + 3) + len(INDENT) + 3
+
+        parts = []
+        if header != self.__header:
+            self.__header = header
+            parts.append(MOVE_CURSOR.format(1, 1) + header + '\x1b[K')
+        for field, row, col in self.__dirty:
+            if not (first_row <= row < first_row + rows and first_col <= col < first_col + cols):
+                continue
+            own = field is humans_field
+            line = 4 + 2 * (row - first_row)
+            column = (humans_start if own else skynet_start) + (col - first_col) * (width + 3)
+            parts.append(MOVE_CURSOR.format(line, column) + self.__glyph(field, row, col, own).center(width))
+        self.__dirty.clear()
+        # Курсор возвращаем под кадр, чтобы дальнейший вывод не затирал поля
+        parts.append(MOVE_CURSOR.format(4 + 2 * rows + 1, 1))
+        self.stream.write(''.join(parts))
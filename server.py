@@ -0,0 +1,869 @@
+"""
+Сетевой сервер морского боя на asyncio: тысячи партий между удаленными игроками и ботами в одном цикле событий.
+
+Протокол - строки JSON (одно сообщение в строке). Клиент отправляет команды:
+    {"cmd": "play", "opponent": "bot"}    - начать партию с ботом сервера ("human" - ждать другого игрока)
+    {"cmd": "deck", "cell": "1 2"}        - поставить очередную палубу строящегося корабля
+    {"cmd": "auto"}                       - расставить весь флот автоматически
+    {"cmd": "reset"}                      - убрать все корабли и начать расстановку заново
+    {"cmd": "fire", "cell": "3 4"}        - выстрелить
+Координаты передаются так же, как их вводят в консольной игре, и проверяются теми же правилами
+(HumansField.parse_cell). Палубы ставятся по одной, как в консольной игре (HumansField.place_deck):
+от больших кораблей к меньшим, каждая следующая палуба - только в зоне, где корабль еще помещается.
+
+Сервер отвечает сообщениями:
+    {"type": "start", "size": 6, "fleet": [...], "seat": 0}  - партия началась, seat - номер игрока
+    {"type": "place", "decks": 3, "deck": 1}                  - ждем палубу deck корабля из decks палуб
+    {"type": "placed"}                                        - флот расставлен, ждем противника
+    {"type": "turn"}                                          - ваш ход
+    {"type": "shot", "by": "you", "row": 3, "col": 4, "hit": true}  - выстрел (by - "you" или "opponent");
+                                                                если он потопил корабль, добавляются
+                                                                "sunk": true и "border": [[row, col], ...] -
+                                                                клетки вокруг корабля, стрелять в них нельзя
+    {"type": "game_over", "winner": "you"}                    - партия окончена (winner - "you", "opponent" или
+                                                                "nobody"; reason - "timeout" или "opponent left",
+                                                                если партия окончена не последним выстрелом)
+    {"type": "error", "message": "..."}                       - команда отвергнута, состояние не изменилось
+
+Партия (Match) не использует ввод-вывод: она получает команды и отправляет сообщения через функции
+отправки, поэтому ее логику можно проверять и без сети.
+
+Сессиями управляет планировщик (MatchScheduler): он ставит игроков в очередь и составляет пары, через
+bot_after секунд ожидания дает игроку бота, по истечении move_timeout засчитывает поражение тому, кто не
+сделал ход, а партию, простоявшую idle_timeout, вытесняет из памяти в компактный байтовый вид (Match.freeze)
+и восстанавливает (Match.thaw) при следующей команде. Счетчики планировщика - в MatchScheduler.metrics.
+
+Запуск из корня проекта:
+    python server.py --port 8765
+    python server.py --port 8765 --bot-shooting random --size 10 --fleet 4 3 3 2 2 2 1 1 1 1
+    python server.py --port 8765 --move-timeout 30 --idle-timeout 5 --bot-after 10
+"""
+import argparse
+import asyncio
+import functools
+import heapq
+import itertools
+import json
+import random
+import time
+from collections import Counter, OrderedDict
+
+from engine import Engine, Player
+from main import Game, HumansField, Ship, validate_config
+from record import GameRecord, decode_game, encode_game, read_varint, ships_layout, write_varint
+from tournament import PLACEMENT_STRATEGIES, SHOOTING_STRATEGIES
+
+# Стадии партии
+WAITING, PLACING, PLAYING, FINISHED = 'waiting', 'placing', 'playing', 'finished'
+STAGES = (WAITING, PLACING, PLAYING, FINISHED)
+
+
+class Match:
+    """
+    Партия двух игроков на сервере. Игрок - удаленный клиент (функция отправки сообщений) или бот сервера
+
+    Свойства
+    -----------
+    stage : str
+        Стадия партии: WAITING, PLACING, PLAYING или FINISHED
+
+    turn : int
+        Номер игрока, который сейчас стреляет
+
+    winner : int
+        Номер победившего игрока или None
+
+    progress : int
+        Количество выполненных команд игроков. Меняется, только когда партия продвинулась
+
+    Методы
+    -----------
+    join(send) : -> int
+        Подключает удаленного игрока и возвращает его номер
+
+    add_bot(bot) : -> int
+        Подключает бота (объект engine.Player) и возвращает его номер
+
+    handle(seat, message) : -> None
+        Выполняет команду игрока
+
+    leave(seat) : -> None
+        Отключает игрока. Если партия не окончена, победа присуждается противнику
+
+    expire() : -> None
+        Заканчивает партию по истечении времени на ход: проигрывает тот, кого ждали
+
+    record() : -> GameRecord
+        Возвращает расстановки и выстрелы партии в формате модуля record
+
+    freeze() : -> bytes
+        Сохраняет состояние партии в компактном двоичном виде
+
+    thaw(data, senders, bots, fleet, rng, on_finish, progress) : -> Match
+        Восстанавливает партию из результата freeze (метод класса)
+    """
+
+    def __init__(self, size=Game.FIELD_SIZE(), fleet=Game.FLEET(), rng=None, on_finish=None):
+        """
+        :param size: int Размер игровых полей
+        :param fleet: Последовательность размеров кораблей
+        :param rng: random.Random Генератор случайных чисел для ботов и автоматической расстановки
+        :param on_finish: Функция on_finish(match), которая вызывается, когда у партии определился победитель
+        """
+        self.__size = size
+        self.__fleet = validate_config(size, fleet)
+        self.__rng = rng or random.Random()
+        self.__on_finish = on_finish
+        # Для каждого игрока: функция отправки (None у бота), бот, поле, еще не поставленные корабли,
+        # строящийся корабль и индекс зон, в которых он еще помещается
+        self.__senders = []
+        self.__bots = []
+        self.__fields = []
+        self.__pending = []
+        self.__ships = []
+        self.__areas = []
+        self.__stage = WAITING
+        self.__turn = 0
+        self.__winner = None
+        # Все выстрелы партии (игрок, строка, колонка, попадание) - по ним партия восстанавливается после freeze
+        self.__shots = []
+        self.__progress = 0
+
+    @property
+    def stage(self):
+        return self.__stage
+
+    @property
+    def progress(self):
+        return self.__progress
+
+    @property
+    def turn(self):
+        return self.__turn
+
+    @property
+    def winner(self):
+        return self.__winner
+
+    def join(self, send):
+        """
+        Подключает удаленного игрока
+        :param send: Функция send(message), отправляющая игроку сообщение (dict)
+        :return: int Номер игрока
+        """
+        return self.__add_seat(send, None)
+
+    def add_bot(self, bot):
+        """
+        Подключает бота, который расставляет флот сразу, а стреляет, как только до него доходит ход
+        :param bot: engine.Player Стратегии расстановки и стрельбы
+        :return: int Номер игрока
+        """
+        return self.__add_seat(None, bot)
+
+    def __add_seat(self, send, bot):
+        if len(self.__fields) == 2:
+            raise ValueError('Match already has two players')
+        self.__senders.append(send)
+        self.__bots.append(bot)
+        # Поле создается в начале расстановки
+        self.__fields.append(None)
+        self.__pending.append([])
+        self.__ships.append(None)
+        self.__areas.append(None)
+        if len(self.__fields) == 2:
+            self.__start()
+        return len(self.__fields) - 1
+
+    def __send(self, seat, message):
+        send = self.__senders[seat]
+        if send is not None:
+            send(message)
+
+    def __start(self):
+        self.__stage = PLACING
+        for seat in range(2):
+            self.__send(seat, {'type': 'start', 'size': self.__size, 'fleet': list(self.__fleet), 'seat': seat})
+            if self.__bots[seat] is not None:
+                self.__auto_place(seat)
+            else:
+                self.__restart_placement(seat)
+        self.__check_placed()
+
+    def __restart_placement(self, seat):
+        """
+        Очищает поле игрока и начинает ручную расстановку с самого большого корабля
+        """
+        self.__fields[seat] = HumansField(self.__size, fleet=self.__fleet)
+        self.__pending[seat] = sorted(self.__fleet)
+        self.__next_ship(seat)
+
+    def __next_ship(self, seat):
+        """
+        Начинает строить следующий корабль игрока или, если флот расставлен, убирает границы кораблей
+        """
+        field, pending = self.__fields[seat], self.__pending[seat]
+        if not pending:
+            self.__ships[seat] = self.__areas[seat] = None
+            field.delete_ship_borders()
+            self.__send(seat, {'type': 'placed'})
+            return
+        decks_num = pending[-1]
+        areas = field.possible_ships_areas(decks_num)
+        if not areas:
+            self.__send(seat, {'type': 'error', 'message': f'Для корабля из {decks_num} палуб не осталось места. '
+                                                           f'Расставим флот заново'})
+            self.__restart_placement(seat)
+            return
+        ship = Ship()
+        field.add_ship(ship)
+        self.__ships[seat] = ship
+        self.__areas[seat] = field.areas_by_cell(areas)
+        self.__send(seat, {'type': 'place', 'decks': decks_num, 'deck': 1})
+
+    def __auto_place(self, seat):
+        """
+        Расставляет весь флот игрока стратегией бота (или поиском с возвратом, если игрок - не бот)
+        """
+        bot = self.__bots[seat]
+        placement = bot.placement if bot is not None else PLACEMENT_STRATEGIES['backtracking']()
+        # Если стратегия зашла в тупик, расстановка повторяется на чистом поле, как в Engine.setup
+        for _ in range(Engine.PLACEMENT_ATTEMPTS):
+            field = HumansField(self.__size, fleet=self.__fleet)
+            try:
+                placement.place(field, sorted(self.__fleet, reverse=True), self.__rng)
+            except IndexError:
+                continue
+            break
+        else:
+            raise ValueError('Не удалось расставить флот')
+        self.__fields[seat] = field
+        self.__pending[seat] = []
+        self.__next_ship(seat)
+
+    def __check_placed(self):
+        """
+        Начинает стрельбу, когда оба флота расставлены
+        """
+        if self.__stage != PLACING or any(self.__pending) or any(ship is not None for ship in self.__ships):
+            return
+        self.__stage = PLAYING
+        self.__next_turn()
+
+    def __next_turn(self):
+        """
+        Передает ход: боты стреляют сразу, удаленному игроку отправляется приглашение
+        """
+        while self.__stage == PLAYING and self.__bots[self.__turn] is not None:
+            enemy_field = self.__fields[1 - self.__turn]
+            row, col = self.__bots[self.__turn].shooting.choose(enemy_field, self.__fleet, self.__rng)
+            self.__fire(self.__turn, row, col)
+        if self.__stage == PLAYING:
+            self.__send(self.__turn, {'type': 'turn'})
+
+    def __fire(self, seat, row, col):
+        target = self.__fields[1 - seat]
+        hit = target.fire(row, col)
+        self.__shots.append((seat, row, col, hit))
+        shot = {'row': row, 'col': col, 'hit': hit}
+        ship = target.ship_at(row, col)[0] if hit else None
+        if ship is not None and ship.sunk:
+            shot['sunk'] = True
+            shot['border'] = [list(cell) for cell in target.ship_border(ship)]
+        self.__send(seat, {'type': 'shot', 'by': 'you', **shot})
+        self.__send(1 - seat, {'type': 'shot', 'by': 'opponent', **shot})
+        if hit and target.all_ships_sunk():
+            self.__finish(seat)
+        else:
+            # Даже после попадания ход переходит к другому игроку
+            self.__turn = 1 - seat
+
+    def __finish(self, winner, reason=None):
+        """
+        :param winner: int Номер победителя или None, если победителя нет
+        :param reason: str Причина окончания партии, если она окончена не потоплением флота
+        """
+        self.__stage = FINISHED
+        self.__winner = winner
+        for seat in range(len(self.__fields)):
+            if winner is None:
+                message = {'type': 'game_over', 'winner': 'nobody'}
+            else:
+                message = {'type': 'game_over', 'winner': 'you' if seat == winner else 'opponent'}
+            if reason:
+                message['reason'] = reason
+            self.__send(seat, message)
+        if self.__on_finish is not None:
+            self.__on_finish(self)
+
+    def handle(self, seat, message):
+        """
+        Выполняет команду игрока. Неверная команда отвергается сообщением об ошибке
+        :param seat: int Номер игрока
+        :param message: dict Команда
+        :return: None
+        """
+        try:
+            self.__handle(seat, message)
+        except ValueError as e:
+            self.__send(seat, {'type': 'error', 'message': str(e).strip()})
+        else:
+            self.__progress += 1
+
+    def __handle(self, seat, message):
+        command = message.get('cmd') if isinstance(message, dict) else None
+        if command == 'deck':
+            if self.__stage != PLACING or self.__ships[seat] is None:
+                raise ValueError('Сейчас нельзя ставить корабли')
+            field, ship = self.__fields[seat], self.__ships[seat]
+            row, col = field.parse_cell(str(message.get('cell', '')))
+            self.__areas[seat] = field.place_deck(ship, self.__areas[seat], row, col)
+            decks_num = self.__pending[seat][-1]
+            if len(ship.decks) < decks_num:
+                self.__send(seat, {'type': 'place', 'decks': decks_num, 'deck': len(ship.decks) + 1})
+                return
+            field.create_ship_borders(ship)
+            self.__pending[seat].pop()
+            self.__next_ship(seat)
+            self.__check_placed()
+        elif command in ('auto', 'reset'):
+            if self.__stage != PLACING or (self.__ships[seat] is None and not self.__pending[seat]):
+                raise ValueError('Сейчас нельзя расставлять корабли')
+            if command == 'auto':
+                self.__auto_place(seat)
+            else:
+                self.__restart_placement(seat)
+            self.__check_placed()
+        elif command == 'fire':
+            if self.__stage != PLAYING or seat != self.__turn:
+                raise ValueError('Сейчас не ваш ход')
+            enemy_field = self.__fields[1 - seat]
+            row, col = self.__fields[seat].parse_cell(str(message.get('cell', '')))
+            HumansField.check_target(enemy_field, row, col)
+            self.__fire(seat, row, col)
+            self.__next_turn()
+        else:
+            raise ValueError(f'Неизвестная команда {command!r}')
+
+    def leave(self, seat):
+        """
+        Отключает игрока. Если партия еще идет, победа присуждается противнику
+        :param seat: int Номер игрока
+        :return: None
+        """
+        self.__senders[seat] = None
+        if self.__stage in (PLACING, PLAYING):
+            self.__finish(1 - seat, 'opponent left')
+        elif self.__stage == WAITING:
+            self.__stage = FINISHED
+
+    def __placed(self, seat):
+        return not self.__pending[seat] and self.__ships[seat] is None
+
+    def expire(self):
+        """
+        Заканчивает партию по истечении времени на ход. При стрельбе проигрывает тот, чей ход. При расстановке
+        проигрывает тот, кто не успел расставить флот, а если не успели оба - победителя нет
+        :return: None
+        """
+        if self.__stage == PLAYING:
+            self.__finish(1 - self.__turn, 'timeout')
+        elif self.__stage == PLACING:
+            late = [seat for seat in range(2) if not self.__placed(seat)]
+            self.__finish(1 - late[0] if len(late) == 1 else None, 'timeout')
+        elif self.__stage == WAITING:
+            self.__stage = FINISHED
+
+    def record(self):
+        """
+        :return: GameRecord Расстановки обоих игроков и все выстрелы партии (недостроенный корабль не входит)
+        """
+        layouts = []
+        for seat in range(2):
+            field, ship = self.__fields[seat], self.__ships[seat]
+            ships = [other for other in field.ships if other is not ship] if field is not None else []
+            layouts.append(ships_layout(ships))
+        return GameRecord(self.__size, tuple(layouts), tuple(self.__shots))
+
+    def freeze(self):
+        """
+        Сохраняет состояние партии в компактном двоичном виде (десятки байт вместо двух полей с объектами клеток).
+        Функции отправки и боты не сохраняются, их передают в thaw. Сохраняются стадия, очередь хода,
+        для каждого игрока - еще не поставленные корабли и палубы недостроенного корабля, а расстановки
+        и выстрелы - в формате записи партии модуля record
+        :return: bytes
+        """
+        if self.__stage == WAITING:
+            raise ValueError('Match has not started yet')
+        size = self.__size
+        buffer = bytearray()
+        write_varint(buffer, STAGES.index(self.__stage))
+        write_varint(buffer, self.__turn)
+        write_varint(buffer, 0 if self.__winner is None else self.__winner + 1)
+        for seat in range(2):
+            pending, ship = self.__pending[seat], self.__ships[seat]
+            write_varint(buffer, len(pending))
+            for decks_num in pending:
+                write_varint(buffer, decks_num)
+            # 0 - корабль не строится, иначе количество поставленных палуб + 1 и номера их клеток
+            decks = ship.decks if ship is not None else ()
+            write_varint(buffer, 0 if ship is None else len(decks) + 1)
+            for deck in decks:
+                write_varint(buffer, (deck.row - 1) * size + deck.col - 1)
+        buffer += encode_game(self.record())
+        return bytes(buffer)
+
+    @classmethod
+    def thaw(cls, data, senders, bots, fleet=Game.FLEET(), rng=None, on_finish=None, progress=0):
+        """
+        Восстанавливает партию из результата freeze: поля строятся заново, палубы недостроенного корабля
+        ставятся через place_deck, выстрелы повторяются. Состояние стратегий ботов не сохраняется
+        (например, DensityShooting начинает добивание заново)
+        :param data: bytes Результат freeze
+        :param senders: Пара функций отправки (None у бота)
+        :param bots: Пара ботов (None у удаленного игрока)
+        :param fleet: Состав флота партии
+        :param rng: random.Random Генератор случайных чисел
+        :param on_finish: Функция on_finish(match)
+        :param progress: int Значение progress партии на момент freeze
+        :return: Match
+        """
+        stage, pos = read_varint(data, 0)
+        turn, pos = read_varint(data, pos)
+        winner, pos = read_varint(data, pos)
+        seats = []
+        for _ in range(2):
+            count, pos = read_varint(data, pos)
+            pending = []
+            for _ in range(count):
+                decks_num, pos = read_varint(data, pos)
+                pending.append(decks_num)
+            count, pos = read_varint(data, pos)
+            decks = None if count == 0 else []
+            for _ in range(count - 1):
+                cell, pos = read_varint(data, pos)
+                decks.append(cell)
+            seats.append((pending, decks))
+        record = decode_game(data, pos)
+
+        size = record.size
+        match = cls(size, fleet, rng, on_finish)
+        match.__senders, match.__bots = list(senders), list(bots)
+        match.__stage, match.__turn = STAGES[stage], turn
+        match.__winner = None if winner == 0 else winner - 1
+        match.__progress = progress
+        for seat, ((pending, decks), layout) in enumerate(zip(seats, record.layouts)):
+            field = HumansField(size, fleet=match.__fleet)
+            for row, col, orientation, decks_num in layout:
+                field.place_ship(row, col, orientation, decks_num)
+            ship = areas = None
+            if decks is not None:
+                areas = field.areas_by_cell(field.possible_ships_areas(pending[-1]))
+                ship = Ship()
+                field.add_ship(ship)
+                for cell in decks:
+                    areas = field.place_deck(ship, areas, cell // size + 1, cell % size + 1)
+            if not pending:
+                field.delete_ship_borders()
+            match.__fields.append(field)
+            match.__pending.append(pending)
+            match.__ships.append(ship)
+            match.__areas.append(areas)
+        for player, row, col, _ in record.shots:
+            match.__fields[1 - player].fire(row, col)
+        match.__shots = list(record.shots)
+        return match
+
+
+class MatchScheduler:
+    """
+    Планировщик партий сервера: составляет пары, следит за временем на ход и вытесняет простаивающие партии.
+
+    Сессия - подключенный удаленный игрок. Ожидающие противника-человека стоят в очереди (FIFO); если задан
+    bot_after, игрок, прождавший дольше, получает в противники бота. Сроки (время на ход, простой, ожидание
+    в очереди) хранятся в одной куче и проверяются методом tick, поэтому на партию не нужно отдельной задачи
+    asyncio: тысячи партий обслуживает одна задача run. Партия, в которой дольше idle_timeout ничего
+    не происходило (обычно - ждут хода человека), сохраняется в компактном виде (Match.freeze, десятки байт)
+    и восстанавливается при следующей команде любого из игроков. Доигранная партия удаляется из памяти,
+    а если задан archive - записывается в него (например, record.GameWriter)
+
+    Свойства
+    -----------
+    metrics : dict
+        Счетчики: сессии, длина очереди, партии в памяти и вытесненные, начатые, доигранные,
+        окончившиеся по времени, вытеснения, восстановления, боты вместо людей
+
+    Методы
+    -----------
+    connect(send, close) : -> int
+        Регистрирует сессию удаленного игрока и возвращает ее номер
+
+    handle(session, message) : -> None
+        Выполняет команду игрока: play ставит в очередь или начинает партию с ботом, остальные передаются партии
+
+    disconnect(session) : -> None
+        Удаляет сессию. Если ее партия еще идет, победа присуждается противнику
+
+    tick(now) : -> None
+        Обрабатывает истекшие сроки
+
+    run(interval) : -> None
+        Корутина, вызывающая tick каждые interval секунд
+    """
+
+    def __init__(self, size=Game.FIELD_SIZE(), fleet=Game.FLEET(), bot=None, move_timeout=60.0, idle_timeout=5.0,
+                 bot_after=None, rng=None, clock=time.monotonic, archive=None):
+        """
+        :param size: int Размер игровых полей
+        :param fleet: Последовательность размеров кораблей
+        :param bot: engine.Player Бот сервера. Один объект используется во всех партиях: стратегии хранят
+        состояние отдельно для каждого поля
+        :param move_timeout: float Секунд на ход (и на расстановку флота). None - без ограничения
+        :param idle_timeout: float Через сколько секунд без ходов партия вытесняется. None - не вытеснять
+        :param bot_after: float Через сколько секунд ожидания противника-человека дать игроку бота. None - ждать
+        :param rng: random.Random Генератор случайных чисел партий
+        :param clock: Функция текущего времени в секундах
+        :param archive: Объект с методом write(record) для доигранных партий или None
+        """
+        self.__size = size
+        self.__fleet = validate_config(size, fleet)
+        self.__bot = bot or Player(PLACEMENT_STRATEGIES['backtracking'](), SHOOTING_STRATEGIES['density']())
+        self.__move_timeout = move_timeout
+        self.__idle_timeout = idle_timeout
+        self.__bot_after = bot_after
+        self.__rng = rng or random.Random()
+        self.__clock = clock
+        self.__archive = archive
+        # Сессии: номер -> [номер партии или None, номер игрока в партии, функция отправки, функция закрытия]
+        self.__sessions = {}
+        self.__session_ids = itertools.count()
+        # Партии в памяти (номер -> Match), вытесненные (номер -> (freeze, progress)) и их игроки
+        # (номер -> пара номеров сессий, None - бот)
+        self.__matches = {}
+        self.__evicted = {}
+        self.__evicted_bytes = 0
+        self.__players = {}
+        self.__match_ids = itertools.count()
+        # Очередь ожидающих противника-человека: номер сессии -> метка постановки в очередь
+        self.__queue = OrderedDict()
+        # Сроки: куча (время, метка, вид, номер партии или сессии, progress партии или метка очереди).
+        # Устаревшие сроки не удаляются, а пропускаются при извлечении
+        self.__deadlines = []
+        self.__serials = itertools.count()
+        self.__counters = Counter()
+
+    @property
+    def metrics(self):
+        return {
+            'sessions': len(self.__sessions),
+            'queue_depth': len(self.__queue),
+            'active_matches': len(self.__matches),
+            'evicted_matches': len(self.__evicted),
+            'evicted_bytes': self.__evicted_bytes,
+            'matches_started': self.__counters['started'],
+            'matches_finished': self.__counters['finished'],
+            'timeouts': self.__counters['timeouts'],
+            'evictions': self.__counters['evictions'],
+            'restores': self.__counters['restores'],
+            'bot_fallbacks': self.__counters['bot_fallbacks'],
+        }
+
+    def connect(self, send, close=None):
+        """
+        :param send: Функция send(message), отправляющая игроку сообщение (dict)
+        :param close: Функция без параметров, закрывающая подключение после окончания партии, или None
+        :return: int Номер сессии
+        """
+        session = next(self.__session_ids)
+        self.__sessions[session] = [None, None, send, close]
+        return session
+
+    def __deadline(self, delay, kind, key, value):
+        heapq.heappush(self.__deadlines, (self.__clock() + delay, next(self.__serials), kind, key, value))
+
+    def __schedule(self, match_id, match):
+        if self.__move_timeout is not None:
+            self.__deadline(self.__move_timeout, 'move', match_id, match.progress)
+        if self.__idle_timeout is not None:
+            self.__deadline(self.__idle_timeout, 'idle', match_id, match.progress)
+
+    def __start_match(self, sessions):
+        """
+        Начинает партию
+        :param sessions: Пара номеров сессий, None - бот
+        """
+        match_id = next(self.__match_ids)
+        match = Match(self.__size, self.__fleet, self.__rng, functools.partial(self.__finished, match_id))
+        self.__matches[match_id] = match
+        self.__players[match_id] = sessions
+        self.__counters['started'] += 1
+        for seat, session in enumerate(sessions):
+            if session is not None:
+                self.__sessions[session][:2] = match_id, seat
+        for session in sessions:
+            if session is None:
+                match.add_bot(self.__bot)
+            else:
+                match.join(self.__sessions[session][2])
+        if match.stage != FINISHED:
+            self.__schedule(match_id, match)
+
+    def __finished(self, match_id, match):
+        """
+        Вызывается партией, когда у нее определился исход: партия удаляется, подключения игроков закрываются
+        """
+        self.__counters['finished'] += 1
+        if self.__archive is not None:
+            self.__archive.write(match.record())
+        self.__matches.pop(match_id, None)
+        for session in self.__players.pop(match_id):
+            entry = self.__sessions.get(session)
+            if entry is not None:
+                entry[:2] = None, None
+                if entry[3] is not None:
+                    entry[3]()
+
+    def __load(self, match_id):
+        """
+        :return: Match Партия, при необходимости восстановленная из вытесненного вида
+        """
+        match = self.__matches.get(match_id)
+        if match is not None:
+            return match
+        data, progress = self.__evicted.pop(match_id)
+        self.__evicted_bytes -= len(data)
+        sessions = self.__players[match_id]
+        senders = [self.__sessions[session][2] if session is not None else None for session in sessions]
+        bots = [self.__bot if session is None else None for session in sessions]
+        match = Match.thaw(data, senders, bots, self.__fleet, self.__rng,
+                           functools.partial(self.__finished, match_id), progress)
+        self.__matches[match_id] = match
+        self.__counters['restores'] += 1
+        if self.__idle_timeout is not None:
+            self.__deadline(self.__idle_timeout, 'idle', match_id, progress)
+        return match
+
+    def __evict(self, match_id):
+        match = self.__matches.pop(match_id)
+        data = match.freeze()
+        self.__evicted[match_id] = (data, match.progress)
+        self.__evicted_bytes += len(data)
+        self.__counters['evictions'] += 1
+
+    def handle(self, session, message):
+        """
+        Выполняет команду игрока
+        :param session: int Номер сессии
+        :param message: dict Команда
+        :return: None
+        """
+        entry = self.__sessions[session]
+        match_id, seat, send, _ = entry
+        if match_id is None:
+            self.__play(session, message)
+            return
+        match = self.__load(match_id)
+        progress = match.progress
+        match.handle(seat, message)
+        if match.progress != progress and match.stage != FINISHED:
+            self.__schedule(match_id, match)
+
+    def __play(self, session, message):
+        """
+        Команда play: партия с ботом начинается сразу, игрок, ждущий человека, встает в очередь
+        """
+        send = self.__sessions[session][2]
+        if session in self.__queue:
+            send({'type': 'error', 'message': 'Ждем противника'})
+            return
+        if not isinstance(message, dict) or message.get('cmd') != 'play':
+            send({'type': 'error', 'message': 'Сначала нужна команда play'})
+            return
+        opponent = message.get('opponent', 'bot')
+        if opponent == 'bot':
+            self.__start_match((session, None))
+        elif opponent == 'human':
+            if self.__queue:
+                waiting, _ = self.__queue.popitem(last=False)
+                self.__start_match((waiting, session))
+            else:
+                token = next(self.__serials)
+                self.__queue[session] = token
+                if self.__bot_after is not None:
+                    self.__deadline(self.__bot_after, 'wait', session, token)
+        else:
+            send({'type': 'error', 'message': f'Неизвестный противник {opponent!r}, ожидается "bot" или "human"'})
+
+    def disconnect(self, session):
+        """
+        Удаляет сессию. Если ее партия еще идет, победа присуждается противнику
+        :param session: int Номер сессии
+        :return: None
+        """
+        match_id, seat, _, _ = self.__sessions[session]
+        self.__queue.pop(session, None)
+        if match_id is not None:
+            self.__load(match_id).leave(seat)
+        del self.__sessions[session]
+
+    def tick(self, now=None):
+        """
+        Обрабатывает истекшие сроки: заканчивает партии, в которых не сделан ход, вытесняет простаивающие
+        и дает бота тем, кто слишком долго ждет противника
+        :param now: float Текущее время, по умолчанию - clock()
+        :return: None
+        """
+        now = self.__clock() if now is None else now
+        deadlines = self.__deadlines
+        while deadlines and deadlines[0][0] <= now:
+            _, _, kind, key, value = heapq.heappop(deadlines)
+            if kind == 'wait':
+                if self.__queue.get(key) == value:
+                    del self.__queue[key]
+                    self.__counters['bot_fallbacks'] += 1
+                    self.__start_match((key, None))
+                continue
+            # Срок устарел, если партия закончилась или продвинулась после его назначения
+            if key in self.__matches:
+                progress = self.__matches[key].progress
+            elif key in self.__evicted:
+                progress = self.__evicted[key][1]
+            else:
+                continue
+            if progress != value:
+                continue
+            if kind == 'move':
+                self.__counters['timeouts'] += 1
+                self.__load(key).expire()
+            elif key in self.__matches:
+                self.__evict(key)
+
+    async def run(self, interval=0.5):
+        """
+        Вызывает tick каждые interval секунд
+        :param interval: float Период в секундах
+        :return: None
+        """
+        while True:
+            self.tick()
+            await asyncio.sleep(interval)
+
+
+class MatchServer:
+    """
+    TCP-сервер: принимает подключения и передает строки протокола планировщику партий
+
+    Свойства
+    -----------
+    scheduler : MatchScheduler
+        Планировщик партий (его metrics - счетчики сервера)
+
+    Методы
+    -----------
+    start(host, port) : -> asyncio.AbstractServer
+        Запускает прием подключений и задачу планировщика
+
+    handle_connection(reader, writer) : -> None
+        Обслуживает одно подключение до его закрытия (корутина)
+    """
+
+    def __init__(self, size=Game.FIELD_SIZE(), fleet=Game.FLEET(), bot_shooting='density',
+                 bot_placement='backtracking', seed=None, move_timeout=60.0, idle_timeout=5.0, bot_after=None,
+                 archive=None):
+        """
+        :param size: int Размер игровых полей
+        :param fleet: Последовательность размеров кораблей
+        :param bot_shooting: str Стратегия стрельбы ботов (см. tournament.SHOOTING_STRATEGIES)
+        :param bot_placement: str Стратегия расстановки ботов (см. tournament.PLACEMENT_STRATEGIES)
+        :param seed: Зерно генератора случайных чисел ботов
+        :param move_timeout: float Секунд на ход
+        :param idle_timeout: float Через сколько секунд без ходов партия вытесняется
+        :param bot_after: float Через сколько секунд ожидания противника-человека дать игроку бота
+        :param archive: Объект с методом write(record) для доигранных партий или None
+        """
+        bot = Player(PLACEMENT_STRATEGIES[bot_placement](), SHOOTING_STRATEGIES[bot_shooting]())
+        self.__scheduler = MatchScheduler(size, fleet, bot, move_timeout, idle_timeout, bot_after,
+                                          random.Random(seed), archive=archive)
+        self.__ticker = None
+
+    @property
+    def scheduler(self):
+        return self.__scheduler
+
+    async def start(self, host='127.0.0.1', port=0):
+        """
+        :param host: str Адрес
+        :param port: int Порт (0 - любой свободный)
+        :return: asyncio.AbstractServer
+        """
+        if self.__ticker is None:
+            self.__ticker = asyncio.ensure_future(self.__scheduler.run())
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Обслуживает одно подключение: строки JSON передаются планировщику
+        :param reader: asyncio.StreamReader
+        :param writer: asyncio.StreamWriter
+        :return: None
+        """
+        def send(message):
+            if not writer.is_closing():
+                writer.write(json.dumps(message, ensure_ascii=False).encode() + b'\n')
+
+        session = self.__scheduler.connect(send, writer.close)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    send({'type': 'error', 'message': 'Ожидается одна команда JSON в строке'})
+                    continue
+                self.__scheduler.handle(session, message)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.__scheduler.disconnect(session)
+            writer.close()
+
+
+async def serve(host, port, server):
+    listener = await server.start(host, port)
+    host, port = listener.sockets[0].getsockname()[:2]
+    print(f'Сервер морского боя слушает {host}:{port}', flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='server.py', description='Сетевой сервер морского боя')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765, help='порт (0 - любой свободный)')
+    parser.add_argument('--size', type=int, default=Game.FIELD_SIZE())
+    parser.add_argument('--fleet', type=int, nargs='+', default=list(Game.FLEET()))
+    parser.add_argument('--bot-shooting', default='density', choices=sorted(SHOOTING_STRATEGIES))
+    parser.add_argument('--bot-placement', default='backtracking', choices=sorted(PLACEMENT_STRATEGIES))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--move-timeout', type=float, default=60.0, help='секунд на ход')
+    parser.add_argument('--idle-timeout', type=float, default=5.0,
+                        help='через сколько секунд без ходов вытеснять партию из памяти')
+    parser.add_argument('--bot-after', type=float, default=None,
+                        help='через сколько секунд ожидания противника-человека играть с ботом')
+    args = parser.parse_args(argv)
+    try:
+        server = MatchServer(args.size, args.fleet, args.bot_shooting, args.bot_placement, args.seed,
+                             args.move_timeout, args.idle_timeout, args.bot_after)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""
+Игровое поле в разделяемой памяти для поиска в нескольких процессах.
+
+Процессам поиска (например, MCTSShooting) на каждом ходу нужна текущая позиция. Передача поля через
+pickle стоит сериализации и копирования всех клеток в каждый процесс на каждом ходу: для поля 500x500
+это мегабайты и сотни миллисекунд. SharedField хранит массивы статусов ArrayField в блоке
+multiprocessing.shared_memory, поэтому процессу достаточно один раз подключиться к блоку по имени
+(SharedBoard.attach), а на каждом ходу получать только номер версии.
+
+Блок памяти: заголовок из двух 64-битных чисел (версия, размер поля), за ним массив приватных и массив
+публичных статусов, по байту на клетку с номером (row - 1) * size + (col - 1).
+
+Версия работает как seqlock: перед первым изменением статуса после публикации поле делает версию
+нечетной, publish делает ее снова четной. Читатель копирует массив (SharedBoard.snapshot) и принимает
+копию, только если версия до и после копирования одна и та же и четная, иначе повторяет. Выстрел
+(fire) публикует изменения сам, остальные изменения (расстановка, snapshot/restore поля) видны
+читателям после явного publish.
+
+Пример:
+    with SharedField(500) as field:
+        ...  # расстановка
+        field.publish()
+        pool.submit(worker, field.name, field.version)
+
+    # в процессе поиска
+    board = SharedBoard.attach(name)
+    statuses = board.snapshot(public=True)
+"""
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from compact import ArrayField
+
+# Заголовок блока: версия, размер поля
+_HEADER = struct.Struct('<QQ')
+
+
+def _attach_memory(name):
+    """
+    Подключается к существующему блоку разделяемой памяти, не регистрируя его в resource_tracker: иначе
+    resource_tracker подключившегося процесса удалил бы блок при завершении процесса. Блок удаляет
+    только его создатель (SharedField.unlink)
+    :param name: str Имя блока
+    :return: объект SharedMemory
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    # До Python 3.13 регистрацию нельзя отключить параметром, поэтому на время подключения ее пропускаем
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedField(ArrayField):
+    """
+    Игровое поле ArrayField, массивы статусов которого лежат в блоке разделяемой памяти.
+    Блок создается вместе с полем; создатель поля отвечает за его удаление (unlink или with)
+
+    Свойства
+    -----------
+    Все свойства такие же, как и у родительского класса ArrayField, и дополнительно:
+
+    name : str
+        Имя блока разделяемой памяти, по которому к нему подключаются другие процессы (SharedBoard.attach)
+
+    version : int
+        Версия массивов: четная - изменения опубликованы, нечетная - поле меняется
+
+    Методы
+    -----------
+    publish() : -> int
+        Публикует изменения статусов, возвращает новую версию
+
+    close() : -> None
+        Отключает поле от блока памяти. После этого поле использовать нельзя
+
+    unlink() : -> None
+        Удаляет блок памяти
+
+    Методы set_status, create_ship_borders и delete_ship_borders переопределены и отмечают начало изменений,
+    fire после выстрела вызывает publish
+    """
+
+    def __init__(self, size: int, ships_list=None, fleet=None):
+        self.__memory = None
+        super().__init__(size, ships_list, fleet)
+        self.publish()
+
+    def _allocate_layers(self, cells):
+        """
+        Создает блок разделяемой памяти и возвращает представления его массивов статусов
+        :param cells: int Количество клеток поля
+        :return: tuple (приватный массив, публичный массив)
+        """
+        memory = shared_memory.SharedMemory(create=True, size=_HEADER.size + 2 * cells)
+        buffer = memory.buf
+        _HEADER.pack_into(buffer, 0, 0, self.size)
+        buffer[_HEADER.size:_HEADER.size + 2 * cells] = b' ' * (2 * cells)
+        self.__memory = memory
+        private, public = _HEADER.size, _HEADER.size + cells
+        self.__views = (buffer[private:private + cells], buffer[public:public + cells])
+        return self.__views
+
+    @property
+    def name(self):
+        return self.__memory.name
+
+    @property
+    def version(self):
+        return _HEADER.unpack_from(self.__memory.buf)[0]
+
+    def __set_version(self, version):
+        struct.pack_into('<Q', self.__memory.buf, 0, version)
+
+    def __begin(self):
+        """
+        Делает версию нечетной перед первым изменением после публикации
+        """
+        version = self.version
+        if not version & 1:
+            self.__set_version(version + 1)
+
+    def publish(self):
+        """
+        Делает изменения статусов видимыми читателям: версия становится четной
+        :return: int Новая версия
+        """
+        version = self.version
+        if version & 1:
+            version += 1
+            self.__set_version(version)
+        return version
+
+    def set_status(self, row, col, status, public=False):
+        self.__begin()
+        super().set_status(row, col, status, public)
+
+    def create_ship_borders(self, ship):
+        self.__begin()
+        super().create_ship_borders(ship)
+
+    def delete_ship_borders(self):
+        self.__begin()
+        super().delete_ship_borders()
+
+    def fire(self, row, col):
+        """
+        То же, что Field.fire, но результат выстрела сразу публикуется
+        """
+        try:
+            return super().fire(row, col)
+        finally:
+            self.publish()
+
+    def close(self):
+        """
+        Освобождает представления массивов и отключается от блока памяти. Блок остается доступен другим процессам
+        :return: None
+        """
+        if self.__memory is not None:
+            for view in self.__views:
+                view.release()
+            self.__memory.close()
+
+    def unlink(self):
+        """
+        Удаляет блок памяти. Подключенные процессы дочитывают его, новые подключения невозможны
+        :return: None
+        """
+        self.__memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        self.unlink()
+
+    def __reduce__(self):
+        raise TypeError('SharedField is not picklable: pass its name to SharedBoard.attach instead')
+
+
+class SharedBoard:
+    """
+    Подключение к полю SharedField из другого процесса: чтение массивов статусов без копирования
+
+    Свойства
+    -----------
+    name : str
+        Имя блока разделяемой памяти
+
+    size : int
+        Размер поля
+
+    version : int
+        Текущая версия массивов поля (см. SharedField.version)
+
+    Методы
+    -----------
+    attach(name) : -> SharedBoard
+        Подключается к блоку памяти по имени
+
+    layer(public) : -> memoryview
+        Массив статусов без копирования. Поле может менять его во время чтения
+
+    get_status(row, col, public) : -> str
+        Статус клетки
+
+    row_statuses(row, public) : -> list
+        Статусы клеток строки
+
+    snapshot(public, timeout) : -> tuple
+        Согласованная копия массива статусов и ее версия
+
+    close() : -> None
+        Отключается от блока памяти
+    """
+
+    def __init__(self, memory):
+        """
+        :param memory: объект SharedMemory с блоком поля SharedField
+        """
+        self.__memory = memory
+        self.__size = _HEADER.unpack_from(memory.buf)[1]
+        cells = self.__size * self.__size
+        buffer, private, public = memory.buf, _HEADER.size, _HEADER.size + cells
+        self.__layers = (buffer[private:private + cells], buffer[public:public + cells])
+
+    @classmethod
+    def attach(cls, name):
+        """
+        :param name: str Имя блока памяти (SharedField.name)
+        :return: объект SharedBoard
+        """
+        return cls(_attach_memory(name))
+
+    @property
+    def name(self):
+        return self.__memory.name
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def version(self):
+        return _HEADER.unpack_from(self.__memory.buf)[0]
+
+    def layer(self, public=False):
+        """
+        :param public: bool True - публичный массив, False - приватный
+        :return: memoryview Массив статусов в разделяемой памяти (байт на клетку)
+        """
+        return self.__layers[public]
+
+    def get_status(self, row, col, public=False):
+        """
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :param public: bool True - публичный статус, False - приватный
+        :return: str Статус клетки
+        """
+        return chr(self.__layers[public][(row - 1) * self.__size + (col - 1)])
+
+    def row_statuses(self, row, public=False):
+        """
+        :param row: int Номер строки
+        :param public: bool True - публичные статусы, False - приватные
+        :return: list Статусы клеток строки по порядку колонок
+        """
+        size = self.__size
+        return list(str(self.__layers[public][(row - 1) * size:row * size], 'latin-1'))
+
+    def snapshot(self, public=False, timeout=1.0):
+        """
+        Копирует массив статусов так, чтобы копия не попала на середину изменений поля
+        :param public: bool True - публичный массив, False - приватный
+        :param timeout: float Сколько секунд ждать публикации изменений
+        :return: tuple (bytes статусы клеток, int версия)
+        """
+        layer = self.__layers[public]
+        deadline = time.monotonic() + timeout
+        while True:
+            version = self.version
+            if not version & 1:
+                statuses = bytes(layer)
+                if self.version == version:
+                    return statuses, version
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'Board {self.name} was not published within {timeout} s')
+            time.sleep(0)
+
+    def close(self):
+        """
+        Освобождает представления массивов и отключается от блока памяти
+        :return: None
+        """
+        for view in self.__layers:
+            view.release()
+        self.__memory.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
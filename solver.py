@@ -0,0 +1,363 @@
+"""
+Решатель расстановок флота по публичному виду поля.
+
+По публичным статусам клеток ('X' - попадание, 'T' - промах, ' ' - сюда еще не стреляли; любой другой
+непустой статус тоже считается клеткой без корабля) и составу флота перебирает все расстановки, которые
+соблюдают правило "корабли не касаются друг друга даже углами" (как Field.create_ship_borders), не занимают
+клеток-промахов и накрывают все попадания. По ним считается точная вероятность того, что в клетке стоит палуба.
+
+Точный перебор - это поиск с возвратом по кораблям флота от больших к меньшим с мемоизацией по подсостоянию
+(номер корабля, маска занятых кораблями и их границами клеток). Одинаковые корабли ставятся только в порядке
+возрастания номера зоны, чтобы не перебирать их перестановки. Счетчики по клеткам хранятся в одном большом
+целом числе, по COUNTER_BITS бит на клетку, поэтому сложение результатов поддеревьев - одна операция.
+
+Для больших полей точный перебор невозможен, и вероятности оцениваются методом Монте-Карло по случайным
+согласованным расстановкам (sample_layout). Такая выборка приближенная: расстановки, в которых корабли
+накрывают попадания, строятся целенаправленно, поэтому их распределение не строго равномерное
+"""
+import random
+
+from main import popcount
+
+# Количество бит на счетчик одной клетки в упакованном векторе счетчиков
+COUNTER_BITS = 64
+
+
+class LayoutSolver:
+    """
+    Решатель расстановок флота
+
+    Свойства
+    -----------
+    size : int
+        Размер поля
+
+    fleet : tuple
+        Состав флота, отсортированный по убыванию размеров кораблей
+
+    Методы
+    -----------
+    from_field(field, fleet) : -> LayoutSolver
+        Создает решатель по публичному слою игрового поля
+
+    count() : -> int
+        Точное количество согласованных расстановок
+
+    probabilities() : -> list
+        Точная вероятность палубы в каждой клетке (список списков size x size)
+
+    sample_uniform(rng) : -> list
+        Одна расстановка, выбранная равновероятно среди всех согласованных (по счетчикам точного перебора)
+
+    sample_layout(rng) : -> list
+        Одна случайная согласованная расстановка или None (быстро, но не строго равновероятно)
+
+    sample_probabilities(samples, rng) : -> list
+        Оценка вероятностей методом Монте-Карло
+
+    solve(samples, rng) : -> list
+        Точные вероятности для небольших полей, оценка Монте-Карло для больших
+    """
+
+    # Наибольшее количество клеток поля, для которого solve() выполняет точный перебор
+    EXACT_CELLS_LIMIT = 49
+
+    # Сколько случайных зон пробовать для очередного корабля, прежде чем начать расстановку заново
+    SAMPLE_TRIES = 64
+
+    def __init__(self, size, fleet, hits=(), misses=()):
+        """
+        :param size: int Размер поля
+        :param fleet: Последовательность размеров кораблей
+        :param hits: Координаты (строка, колонка) попаданий
+        :param misses: Координаты (строка, колонка) клеток, в которых точно нет корабля
+        """
+        self.__size = size
+        self.__fleet = tuple(sorted(fleet, reverse=True))
+        self.__hits = 0
+        for row, col in hits:
+            self.__hits |= 1 << self.__pos(row, col)
+        self.__misses = 0
+        for row, col in misses:
+            self.__misses |= 1 << self.__pos(row, col)
+        # Сколько палуб у кораблей флота начиная с каждого номера
+        self.__decks_left = [sum(self.__fleet[i:]) for i in range(len(self.__fleet))]
+        self.__windows = None
+        self.__memo = {}
+
+    @classmethod
+    def from_field(cls, field, fleet):
+        """
+        Создает решатель по публичным статусам клеток игрового поля
+        :param field: Объект Field
+        :param fleet: Последовательность размеров кораблей
+        :return: Объект LayoutSolver
+        """
+        hits, misses = [], []
+        for row in range(1, field.size + 1):
+            for col in range(1, field.size + 1):
+                status = field.get_status(row, col, True)
+                if status == 'X':
+                    hits.append((row, col))
+                elif status != ' ':
+                    misses.append((row, col))
+        return cls(field.size, fleet, hits, misses)
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def fleet(self):
+        return self.__fleet
+
+    def __pos(self, row, col):
+        return (row - 1) * self.__size + (col - 1)
+
+    def __window(self, row, col, orientation, decks_num):
+        """
+        Вычисляет маски зоны: клетки корабля и клетки корабля вместе с соседними
+        :return: tuple (маска клеток, маска окрестности) или None, если зона не помещается в поле
+        """
+        size = self.__size
+        last_row, last_col = (row + decks_num - 1, col) if orientation else (row, col + decks_num - 1)
+        if row < 1 or col < 1 or last_row > size or last_col > size:
+            return None
+        cells = neighbourhood = 0
+        for x in range(row, last_row + 1):
+            for y in range(col, last_col + 1):
+                cells |= 1 << self.__pos(x, y)
+        for x in range(max(1, row - 1), min(size, last_row + 1) + 1):
+            for y in range(max(1, col - 1), min(size, last_col + 1) + 1):
+                neighbourhood |= 1 << self.__pos(x, y)
+        return cells, neighbourhood
+
+    def __fits(self, cells, neighbourhood, blocked):
+        """
+        Проверяет, что корабль можно поставить в зону: она не задевает уже поставленные корабли и их границы,
+        не занимает промахов и не касается попаданий, которые в нее не входят (их тогда накрыть было бы нечем)
+        """
+        return not (cells & (blocked | self.__misses)) and not (self.__hits & neighbourhood & ~cells)
+
+    def __prepare_windows(self):
+        """
+        Готовит для каждого размера корабля список зон, которые не задевают промахи и не касаются
+        посторонних попаданий: (маска клеток, маска окрестности, упакованный вектор единиц по клеткам,
+        строка, колонка, ориентация)
+        """
+        self.__windows = {}
+        size = self.__size
+        for decks_num in set(self.__fleet):
+            windows = []
+            for orientation in ((0, 1) if decks_num > 1 else (0,)):
+                for row in range(1, size + 1):
+                    for col in range(1, size + 1):
+                        masks = self.__window(row, col, orientation, decks_num)
+                        if masks is None or not self.__fits(masks[0], masks[1], 0):
+                            continue
+                        spread = 0
+                        for x in range(decks_num):
+                            pos = self.__pos(row + x, col) if orientation else self.__pos(row, col + x)
+                            spread |= 1 << (pos * COUNTER_BITS)
+                        windows.append((masks[0], masks[1], spread, row, col, orientation))
+            self.__windows[decks_num] = windows
+
+    def __count(self, index, blocked, start):
+        """
+        Считает расстановки оставшихся кораблей начиная с корабля index
+        :param index: int Номер очередного корабля во флоте
+        :param blocked: int Маска клеток, занятых поставленными кораблями и их границами
+        :param start: int Номер зоны, с которой начинать перебор (для одинаковых кораблей)
+        :return: tuple (количество расстановок, упакованный вектор счетчиков палуб по клеткам)
+        """
+        key = (index, blocked, start)
+        result = self.__memo.get(key)
+        if result is not None:
+            return result
+
+        fleet = self.__fleet
+        windows = self.__windows[fleet[index]]
+        uncovered = self.__hits & ~blocked
+        count = vector = 0
+
+        # Отсечение: непокрытых попаданий больше, чем палуб у оставшихся кораблей
+        if not uncovered or popcount(uncovered) <= self.__decks_left[index]:
+            if index == len(fleet) - 1:
+                # Последний корабль: расстановка годится, только если он накрывает все оставшиеся попадания
+                for w in range(start, len(windows)):
+                    cells, neighbourhood, spread, _, _, _ = windows[w]
+                    if not cells & blocked and not uncovered & ~cells:
+                        count += 1
+                        vector += spread
+            else:
+                same = fleet[index + 1] == fleet[index]
+                for w in range(start, len(windows)):
+                    cells, neighbourhood, spread, _, _, _ = windows[w]
+                    if cells & blocked:
+                        continue
+                    sub_count, sub_vector = self.__count(index + 1, blocked | neighbourhood, w + 1 if same else 0)
+                    if sub_count:
+                        count += sub_count
+                        vector += sub_vector + sub_count * spread
+
+        result = (count, vector)
+        self.__memo[key] = result
+        return result
+
+    def __solve_exact(self):
+        if self.__windows is None:
+            self.__prepare_windows()
+        if not self.__fleet:
+            return (0 if self.__hits else 1), 0
+        count, vector = self.__count(0, 0, 0)
+        if count >> (COUNTER_BITS - 1):
+            raise OverflowError('Too many layouts for exact counting, use sample_probabilities()')
+        return count, vector
+
+    def count(self):
+        """
+        :return: int Точное количество расстановок флота, согласованных с публичным видом поля
+        """
+        return self.__solve_exact()[0]
+
+    def probabilities(self):
+        """
+        Точная вероятность того, что в клетке стоит палуба, по всем согласованным расстановкам
+        :return: list Список списков size x size. Если согласованных расстановок нет - ValueError
+        """
+        count, vector = self.__solve_exact()
+        if not count:
+            raise ValueError('No fleet layout is consistent with the field')
+        size, mask = self.__size, (1 << COUNTER_BITS) - 1
+        return [[((vector >> (self.__pos(row, col) * COUNTER_BITS)) & mask) / count
+                 for col in range(1, size + 1)] for row in range(1, size + 1)]
+
+    def sample_uniform(self, rng=None):
+        """
+        Выбирает одну расстановку строго равновероятно среди всех согласованных. Использует счетчики точного
+        перебора: на каждом шаге зона корабля выбирается с весом, равным количеству расстановок остальных кораблей.
+        После первого вызова (который выполняет точный перебор) каждая расстановка строится за O(кораблей * зон)
+        :param rng: random.Random Генератор случайных чисел
+        :return: list Корабли в виде (строка, колонка, ориентация, количество палуб) или None,
+        если согласованных расстановок нет
+        """
+        count = self.__solve_exact()[0]
+        if not count:
+            return None
+        rng = rng or random
+        fleet, last = self.__fleet, len(self.__fleet) - 1
+        layout = []
+        blocked = start = 0
+        for index, decks_num in enumerate(fleet):
+            same = index < last and fleet[index + 1] == decks_num
+            uncovered = self.__hits & ~blocked
+            target = rng.randrange(count)
+            windows = self.__windows[decks_num]
+            for w in range(start, len(windows)):
+                cells, neighbourhood, _, row, col, orientation = windows[w]
+                if cells & blocked:
+                    continue
+                if index == last:
+                    sub_count = 0 if uncovered & ~cells else 1
+                else:
+                    sub_count = self.__count(index + 1, blocked | neighbourhood, w + 1 if same else 0)[0]
+                if target < sub_count:
+                    break
+                target -= sub_count
+            layout.append((row, col, orientation, decks_num))
+            blocked |= neighbourhood
+            start = w + 1 if same else 0
+            count = sub_count
+        return layout
+
+    def sample_layout(self, rng=None):
+        """
+        Строит одну случайную расстановку флота, согласованную с публичным видом поля. Сначала корабли ставятся
+        так, чтобы накрыть попадания (каждый раз самое первое непокрытое), затем остальные - в случайные зоны
+        :param rng: random.Random Генератор случайных чисел
+        :return: list Корабли в виде (строка, колонка, ориентация, количество палуб) или None,
+        если за SAMPLE_TRIES попыток построить расстановку не удалось
+        """
+        rng = rng or random
+        for _ in range(self.SAMPLE_TRIES):
+            layout = self.__try_sample(rng)
+            if layout is not None:
+                return layout
+        return None
+
+    def __try_sample(self, rng):
+        size, hits = self.__size, self.__hits
+        remaining = list(self.__fleet)
+        blocked = 0
+        layout = []
+
+        # Накрываем попадания: берем самое первое непокрытое и перебираем в случайном порядке все зоны
+        # оставшихся кораблей, которые его содержат
+        while hits & ~blocked:
+            uncovered = hits & ~blocked
+            row, col = divmod((uncovered & -uncovered).bit_length() - 1, size)
+            row, col = row + 1, col + 1
+            options = []
+            for decks_num in set(remaining):
+                for orientation in ((0, 1) if decks_num > 1 else (0,)):
+                    for shift in range(decks_num):
+                        start = (row - shift, col) if orientation else (row, col - shift)
+                        masks = self.__window(start[0], start[1], orientation, decks_num)
+                        if masks is not None and self.__fits(masks[0], masks[1], blocked):
+                            options.append((start[0], start[1], orientation, decks_num, masks[1]))
+            if not options:
+                return None
+            row, col, orientation, decks_num, neighbourhood = rng.choice(options)
+            layout.append((row, col, orientation, decks_num))
+            remaining.remove(decks_num)
+            blocked |= neighbourhood
+
+        # Остальные корабли - в случайные подходящие зоны
+        for decks_num in remaining:
+            for _ in range(self.SAMPLE_TRIES):
+                orientation = rng.randrange(2) if decks_num > 1 else 0
+                row, col = rng.randint(1, size), rng.randint(1, size)
+                masks = self.__window(row, col, orientation, decks_num)
+                if masks is not None and self.__fits(masks[0], masks[1], blocked):
+                    layout.append((row, col, orientation, decks_num))
+                    blocked |= masks[1]
+                    break
+            else:
+                return None
+        return layout
+
+    def sample_probabilities(self, samples=1000, rng=None):
+        """
+        Оценивает вероятность палубы в каждой клетке по случайным согласованным расстановкам
+        :param samples: int Количество расстановок
+        :param rng: random.Random Генератор случайных чисел
+        :return: list Список списков size x size
+        """
+        size = self.__size
+        counts = [[0] * size for _ in range(size)]
+        built = 0
+        for _ in range(samples):
+            layout = self.sample_layout(rng)
+            if layout is None:
+                continue
+            built += 1
+            for row, col, orientation, decks_num in layout:
+                for i in range(decks_num):
+                    if orientation:
+                        counts[row + i - 1][col - 1] += 1
+                    else:
+                        counts[row - 1][col + i - 1] += 1
+        if not built:
+            raise ValueError('Could not sample a fleet layout consistent with the field')
+        return [[value / built for value in line] for line in counts]
+
+    def solve(self, samples=1000, rng=None):
+        """
+        Точные вероятности для полей не больше EXACT_CELLS_LIMIT клеток, иначе оценка Монте-Карло
+        :param samples: int Количество расстановок для оценки Монте-Карло
+        :param rng: random.Random Генератор случайных чисел
+        :return: list Список списков size x size
+        """
+        if self.__size * self.__size <= self.EXACT_CELLS_LIMIT:
+            return self.probabilities()
+        return self.sample_probabilities(samples, rng)
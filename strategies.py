@@ -0,0 +1,171 @@
+"""
+Стратегии игроков для игрового движка Engine.
+
+Стратегия расстановки реализует метод place(field, fleet, rng): ставит на поле field корабли из fleet
+через Field.place_ship. Если очередной корабль поставить некуда, выбрасывает IndexError.
+
+Стратегия стрельбы реализует метод choose(field, fleet, rng) -> (row, col): выбирает клетку поля противника
+field, в которую еще не стреляли; fleet - состав флота противника. Стратегия должна смотреть только
+на публичные статусы клеток.
+
+Модуль не зависит от main, поэтому стратегии можно подключать и к полям консольной игры
+"""
+import weakref
+
+
+class RandomPlacement:
+    """
+    Расставляет корабли по очереди в случайные свободные зоны, как это делает SkynetField.
+    Каждый корабль ставится один раз, поэтому зоны берутся из Field.free_windows, а не из индекса зон,
+    который пришлось бы строить и поддерживать
+    """
+
+    @staticmethod
+    def place(field, fleet, rng):
+        """
+        :param field: Объект Field, на котором расставляются корабли
+        :param fleet: Последовательность размеров кораблей
+        :param rng: random.Random Генератор случайных чисел
+        :return: None
+        """
+        for decks_num in fleet:
+            windows = field.free_windows(decks_num)
+            if not windows:
+                raise IndexError(f'No room left for a {decks_num}-deck ship')
+            i = rng.randrange(len(windows) // 3) * 3
+            field.place_ship(windows[i], windows[i + 1], windows[i + 2], decks_num)
+
+
+class RandomShooting:
+    """
+    Стреляет в случайную клетку из тех, в которые еще не стреляли, как это делает SkynetField
+    """
+
+    @staticmethod
+    def choose(field, fleet, rng):
+        """
+        :param field: Объект Field противника
+        :param fleet: Состав флота противника (не используется)
+        :param rng: random.Random Генератор случайных чисел
+        :return: tuple (строка, колонка)
+        """
+        row, col, _ = field.window_index(1, True).choice(rng)
+        return row, col
+
+
+class DensityShooting:
+    """
+    Стрельба по карте плотности вероятности (охота и добивание).
+
+    В режиме охоты стреляет в клетку, которую накрывает больше всего возможных положений кораблей флота
+    (Field.heat_map, карта обновляется инкрементально после каждого выстрела). После попадания переходит
+    в режим добивания: стреляет в соседние по горизонтали и вертикали клетки подбитой группы палуб, а если
+    в группе уже две палубы на одной линии - только в продолжение этой линии. Группа считается потопленной,
+    когда продолжать ее некуда или ее длина равна самому большому из непотопленных кораблей. Клетки вокруг
+    потопленной группы и клетки по диагонали от попаданий исключаются: по правилам там не может быть кораблей.
+    Размер потопленной группы вычеркивается из флота, и карта плотности строится только по кораблям на плаву.
+
+    Состояние (попадания и исключенные клетки) хранится отдельно для каждого поля противника, поэтому
+    один объект стратегии можно использовать в любом количестве партий
+    """
+
+    def __init__(self):
+        self.__states = weakref.WeakKeyDictionary()
+
+    def __state(self, field):
+        state = self.__states.get(field)
+        if state is None:
+            # last - клетка последнего выстрела, hits - попадания в еще не потопленные корабли,
+            # blocked - номера клеток, в которых кораблей быть не может, afloat - размеры непотопленных кораблей
+            # (None до первого хода)
+            state = {'last': None, 'hits': set(), 'blocked': set(), 'afloat': None}
+            self.__states[field] = state
+        return state
+
+    def choose(self, field, fleet, rng):
+        """
+        :param field: Объект Field противника
+        :param fleet: Состав флота противника
+        :param rng: random.Random Генератор случайных чисел (нужен только если карта плотности пуста)
+        :return: tuple (строка, колонка)
+        """
+        state = self.__state(field)
+        size = field.size
+        if state['afloat'] is None:
+            state['afloat'] = sorted(fleet)
+        if state['last'] is not None and field.get_status(*state['last'], True) == 'X':
+            row, col = state['last']
+            state['hits'].add(state['last'])
+            # По диагонали от палубы других палуб быть не может
+            for x, y in ((row - 1, col - 1), (row - 1, col + 1), (row + 1, col - 1), (row + 1, col + 1)):
+                if 1 <= x <= size and 1 <= y <= size:
+                    state['blocked'].add((x - 1) * size + (y - 1))
+
+        afloat = tuple(state['afloat'])
+        candidates = self.__candidates(field, state)
+        if tuple(state['afloat']) != afloat:
+            # Потоплен корабль: старая карта плотности больше не нужна, поле не должно ее обновлять
+            field.discard_heat_map(afloat)
+        heat_map = field.heat_map(state['afloat'] or fleet)
+        if candidates:
+            target = max(candidates, key=lambda cell: heat_map.heat(*cell))
+        else:
+            target = heat_map.best(state['blocked'])
+        if target is None:
+            row, col, _ = field.window_index(1, True).choice(rng)
+            target = row, col
+
+        state['last'] = target
+        return target
+
+    @staticmethod
+    def __cluster(hits, start):
+        """
+        Находит группу попаданий, связанных по горизонтали и вертикали
+        :return: list Клетки группы
+        """
+        cluster, stack = {start}, [start]
+        while stack:
+            row, col = stack.pop()
+            for neighbour in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if neighbour in hits and neighbour not in cluster:
+                    cluster.add(neighbour)
+                    stack.append(neighbour)
+        return sorted(cluster)
+
+    def __candidates(self, field, state):
+        """
+        Режим добивания: находит клетки рядом с подбитыми, но еще не потопленными кораблями.
+        Попутно убирает из состояния группы, которые уже потоплены, и вычеркивает их размеры из флота
+        :return: list Клетки (строка, колонка) для добивания или пустой список, если добивать нечего
+        """
+        size = field.size
+        hits, afloat = state['hits'], state['afloat']
+        while hits:
+            cluster = self.__cluster(hits, next(iter(hits)))
+            candidates = []
+            if afloat and len(cluster) < afloat[-1]:
+                (first_row, first_col), (last_row, last_col) = cluster[0], cluster[-1]
+                if len(cluster) == 1:
+                    neighbours = ((first_row - 1, first_col), (first_row + 1, first_col),
+                                  (first_row, first_col - 1), (first_row, first_col + 1))
+                elif first_row == last_row:
+                    neighbours = ((first_row, first_col - 1), (last_row, last_col + 1))
+                else:
+                    neighbours = ((first_row - 1, first_col), (last_row + 1, last_col))
+                candidates = [(x, y) for x, y in neighbours
+                              if 1 <= x <= size and 1 <= y <= size and field.get_status(x, y, True) == ' '
+                              and (x - 1) * size + (y - 1) not in state['blocked']]
+
+            if candidates:
+                return candidates
+
+            # Продолжать группу некуда - корабль потоплен. Вокруг него кораблей быть не может
+            if len(cluster) in afloat:
+                afloat.remove(len(cluster))
+            for row, col in cluster:
+                hits.discard((row, col))
+                for x in range(max(1, row - 1), min(size, row + 1) + 1):
+                    for y in range(max(1, col - 1), min(size, col + 1) + 1):
+                        state['blocked'].add((x - 1) * size + (y - 1))
+        return []
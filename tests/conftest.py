@@ -0,0 +1,8 @@
+"""
+Общие настройки тестов: модули игры лежат в корне проекта, поэтому он добавляется в пути импорта,
+и тесты запускаются как python -m pytest, так и просто pytest
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
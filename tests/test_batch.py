@@ -0,0 +1,109 @@
+"""
+Тесты пакетной среды: результаты шагов BatchEnv совпадают с выстрелами Field.fire по тем же расстановкам
+"""
+import random
+
+import pytest
+
+from batch import BatchEnv
+from main import Field
+
+SIZE, FLEET, BATCH = 6, (3, 2, 2, 1, 1, 1), 16
+
+
+def reveal_layouts(env, seeds):
+    """
+    Узнает расстановки полей среды по ее же ответам: стреляет во все клетки, а палубы, соседние по стороне,
+    собирает в корабли (корабли не касаются друг друга)
+    :return: list Расстановки полей: списки кораблей (строка, колонка, ориентация, количество палуб)
+    """
+    env.reset(seeds)
+    cells = SIZE * SIZE
+    decks = [set() for _ in range(env.batch_size)]
+    for cell in range(cells):
+        _, hit, _, _ = env.step([cell] * env.batch_size)
+        for board in range(env.batch_size):
+            if hit[board]:
+                decks[board].add(divmod(cell, SIZE))
+    layouts = []
+    for board_decks in decks:
+        layout = []
+        for row, col in sorted(board_decks):
+            if (row - 1, col) in board_decks or (row, col - 1) in board_decks:
+                continue
+            orientation = int((row + 1, col) in board_decks)
+            length = 1
+            while (row + length * orientation, col + length * (1 - orientation)) in board_decks:
+                length += 1
+            layout.append((row + 1, col + 1, orientation, length))
+        layouts.append(layout)
+    return layouts
+
+
+def test_reset_draws_layouts_with_the_whole_fleet():
+    env = BatchEnv(BATCH, SIZE, FLEET, pool_size=4, seed=1)
+    for layout in reveal_layouts(env, range(BATCH)):
+        assert sorted(decks_num for _, _, _, decks_num in layout) == sorted(FLEET)
+
+
+def test_step_matches_field_fire():
+    env = BatchEnv(BATCH, SIZE, FLEET, pool_size=4, seed=1)
+    seeds = range(100, 100 + BATCH)
+    fields = []
+    for layout in reveal_layouts(env, seeds):
+        field = Field(SIZE, fleet=FLEET)
+        for ship in layout:
+            field.place_ship(*ship)
+        fields.append(field)
+
+    observations = env.reset(seeds)
+    assert not any(observations)
+    assert env.alive == [sum(FLEET)] * BATCH
+    rng = random.Random(2)
+    while not all(field.all_ships_sunk() for field in fields):
+        # На каждом поле - случайная клетка, куда поле еще разрешает стрелять. На законченных полях среда
+        # выстрелы игнорирует, поэтому клетка любая
+        actions = []
+        for field in fields:
+            free = [cell for cell in range(SIZE * SIZE)
+                    if field.get_status(cell // SIZE + 1, cell % SIZE + 1, True) == ' ']
+            actions.append(rng.choice(free) if free and not field.all_ships_sunk() else 0)
+        finished = [field.all_ships_sunk() for field in fields]
+        observations, hit, sunk, done = env.step(actions)
+        for board, (field, cell) in enumerate(zip(fields, actions)):
+            if finished[board]:
+                assert (hit[board], sunk[board], done[board]) == (0, 0, 1)
+                continue
+            row, col = cell // SIZE + 1, cell % SIZE + 1
+            expected_hit = field.fire(row, col)
+            expected_sunk = expected_hit and field.ship_at(row, col)[0].sunk
+            assert (bool(hit[board]), bool(sunk[board]), bool(done[board])) == \
+                   (expected_hit, expected_sunk, field.all_ships_sunk())
+            assert env.alive[board] == field.alive_decks_num()
+            # Клетки вокруг потопленных кораблей среда не открывает, остальные статусы совпадают с полем
+            public = [[status if status != '-' else ' ' for status in field.row_statuses(line, True)]
+                      for line in range(1, SIZE + 1)]
+            assert env.statuses(board) == public
+
+
+def test_repeated_shot_is_a_miss():
+    env = BatchEnv(2, SIZE, FLEET, pool_size=2, seed=1)
+    layouts = reveal_layouts(env, (3, 4))
+    env.reset((3, 4))
+    row, col, _, _ = layouts[0][0]
+    cell = (row - 1) * SIZE + col - 1
+    _, hit, _, _ = env.step([cell, cell])
+    assert hit[0] == 1
+    _, hit, _, _ = env.step([cell, cell])
+    assert hit[0] == 0
+
+
+def test_step_rejects_wrong_actions():
+    env = BatchEnv(4, SIZE, FLEET, pool_size=2)
+    env.reset(range(4))
+    with pytest.raises(ValueError):
+        env.step([0] * 3)
+    with pytest.raises(ValueError):
+        env.step([0, 0, 0, SIZE * SIZE])
+    with pytest.raises(ValueError):
+        env.step([0, -1, 0, 0])
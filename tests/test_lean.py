@@ -0,0 +1,73 @@
+"""
+Тесты быстрого режима LeanField: партии движка и зоны поля такие же, как у ArrayField
+"""
+import random
+
+import pytest
+
+from compact import ArrayField
+from engine import Engine, Player, random_player
+from lean import LeanField
+from placement import LayoutGenerator
+from strategies import DensityShooting, RandomPlacement
+
+
+def layers(field, public):
+    return [field.row_statuses(row, public) for row in range(1, field.size + 1)]
+
+
+@pytest.mark.parametrize('size, fleet', [(6, (3, 2, 2, 1, 1, 1)), (10, (4, 3, 3, 2, 2, 2, 1, 1, 1, 1))])
+def test_engine_games_match_array_field(size, fleet):
+    density = (Player(RandomPlacement(), DensityShooting()), random_player())
+    for seed in range(40):
+        players = density if seed % 2 else (random_player(), random_player())
+        reference, lean = Engine.new(size, fleet, seed, ArrayField), Engine.new(size, fleet, seed, LeanField)
+        assert reference.play(players) == lean.play(players)
+        assert reference.shots == lean.shots
+        for player in range(2):
+            expected, field = reference.field(player), lean.field(player)
+            assert field.lean
+            assert field.alive_decks_num() == expected.alive_decks_num()
+            for public in (False, True):
+                assert layers(field, public) == layers(expected, public)
+            # После materialize поле работает в обычном режиме с теми же кораблями и статусами
+            field.materialize()
+            assert not field.lean
+            assert len(field.ships) == len(expected.ships)
+            assert field.alive_decks_num() == expected.alive_decks_num()
+            assert layers(field, False) == layers(expected, False)
+
+
+@pytest.mark.parametrize('size', range(1, 11))
+def test_free_windows_match_array_field(size):
+    rng = random.Random(size)
+    fleet = (1,) if size < 3 else ((2, 1) if size < 5 else (3, 2, 2, 1, 1, 1))
+    for _ in range(5):
+        reference, field = ArrayField(size, fleet=fleet), LeanField(size, fleet=fleet)
+        for ship in LayoutGenerator(size, fleet).generate(rng):
+            reference.place_ship(*ship)
+            field.place_ship(*ship)
+        for _ in range(rng.randrange(size * size)):
+            row, col = rng.randint(1, size), rng.randint(1, size)
+            if reference.get_status(row, col, True) == ' ':
+                assert field.fire(row, col) == reference.fire(row, col)
+        # Зоны сверяются и в быстром режиме, и после materialize
+        for _ in range(2):
+            for decks_num in range(1, size + 2):
+                for public in (False, True):
+                    assert field.free_windows(decks_num, public) == reference.free_windows(decks_num, public)
+                    assert field.free_window_keys(decks_num, public) == reference.free_window_keys(decks_num, public)
+            assert field.all_ships_sunk() == reference.all_ships_sunk()
+            field.materialize()
+
+
+def test_lean_place_ship_rejects_taken_window():
+    field = LeanField(6, fleet=(3, 2))
+    assert field.place_ship(1, 1, 0, 3) is None
+    with pytest.raises(ValueError):
+        field.place_ship(2, 2, 1, 2)
+    with pytest.raises(ValueError):
+        field.place_ship(6, 6, 0, 2)
+    field.fire(1, 1)
+    with pytest.raises(ValueError):
+        field.fire(1, 1)
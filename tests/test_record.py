@@ -0,0 +1,151 @@
+"""
+Тесты формата записи партий: запись, потоковое чтение, воспроизведение и архив с индексом
+"""
+import os
+
+import pytest
+
+from engine import Engine, random_player
+from record import (INDEX_SUFFIX, MAGIC, GameArchive, GameRecord, GameWriter, decode_game, encode_game,
+                    index_is_stale, iter_records, read_games, record_offsets, replay, write_varint)
+
+
+def play_games(path, games, first_seed=1, append=False):
+    """
+    Играет партии случайных игроков и записывает их через подписку на поля
+    :return: list Записанные партии GameRecord
+    """
+    players = (random_player(), random_player())
+    with GameWriter(path, append=append) as writer:
+        for seed in range(first_seed, first_seed + games):
+            engine = Engine.new(6, (3, 2, 2, 1, 1, 1), seed=seed)
+            for player in range(2):
+                engine.setup(player, players[player].placement)
+            writer.attach((engine.field(0), engine.field(1)))
+            engine.play(players)
+            writer.finish()
+    return list(read_games(path))[-games:]
+
+
+def append_raw(path, record):
+    """
+    Дописывает запись в конец файла в обход GameWriter, не трогая индекс
+    """
+    payload = encode_game(record)
+    header = bytearray()
+    write_varint(header, len(payload))
+    with open(path, 'ab') as stream:
+        stream.write(bytes(header) + payload)
+
+
+def make_older(path, other):
+    """
+    Делает время изменения файла path меньше, чем у other, чтобы индекс не считался устаревшим по времени
+    """
+    stat = os.stat(other)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 ** 9))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'games.sbr')
+
+
+def test_encode_decode_round_trip():
+    record = GameRecord(6, (((1, 1, 0, 3), (3, 1, 1, 2)), ((6, 6, 0, 1),)),
+                        ((0, 6, 6, True), (1, 1, 1, True), (0, 1, 1, False)))
+    assert decode_game(encode_game(record)) == record
+
+
+def test_writer_and_streaming_reader_round_trip(path):
+    records = play_games(path, 30)
+    assert len(records) == 30
+    # Маленькие куски заставляют читателя собирать записи на границах кусков
+    offsets = [offset for offset, _ in iter_records(path, chunk_size=7)]
+    assert offsets == list(record_offsets(path))
+    assert offsets[0] == len(MAGIC)
+    payloads = [decode_game(payload) for _, payload in iter_records(path, chunk_size=7)]
+    assert payloads == records
+
+
+def test_replay_reproduces_recorded_shots(path):
+    for record in play_games(path, 10):
+        results = list(replay(record))
+        assert [(result.player, result.row, result.col, result.hit) for result in results] == list(record.shots)
+        # Партия записана до потопления всего флота, и только последний выстрел заканчивает игру
+        assert results[-1].game_over
+        assert not any(result.game_over for result in results[:-1])
+
+
+def test_replay_rejects_mismatched_shot(path):
+    record = play_games(path, 1)[0]
+    player, row, col, hit = record.shots[0]
+    broken = record._replace(shots=((player, row, col, not hit),) + record.shots[1:])
+    with pytest.raises(ValueError):
+        list(replay(broken))
+
+
+def test_archive_random_access(path):
+    records = play_games(path, 25)
+    with GameArchive(path) as archive:
+        assert len(archive) == 25
+        assert archive[0] == records[0]
+        assert archive[17] == records[17]
+        assert archive[-1] == records[-1]
+        assert list(archive) == records
+
+
+def test_writer_append_extends_index(path):
+    records = play_games(path, 5)
+    records += play_games(path, 4, first_seed=100, append=True)
+    assert not index_is_stale(path)
+    with GameArchive(path) as archive:
+        assert list(archive) == records
+
+
+def test_archive_rejects_foreign_file(path):
+    with open(path, 'wb') as stream:
+        stream.write(b'not a record file')
+    with pytest.raises(ValueError):
+        GameArchive(path)
+
+
+def test_missing_index_is_rebuilt(path):
+    records = play_games(path, 6)
+    os.remove(path + INDEX_SUFFIX)
+    assert index_is_stale(path)
+    with GameArchive(path) as archive:
+        assert list(archive) == records
+    assert not index_is_stale(path)
+
+
+def test_index_of_appended_file_is_rebuilt(path):
+    records = play_games(path, 6)
+    append_raw(path, records[0])
+    # Файл записей дописан после индекса: индекс устарел по времени изменения
+    stat = os.stat(path + INDEX_SUFFIX)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert index_is_stale(path)
+    with GameArchive(path) as archive:
+        assert len(archive) == 7
+        assert archive[6] == records[0]
+
+
+def test_index_of_truncated_file_is_rebuilt(path):
+    records = play_games(path, 6)
+    offsets = record_offsets(path)
+    with open(path, 'r+b') as stream:
+        stream.truncate(offsets[4])
+    # Время изменения не помогает: устаревший индекс узнается по смещению за концом файла
+    make_older(path, path + INDEX_SUFFIX)
+    assert index_is_stale(path)
+    with GameArchive(path) as archive:
+        assert list(archive) == records[:4]
+
+
+def test_truncated_record_is_reported(path):
+    play_games(path, 3)
+    with open(path, 'r+b') as stream:
+        stream.truncate(os.path.getsize(path) - 1)
+    with pytest.raises(ValueError):
+        list(read_games(path))
@@ -0,0 +1,137 @@
+"""
+Тесты протокола сервера: обмен строками JSON с партией Match напрямую и с MatchServer по TCP
+"""
+import asyncio
+import json
+import random
+
+from main import Game
+from record import replay
+from server import FINISHED, PLAYING, Match, MatchServer
+
+# Расстановка флота 3, 2, 2, 1, 1, 1 на поле 6x6 по палубам, в порядке, в котором сервер их запрашивает
+DECKS = [(1, 1), (1, 2), (1, 3), (1, 5), (1, 6), (3, 1), (3, 2), (3, 4), (3, 6), (5, 1)]
+
+
+class Client:
+    """
+    Удаленный игрок: получает сообщения строками JSON и отправляет команды строками JSON
+    """
+
+    def __init__(self, size=Game.FIELD_SIZE()):
+        self.lines = []
+        self.targets = [(row, col) for row in range(1, size + 1) for col in range(1, size + 1)]
+
+    def send(self, message):
+        self.lines.append(json.dumps(message, ensure_ascii=False))
+
+    @property
+    def messages(self):
+        return [json.loads(line) for line in self.lines]
+
+    def take(self):
+        messages, self.lines = self.messages, []
+        for message in messages:
+            # Клетки, куда уже стреляли, и клетки вокруг потопленных кораблей больше не цели
+            if message['type'] == 'shot' and message['by'] == 'you':
+                for cell in [[message['row'], message['col']]] + message.get('border', []):
+                    if tuple(cell) in self.targets:
+                        self.targets.remove(tuple(cell))
+        return messages
+
+    def command(self, match, seat, message):
+        match.handle(seat, json.loads(json.dumps(message)))
+        return self.take()
+
+
+def test_match_exchange():
+    clients = (Client(), Client())
+    match = Match(rng=random.Random(1))
+    assert [match.join(client.send) for client in clients] == [0, 1]
+    for seat, client in enumerate(clients):
+        assert client.take() == [{'type': 'start', 'size': 6, 'fleet': [3, 2, 2, 1, 1, 1], 'seat': seat},
+                                 {'type': 'place', 'decks': 3, 'deck': 1}]
+
+    first, second = clients
+    assert second.command(match, 1, {'cmd': 'auto'}) == [{'type': 'placed'}]
+    # Неверные команды отвергаются без изменения состояния
+    progress = match.progress
+    assert first.command(match, 0, {'cmd': 'deck', 'cell': '9 9'}) == [
+        {'type': 'error', 'message': 'Координаты вне игрового поля!'}]
+    assert first.command(match, 0, {'cmd': 'fire', 'cell': '1 1'}) == [
+        {'type': 'error', 'message': 'Сейчас не ваш ход'}]
+    assert first.command(match, 0, {'cmd': 'dance'})[0]['type'] == 'error'
+    assert match.progress == progress
+
+    prompts = []
+    for row, col in DECKS:
+        prompts += first.command(match, 0, {'cmd': 'deck', 'cell': f'{row} {col}'})
+    assert prompts == [{'type': 'place', 'decks': 3, 'deck': 2}, {'type': 'place', 'decks': 3, 'deck': 3},
+                       {'type': 'place', 'decks': 2, 'deck': 1}, {'type': 'place', 'decks': 2, 'deck': 2},
+                       {'type': 'place', 'decks': 2, 'deck': 1}, {'type': 'place', 'decks': 2, 'deck': 2},
+                       {'type': 'place', 'decks': 1, 'deck': 1}, {'type': 'place', 'decks': 1, 'deck': 1},
+                       {'type': 'place', 'decks': 1, 'deck': 1}, {'type': 'placed'}, {'type': 'turn'}]
+    assert match.stage == PLAYING
+
+    while match.stage != FINISHED:
+        seat = match.turn
+        shooter, target = clients[seat], clients[1 - seat]
+        row, col = shooter.targets[0]
+        messages = shooter.command(match, seat, {'cmd': 'fire', 'cell': f'{row} {col}'})
+        shot = messages[0]
+        assert (shot['type'], shot['by'], shot['row'], shot['col']) == ('shot', 'you', row, col)
+        # Противник видит тот же выстрел, а затем получает ход или итог партии
+        opponent = target.take()
+        assert opponent[0] == dict(shot, by='opponent')
+        if match.stage == FINISHED:
+            assert messages[1:] == [{'type': 'game_over', 'winner': 'you'}]
+            assert opponent[1:] == [{'type': 'game_over', 'winner': 'opponent'}]
+        else:
+            assert opponent[1:] == [{'type': 'turn'}]
+
+    # Записанная партия воспроизводится и заканчивается победой того же игрока
+    results = list(replay(match.record()))
+    assert results[-1].game_over and results[-1].player == match.winner
+
+
+def test_server_plays_against_bot_over_tcp():
+    async def play():
+        server = MatchServer(bot_shooting='random', seed=1)
+        listener = await server.start('127.0.0.1', 0)
+        host, port = listener.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        client = Client()
+
+        async def command(message):
+            writer.write(json.dumps(message).encode() + b'\n')
+            await writer.drain()
+
+        async def receive(until):
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 10)
+                assert line.endswith(b'\n')
+                client.lines.append(line.decode())
+                if json.loads(line)['type'] in until:
+                    return client.take()
+
+        await command({'cmd': 'play', 'opponent': 'bot'})
+        messages = await receive(('place',))
+        assert messages[0]['type'] == 'start' and messages[0]['seat'] == 0
+        await command({'cmd': 'auto'})
+        assert [message['type'] for message in await receive(('turn',))] == ['placed', 'turn']
+        while True:
+            row, col = client.targets[0]
+            await command({'cmd': 'fire', 'cell': f'{row} {col}'})
+            messages = await receive(('turn', 'game_over'))
+            if messages[-1]['type'] == 'game_over':
+                break
+        # После окончания партии сервер закрывает подключение
+        assert await reader.readline() == b''
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return messages[-1], server.scheduler.metrics
+
+    result, metrics = asyncio.run(play())
+    assert result['winner'] in ('you', 'opponent')
+    assert metrics['matches_started'] == metrics['matches_finished'] == 1
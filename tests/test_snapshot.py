@@ -0,0 +1,117 @@
+"""
+Тесты снимков состояния: после restore статусы клеток, хеши Зобриста, счетчики живых палуб
+и индексы зон поля в точности такие же, как в момент snapshot
+"""
+import random
+
+import pytest
+
+from bitboard import BitboardField
+from compact import ArrayField
+from engine import Engine, random_player
+from lean import LeanField
+from main import Field
+from strategies import RandomPlacement
+from zobrist import ZobristHash
+
+FLEET = (3, 2, 2, 1, 1, 1)
+FIELD_CLASSES = (Field, ArrayField, BitboardField, LeanField)
+
+
+def field_state(field):
+    """
+    :return: tuple Все, что должно восстанавливаться: статусы обоих слоев, хеши, счетчики палуб и индексы зон
+    """
+    size = field.size
+    return (tuple(tuple(field.row_statuses(row, public)) for public in (False, True) for row in range(1, size + 1)),
+            field.zobrist().value, field.zobrist(True).value, field.zobrist(True, symmetric=True).canonical,
+            field.alive_decks_num(), tuple(ship.alive_decks for ship in field.ships),
+            tuple(sorted(zip(*[iter(field.window_index(decks_num, public).windows())] * 3))
+                  for decks_num in (1, 2, 3) for public in (False, True)))
+
+
+def fire_randomly(field, shots, rng):
+    """
+    Стреляет в случайные клетки, куда еще не стреляли, пока не сделает shots выстрелов или не потопит флот
+    """
+    size = field.size
+    for _ in range(shots):
+        cells = [(row, col) for row in range(1, size + 1) for col in range(1, size + 1)
+                 if field.get_status(row, col, True) == ' ']
+        if not cells or field.all_ships_sunk():
+            return
+        field.fire(*rng.choice(cells))
+
+
+def new_field(field_class, seed):
+    field = field_class(6, fleet=FLEET)
+    RandomPlacement.place(field, FLEET, random.Random(seed))
+    return field
+
+
+@pytest.mark.parametrize('field_class', FIELD_CLASSES)
+@pytest.mark.parametrize('seed', range(5))
+def test_restore_returns_exact_state(field_class, seed):
+    rng = random.Random(seed)
+    field = new_field(field_class, seed)
+    fire_randomly(field, 5, rng)
+    before = field_state(field)
+    token = field.snapshot()
+    fire_randomly(field, 100, rng)
+    assert field.all_ships_sunk()
+    field.restore(token)
+    assert field_state(field) == before
+    # Инкрементальные хеши совпадают с вычисленными заново по всему полю
+    assert field.zobrist().value == ZobristHash(field).value
+    assert field.zobrist(True).value == ZobristHash(field, True).value
+
+
+@pytest.mark.parametrize('field_class', FIELD_CLASSES)
+def test_restore_undoes_placement(field_class):
+    field = field_class(6, fleet=FLEET)
+    empty = field_state(field)
+    token = field.snapshot()
+    RandomPlacement.place(field, FLEET, random.Random(1))
+    fire_randomly(field, 10, random.Random(2))
+    field.restore(token)
+    assert field_state(field) == empty
+    assert field.ships == []
+    # После отката поле снова принимает ту же расстановку
+    RandomPlacement.place(field, FLEET, random.Random(1))
+    assert field.alive_decks_num() == sum(FLEET)
+
+
+@pytest.mark.parametrize('field_class', FIELD_CLASSES)
+def test_nested_snapshots(field_class):
+    rng = random.Random(3)
+    field = new_field(field_class, 3)
+    first_state, first = field_state(field), field.snapshot()
+    fire_randomly(field, 8, rng)
+    second_state, second = field_state(field), field.snapshot()
+    fire_randomly(field, 8, rng)
+    field.restore(second)
+    assert field_state(field) == second_state
+    field.restore(first)
+    assert field_state(field) == first_state
+    # Снимки работают как стек: после отката к первому второй недействителен
+    with pytest.raises(ValueError):
+        field.restore(second)
+
+
+def test_engine_restore_returns_game_state():
+    players = (random_player(), random_player())
+    engine = Engine.new(6, FLEET, seed=7)
+    for player in range(2):
+        engine.setup(player, players[player].placement)
+    for _ in range(10):
+        engine.fire(engine.turn, *players[engine.turn].shooting.choose(engine.field(1 - engine.turn), FLEET,
+                                                                         engine.rng(engine.turn)))
+    token = engine.snapshot()
+    states = [field_state(engine.field(player)) for player in range(2)]
+    turn, shots = engine.turn, engine.shots
+    engine.play(players)
+    engine.restore(token)
+    assert [field_state(engine.field(player)) for player in range(2)] == states
+    assert (engine.turn, engine.shots, engine.winner) == (turn, shots, None)
+    # Генераторы игроков не запоминаются, поэтому партия доигрывается заново, но уже с восстановленной позиции
+    assert engine.play(players) == engine.winner
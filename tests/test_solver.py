@@ -0,0 +1,110 @@
+"""
+Тесты точного решателя расстановок: количество расстановок и вероятности сверяются с полным перебором
+на маленьких полях
+"""
+import random
+from itertools import product
+
+import pytest
+
+from main import Field
+from solver import LayoutSolver
+from strategies import RandomPlacement
+
+
+def ship_cells(size, decks_num):
+    """
+    :return: set Все зоны корабля на пустом поле: множества клеток (строка, колонка) без учета ориентации
+    """
+    zones = set()
+    for row, col, orientation in product(range(1, size + 1), range(1, size + 1), (0, 1)):
+        cells = frozenset((row + i * orientation, col + i * (1 - orientation)) for i in range(decks_num))
+        if all(x <= size and y <= size for x, y in cells):
+            zones.add(cells)
+    return zones
+
+
+def brute_force(size, fleet, hits=(), misses=()):
+    """
+    Перебирает все расстановки флота, в которых корабли не касаются друг друга даже углами, не занимают промахов
+    и накрывают все попадания
+    :return: tuple (количество расстановок, словарь клетка -> количество расстановок с палубой в ней)
+    """
+    hits, misses = set(hits), set(misses)
+    layouts = set()
+
+    def place(ships, taken, layout):
+        if not ships:
+            if hits <= taken:
+                layouts.add(frozenset(layout))
+            return
+        for zone in ship_cells(size, ships[0]):
+            if zone & misses:
+                continue
+            if any(abs(x - a) <= 1 and abs(y - b) <= 1 for x, y in zone for a, b in taken):
+                continue
+            place(ships[1:], taken | zone, layout + [zone])
+
+    place(sorted(fleet, reverse=True), frozenset(), [])
+    counts = {}
+    for layout in layouts:
+        for cell in frozenset().union(*layout):
+            counts[cell] = counts.get(cell, 0) + 1
+    return len(layouts), counts
+
+
+CASES = [
+    (4, (2, 1, 1), (), ()),
+    (4, (2, 1, 1), ((2, 2),), ((1, 1), (4, 4))),
+    (4, (3, 1), ((1, 2),), ()),
+    (5, (3, 2, 1), (), ()),
+    (5, (3, 2, 1, 1), (), ()),
+    (5, (3, 2, 1, 1), ((3, 3),), ((1, 1), (1, 2), (5, 5))),
+    (5, (2, 2, 1), ((1, 1), (1, 2)), ((3, 3),)),
+]
+
+
+@pytest.mark.parametrize('size, fleet, hits, misses', CASES)
+def test_exact_count_matches_brute_force(size, fleet, hits, misses):
+    assert LayoutSolver(size, fleet, hits, misses).count() == brute_force(size, fleet, hits, misses)[0]
+
+
+@pytest.mark.parametrize('size, fleet, hits, misses', CASES)
+def test_exact_probabilities_match_brute_force(size, fleet, hits, misses):
+    solver = LayoutSolver(size, fleet, hits, misses)
+    count, counts = brute_force(size, fleet, hits, misses)
+    probabilities = solver.probabilities()
+    for row, col in product(range(1, size + 1), repeat=2):
+        assert probabilities[row - 1][col - 1] == pytest.approx(counts.get((row, col), 0) / count)
+
+
+def test_inconsistent_view_has_no_layouts():
+    # Попадание окружено промахами со всех сторон, а однопалубных кораблей во флоте нет
+    solver = LayoutSolver(4, (2,), hits=((2, 2),), misses=((1, 2), (3, 2), (2, 1), (2, 3)))
+    assert solver.count() == brute_force(4, (2,), ((2, 2),), ((1, 2), (3, 2), (2, 1), (2, 3)))[0] == 0
+    with pytest.raises(ValueError):
+        solver.probabilities()
+
+
+def test_from_field_reads_public_view():
+    fleet = (3, 2, 1, 1)
+    field = Field(5, fleet=fleet)
+    RandomPlacement.place(field, fleet, random.Random(4))
+    rng = random.Random(5)
+    for row, col in rng.sample(list(product(range(1, 6), repeat=2)), 8):
+        if field.get_status(row, col, True) == ' ':
+            field.fire(row, col)
+    hits = [(row, col) for row, col in product(range(1, 6), repeat=2) if field.get_status(row, col, True) == 'X']
+    misses = [(row, col) for row, col in product(range(1, 6), repeat=2)
+              if field.get_status(row, col, True) not in (' ', 'X')]
+    assert LayoutSolver.from_field(field, fleet).count() == brute_force(5, fleet, hits, misses)[0]
+
+
+def test_sample_uniform_returns_consistent_layout():
+    solver = LayoutSolver(5, (3, 2, 1, 1), hits=((3, 3),), misses=((1, 1),))
+    layout = solver.sample_uniform(random.Random(1))
+    field = Field(5, fleet=(3, 2, 1, 1))
+    for row, col, orientation, decks_num in layout:
+        field.place_ship(row, col, orientation, decks_num)
+    assert field.ship_at(3, 3) is not None
+    assert field.ship_at(1, 1) is None
@@ -0,0 +1,244 @@
+"""
+Турнир стратегий: каждая стратегия стрельбы играет против каждой стратегии расстановки.
+
+Партия пары (стрельба S, расстановка P) - обычная партия движка Engine между атакующим игроком
+(случайная расстановка, стрельба S) и защищающимся игроком (расстановка P, случайная стрельба).
+Победа атакующего показывает, насколько S сильнее случайной стрельбы против флота, расставленного P.
+Право первого хода чередуется, чтобы не давать преимущества ни одной стороне.
+
+Зерно каждой партии вычисляется только из главного зерна, названий стратегий и номера партии, а у каждого
+игрока партии свой генератор случайных чисел (Engine.rng), поэтому результаты не зависят от количества
+процессов и от того, как партии разбиты на части, а любую партию турнира можно переиграть отдельно (play_game).
+
+Запуск из корня проекта:
+    python main.py tournament --games 100000 --workers 8 --seed 1
+    python main.py tournament --games 2000 --profile profile.txt --metrics metrics.prom --metrics-format prometheus
+
+С --profile партии играются в одном процессе под cProfile, отчет сортируется по --profile-sort.
+С --metrics замеряются горячие методы игры (модуль instrument), гистограммы пишутся в файл.
+"""
+import argparse
+import functools
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import Engine, Player
+from instrument import Instrumentation, profiled
+from main import Game, derive_seed
+from placement import BacktrackingPlacement, UniformPlacement
+from strategies import DensityShooting, RandomPlacement, RandomShooting
+
+# Доступные стратегии по названиям. Новые стратегии регистрируются здесь
+SHOOTING_STRATEGIES = {
+    'random': RandomShooting,
+    'density': DensityShooting,
+}
+PLACEMENT_STRATEGIES = {
+    'random': RandomPlacement,
+    'backtracking': BacktrackingPlacement,
+    'uniform': UniformPlacement,
+}
+
+# Квантиль нормального распределения для 95% доверительного интервала
+Z_95 = 1.959964
+
+
+@functools.lru_cache(maxsize=None)
+def tournament_players(shooting, placement):
+    """
+    Игроки пары стратегий. Стратегии создаются один раз на процесс: они кэшируют генераторы расстановок,
+    а состояние стрельбы хранят отдельно для каждого поля, поэтому годятся для любого количества партий
+    :return: tuple (атакующий Player, защищающийся Player)
+    """
+    return (Player(RandomPlacement(), SHOOTING_STRATEGIES[shooting]()),
+            Player(PLACEMENT_STRATEGIES[placement](), RandomShooting()))
+
+
+def play_game(shooting, placement, size, fleet, master_seed, game_index):
+    """
+    Проводит одну партию турнира. Партия зависит только от аргументов, поэтому так же можно переиграть
+    любую партию турнира по ее номеру
+    :param shooting: str Название стратегии стрельбы атакующего
+    :param placement: str Название стратегии расстановки защищающегося
+    :param size: int Размер поля
+    :param fleet: tuple Состав флота
+    :param master_seed: int Главное зерно турнира
+    :param game_index: int Номер партии
+    :return: tuple (Engine после окончания партии, номер атакующего игрока)
+    """
+    attacker, defender = tournament_players(shooting, placement)
+    engine = Engine.new(size, fleet, derive_seed(master_seed, shooting, placement, game_index))
+    # В четных партиях первым ходит атакующий, в нечетных - защищающийся
+    attacker_index = game_index % 2
+    engine.play((attacker, defender) if attacker_index == 0 else (defender, attacker))
+    return engine, attacker_index
+
+
+def play_chunk(shooting, placement, size, fleet, master_seed, start, stop):
+    """
+    Проводит партии с номерами [start, stop) для пары стратегий. Выполняется в процессе-обработчике
+    :param shooting: str Название стратегии стрельбы атакующего
+    :param placement: str Название стратегии расстановки защищающегося
+    :param size: int Размер поля
+    :param fleet: tuple Состав флота
+    :param master_seed: int Главное зерно турнира
+    :param start: int Номер первой партии
+    :param stop: int Номер партии, следующей за последней
+    :return: tuple (побед атакующего, сумма выстрелов в победах, сумма квадратов выстрелов в победах)
+    """
+    wins = shots = shots_sq = 0
+    for game_index in range(start, stop):
+        engine, attacker_index = play_game(shooting, placement, size, fleet, master_seed, game_index)
+        if engine.winner == attacker_index:
+            wins += 1
+            attacker_shots = engine.shots[attacker_index]
+            shots += attacker_shots
+            shots_sq += attacker_shots * attacker_shots
+    return wins, shots, shots_sq
+
+
+def wilson_interval(successes, total, z=Z_95):
+    """
+    Доверительный интервал Уилсона для доли успехов
+    :param successes: int Количество успехов
+    :param total: int Количество испытаний
+    :param z: float Квантиль нормального распределения
+    :return: tuple (нижняя граница, верхняя граница)
+    """
+    if not total:
+        return 0.0, 1.0
+    p = successes / total
+    denominator = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denominator
+    spread = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return center - spread, center + spread
+
+
+def summarize(shooting, placement, games, wins, shots, shots_sq):
+    """
+    Считает итоговую статистику пары стратегий
+    :return: dict Статистика: доля побед с интервалом, среднее число выстрелов до победы с интервалом
+    """
+    low, high = wilson_interval(wins, games)
+    mean_shots = shots / wins if wins else None
+    shots_ci = None
+    if wins > 1:
+        variance = (shots_sq - shots * shots / wins) / (wins - 1)
+        half_width = Z_95 * math.sqrt(max(variance, 0.0) / wins)
+        shots_ci = (mean_shots - half_width, mean_shots + half_width)
+    return {
+        'shooting': shooting,
+        'placement': placement,
+        'games': games,
+        'wins': wins,
+        'win_rate': wins / games if games else None,
+        'win_rate_ci': (low, high),
+        'mean_shots_to_win': mean_shots,
+        'mean_shots_to_win_ci': shots_ci,
+    }
+
+
+def run_tournament(shootings, placements, games, master_seed=0, workers=None, chunk=1000,
+                   size=Game.FIELD_SIZE(), fleet=Game.FLEET()):
+    """
+    Проводит турнир: для каждой пары (стрельба, расстановка) играет games партий, разбитых на части по chunk
+    :param shootings: list Названия стратегий стрельбы
+    :param placements: list Названия стратегий расстановки
+    :param games: int Количество партий на каждую пару стратегий
+    :param master_seed: int Главное зерно турнира
+    :param workers: int Количество процессов. 1 - партии играются в текущем процессе
+    :param chunk: int Количество партий в одной части
+    :param size: int Размер поля
+    :param fleet: tuple Состав флота
+    :return: list Статистика по каждой паре стратегий (см. summarize)
+    """
+    for name in shootings:
+        if name not in SHOOTING_STRATEGIES:
+            raise ValueError(f'Unknown shooting strategy {name!r}')
+    for name in placements:
+        if name not in PLACEMENT_STRATEGIES:
+            raise ValueError(f'Unknown placement strategy {name!r}')
+
+    fleet = tuple(fleet)
+    pairs = [(shooting, placement) for shooting in shootings for placement in placements]
+    tasks = [(shooting, placement, size, fleet, master_seed, start, min(start + chunk, games))
+             for shooting, placement in pairs for start in range(0, games, chunk)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [play_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(play_chunk, *zip(*tasks)))
+
+    # Суммы целых чисел не зависят от порядка, в котором части были посчитаны
+    totals = {pair: [0, 0, 0] for pair in pairs}
+    for task, result in zip(tasks, results):
+        total = totals[task[:2]]
+        for i, value in enumerate(result):
+            total[i] += value
+
+    return [summarize(shooting, placement, games, *totals[(shooting, placement)])
+            for shooting, placement in pairs]
+
+
+def format_report(rows):
+    """
+    :param rows: list Статистика пар стратегий
+    :return: str Таблица с результатами турнира
+    """
+    lines = [f'{"стрельба":>12} {"расстановка":>12} {"партий":>9} {"побед, %":>9} {"95% ДИ":>17} '
+             f'{"выстрелов":>10} {"95% ДИ":>17}']
+    for row in rows:
+        low, high = row['win_rate_ci']
+        shots = row['mean_shots_to_win']
+        shots_ci = row['mean_shots_to_win_ci']
+        shots_str = f'{shots:.2f}' if shots is not None else '-'
+        shots_ci_str = f'{shots_ci[0]:.2f}..{shots_ci[1]:.2f}' if shots_ci else '-'
+        lines.append(f'{row["shooting"]:>12} {row["placement"]:>12} {row["games"]:>9} '
+                     f'{row["win_rate"] * 100:>9.2f} {f"{low * 100:.2f}..{high * 100:.2f}":>17} '
+                     f'{shots_str:>10} {shots_ci_str:>17}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """
+    Точка входа команды tournament
+    :param argv: list Аргументы командной строки (без названия команды)
+    :return: None
+    """
+    parser = argparse.ArgumentParser(prog='main.py tournament', description='Турнир стратегий морского боя')
+    parser.add_argument('--shooting', nargs='+', default=sorted(SHOOTING_STRATEGIES),
+                        choices=sorted(SHOOTING_STRATEGIES))
+    parser.add_argument('--placement', nargs='+', default=sorted(PLACEMENT_STRATEGIES),
+                        choices=sorted(PLACEMENT_STRATEGIES))
+    parser.add_argument('--games', type=int, default=10000, help='партий на каждую пару стратегий')
+    parser.add_argument('--seed', type=int, default=0, help='главное зерно турнира')
+    parser.add_argument('--workers', type=int, default=None, help='количество процессов (по умолчанию - все ядра)')
+    parser.add_argument('--chunk', type=int, default=1000, help='партий в одной части')
+    parser.add_argument('--size', type=int, default=Game.FIELD_SIZE())
+    parser.add_argument('--json', action='store_true', help='вывести результат в формате JSON')
+    parser.add_argument('--profile', metavar='PATH', help='играть в одном процессе под cProfile и записать отчет')
+    parser.add_argument('--profile-sort', default='cumulative', help='ключ сортировки отчета cProfile')
+    parser.add_argument('--metrics', metavar='PATH', help='записать гистограммы горячих методов (в одном процессе)')
+    parser.add_argument('--metrics-format', choices=('json', 'prometheus'), default='json')
+    args = parser.parse_args(argv)
+
+    # Профиль и замеры собираются в текущем процессе, поэтому с ними партии не раздаются обработчикам
+    workers = 1 if args.profile or args.metrics else args.workers
+    instrumentation = Instrumentation() if args.metrics else None
+
+    def run():
+        return run_tournament(args.shooting, args.placement, args.games, args.seed, workers, args.chunk, args.size)
+
+    if instrumentation is not None:
+        instrumentation.enable()
+    try:
+        rows = profiled(run, args.profile, args.profile_sort) if args.profile else run()
+    finally:
+        if instrumentation is not None:
+            instrumentation.disable()
+            instrumentation.write(args.metrics, args.metrics_format)
+    print(json.dumps(rows, ensure_ascii=False, indent=2) if args.json else format_report(rows))
@@ -0,0 +1,324 @@
+"""
+Хеши Зобриста игровых полей и таблица транспозиций.
+
+Поисковым стратегиям и кэшам позиций нужно быстро узнавать уже встречавшуюся позицию. Хеш слоя поля
+(публичного или приватного) - XOR 64-битных ключей пар (клетка, статус) по всем клеткам, статус которых
+не ' '. Смена статуса одной клетки меняет хеш двумя операциями XOR, поэтому поле поддерживает хеш
+инкрементально при каждом изменении статуса (Field.zobrist), а хеш пустого слоя равен 0.
+
+Ключи получаются из размера поля и статуса через derive_seed, поэтому хеш одной и той же позиции
+одинаков в любом процессе и при любом запуске и его можно хранить вместе с результатами.
+
+Симметричный вариант хеша ведет 8 хешей сразу - по одному для образа слоя при каждой из 8 симметрий поля
+(book.symmetry_tables). Наименьший из них (canonical) одинаков у всех позиций, переходящих друг в друга
+поворотом или отражением поля, так же как сигнатура дебютной книги, но вычисляется за O(1), а не за O(size^2).
+
+TranspositionTable - таблица позиций ограниченного размера с вытеснением (см. описание класса).
+
+Пример:
+    position = field.zobrist(public=True, symmetric=True)
+    table = TranspositionTable(1 << 16)
+    table.put(position.canonical, position.to_canonical(row, col))
+    row, col = position.from_canonical(table.get(position.canonical))
+"""
+import random
+import sys
+from array import array
+
+from book import symmetry_tables
+from main import derive_seed
+
+# Ключи по размерам полей и статусам, см. zobrist_keys
+_KEYS = {}
+
+
+def zobrist_keys(size, status):
+    """
+    Ключи статуса для всех клеток поля. Статусу ' ' ключи не нужны: пустые клетки в хеш не входят
+    :param size: int Размер поля
+    :param status: str Статус клетки
+    :return: array 64-битные ключи клеток по номерам (row - 1) * size + (col - 1) или None для статуса ' '
+    """
+    if status == ' ':
+        return None
+    keys = _KEYS.get((size, status))
+    if keys is None:
+        cells = size * size
+        # Все ключи одним вызовом getrandbits: на поле 500x500 это в десятки раз быстрее, чем по одному
+        bits = random.Random(derive_seed('zobrist', size, status)).getrandbits(64 * cells)
+        keys = array('Q')
+        keys.frombytes(bits.to_bytes(8 * cells, 'little'))
+        if sys.byteorder == 'big':
+            keys.byteswap()
+        _KEYS[(size, status)] = keys
+    return keys
+
+
+class ZobristHash:
+    """
+    Хеш Зобриста одного слоя поля. Создается полем (Field.zobrist) и обновляется им при каждом изменении
+    статуса клетки слоя
+
+    Свойства
+    -----------
+    public : bool
+        True - хеш публичного слоя, False - приватного
+
+    symmetric : bool
+        Ведутся ли хеши всех 8 симметричных образов слоя
+
+    value : int
+        Хеш слоя
+
+    canonical : int
+        Наименьший из хешей 8 образов слоя, одинаковый у симметричных позиций (только для symmetric)
+
+    symmetry : int
+        Номер симметрии, переводящей слой в образ с хешем canonical (только для symmetric)
+
+    Методы
+    -----------
+    cell_changed(row, col, old_status, new_status) : -> None
+        Обновляет хеш при изменении статуса клетки
+
+    to_canonical(row, col) : -> int
+        Переводит клетку поля в номер клетки канонического образа
+
+    from_canonical(pos) : -> tuple
+        Переводит номер клетки канонического образа в координаты поля
+    """
+
+    def __init__(self, field, public=False, symmetric=False):
+        """
+        Вычисляет хеш слоя по всему полю. Дальше поле само сообщает об изменениях через cell_changed
+        :param field: Объект Field
+        :param public: bool True - публичный слой, False - приватный
+        :param symmetric: bool Вести хеши всех 8 симметричных образов слоя
+        """
+        size = field.size
+        self.__size = size
+        self.__public = public
+        self.__symmetric = symmetric
+        # Таблицы симметрий: forward[p] - клетка образа, в которую симметрия переводит клетку p
+        self.__tables = symmetry_tables(size) if symmetric else ((range(size * size), range(size * size)),)
+        self.__forwards = tuple(forward for forward, _ in self.__tables)
+        self.__keys = {}
+        self.__values = [0] * len(self.__forwards)
+        for row in range(1, size + 1):
+            for col, status in enumerate(field.row_statuses(row, public), 1):
+                if status != ' ':
+                    self.cell_changed(row, col, ' ', status)
+
+    @property
+    def public(self):
+        return self.__public
+
+    @property
+    def symmetric(self):
+        return self.__symmetric
+
+    @property
+    def value(self):
+        return self.__values[0]
+
+    @property
+    def canonical(self):
+        if not self.__symmetric:
+            raise ValueError('The canonical hash needs a symmetric ZobristHash')
+        return min(self.__values)
+
+    @property
+    def symmetry(self):
+        if not self.__symmetric:
+            raise ValueError('The canonical hash needs a symmetric ZobristHash')
+        values = self.__values
+        return values.index(min(values))
+
+    def __status_keys(self, status):
+        keys = self.__keys.get(status)
+        if keys is None and status != ' ':
+            keys = self.__keys[status] = zobrist_keys(self.__size, status)
+        return keys
+
+    def cell_changed(self, row, col, old_status, new_status):
+        """
+        Обновляет хеш при изменении статуса клетки: ключ старого статуса убирается, ключ нового добавляется
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :param old_status: str Статус до изменения
+        :param new_status: str Статус после изменения
+        :return: None
+        """
+        pos = (row - 1) * self.__size + col - 1
+        values = self.__values
+        for status in (old_status, new_status):
+            keys = self.__status_keys(status)
+            if keys is not None:
+                for symmetry, forward in enumerate(self.__forwards):
+                    values[symmetry] ^= keys[forward[pos]]
+
+    def to_canonical(self, row, col):
+        """
+        :param row: int Номер строки
+        :param col: int Номер колонки
+        :return: int Номер клетки канонического образа слоя, в которую переходит клетка поля
+        """
+        return self.__tables[self.symmetry][0][(row - 1) * self.__size + col - 1]
+
+    def from_canonical(self, pos):
+        """
+        :param pos: int Номер клетки канонического образа слоя
+        :return: tuple (строка, колонка) клетки поля, которая переходит в эту клетку образа
+        """
+        row, col = divmod(self.__tables[self.symmetry][1][pos], self.__size)
+        return row + 1, col + 1
+
+
+class TranspositionTable:
+    """
+    Таблица транспозиций ограниченного размера: значения по 64-битным хешам позиций (ZobristHash).
+
+    Хеш определяет корзину из двух записей. Первая хранит самую ценную запись корзины - с наибольшей
+    глубиной (depth, например, сколько работы стоило значение), вторая заменяется всегда. Новая запись
+    занимает первую, если ее глубина не меньше глубины первой или первая записана в прошлом поколении;
+    вытесненная запись переходит во вторую. Поколение увеличивает new_generation (например, перед новой
+    партией), поэтому старые глубокие записи не занимают таблицу вечно. Полный хеш хранится в записи,
+    так что разные позиции, попавшие в одну корзину, не путаются
+
+    Свойства
+    -----------
+    capacity : int
+        Наибольшее количество записей
+
+    generation : int
+        Номер текущего поколения
+
+    stats : dict
+        Счетчики: записей, попаданий, промахов, сохранений, вытеснений и сохранений в занятую
+        другими позициями корзину (collisions)
+
+    Методы
+    -----------
+    get(key, default) : -> object
+        Значение позиции или default
+
+    put(key, value, depth) : -> None
+        Сохраняет значение позиции
+
+    new_generation() : -> None
+        Начинает новое поколение записей
+
+    clear() : -> None
+        Удаляет все записи
+    """
+
+    def __init__(self, capacity=1 << 16):
+        """
+        :param capacity: int Наибольшее количество записей (округляется вверх до четного)
+        """
+        if capacity < 1:
+            raise ValueError('Capacity must be positive')
+        self.__buckets = (capacity + 1) // 2
+        self.__generation = 0
+        self.clear()
+
+    @property
+    def capacity(self):
+        return 2 * self.__buckets
+
+    @property
+    def generation(self):
+        return self.__generation
+
+    @property
+    def stats(self):
+        return dict(self.__stats, entries=self.__entries)
+
+    def clear(self):
+        """
+        Удаляет все записи и обнуляет счетчики
+        :return: None
+        """
+        slots = 2 * self.__buckets
+        self.__keys = [None] * slots
+        self.__values = [None] * slots
+        self.__depths = [0] * slots
+        self.__generations = [0] * slots
+        self.__entries = 0
+        self.__stats = {'hits': 0, 'misses': 0, 'stores': 0, 'replacements': 0, 'collisions': 0}
+
+    def new_generation(self):
+        """
+        Начинает новое поколение: записи прошлых поколений вытесняются новыми независимо от глубины
+        :return: None
+        """
+        self.__generation += 1
+
+    def __slot(self, key):
+        """
+        :return: int Номер записи с этим хешем или None
+        """
+        first = 2 * (key % self.__buckets)
+        if self.__keys[first] == key:
+            return first
+        if self.__keys[first + 1] == key:
+            return first + 1
+        return None
+
+    def get(self, key, default=None):
+        """
+        :param key: int Хеш позиции
+        :param default: Значение, если позиции нет в таблице
+        :return: Значение позиции или default
+        """
+        slot = self.__slot(key)
+        if slot is None:
+            self.__stats['misses'] += 1
+            return default
+        self.__stats['hits'] += 1
+        return self.__values[slot]
+
+    def put(self, key, value, depth=0):
+        """
+        Сохраняет значение позиции. Если позиция уже есть в таблице, ее запись обновляется
+        :param key: int Хеш позиции
+        :param value: Значение
+        :param depth: int Ценность записи: глубокие записи вытесняются только записями не меньшей глубины
+        :return: None
+        """
+        stats = self.__stats
+        stats['stores'] += 1
+        slot = self.__slot(key)
+        if slot is None:
+            keys = self.__keys
+            first = 2 * (key % self.__buckets)
+            occupied = (keys[first] is not None) + (keys[first + 1] is not None)
+            slot = first
+            if keys[first] is not None:
+                stats['collisions'] += 1
+                if depth < self.__depths[first] and self.__generations[first] == self.__generation:
+                    slot = first + 1
+                else:
+                    # Вытесненная из первой записи позиция переходит во вторую, вместо ее записи
+                    self.__move(first, first + 1)
+            if occupied == 2:
+                stats['replacements'] += 1
+            else:
+                self.__entries += 1
+        self.__keys[slot] = key
+        self.__values[slot] = value
+        self.__depths[slot] = depth
+        self.__generations[slot] = self.__generation
+
+    def __move(self, source, target):
+        self.__keys[target] = self.__keys[source]
+        self.__values[target] = self.__values[source]
+        self.__depths[target] = self.__depths[source]
+        self.__generations[target] = self.__generations[source]
+        self.__keys[source] = None
+
+    def __contains__(self, key):
+        return self.__slot(key) is not None
+
+    def __len__(self):
+        return self.__entries